@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Compare delete-and-reinsert against diff-based updates of child rows.
+
+A shopping list with many items is updated with a payload that changes
+only a few of them. For each strategy this reports the request time, the
+number of write statements, and how long the SQLite write lock was held
+(from the first INSERT/UPDATE/DELETE to COMMIT).
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from flask import jsonify, request
+from sqlalchemy import event, insert
+from common import make_app, timed, db
+from src.models.recipe import ShoppingList, ShoppingListItem
+from src.response_cache import response_cache
+from src.routes.shopping_lists import shopping_lists_bp
+
+ITEM_COUNTS = [100, 1000, 5000]
+CHANGED_ITEMS = 5
+REPEAT = 5
+
+def replace_all_items(list_id):
+    """The previous update_shopping_list item handling"""
+    data = request.get_json()
+    shopping_list = ShoppingList.query.get_or_404(list_id)
+    shopping_list.updated_at = datetime.utcnow()
+    ShoppingListItem.query.filter_by(shopping_list_id=list_id).delete()
+    for item_data in data['items']:
+        db.session.add(ShoppingListItem(
+            shopping_list_id=list_id,
+            ingredient_name=item_data['ingredient_name'],
+            quantity=float(item_data['quantity']),
+            unit=item_data['unit'],
+            checked=item_data.get('checked', False)
+        ))
+    db.session.commit()
+    response_cache.invalidate('shopping_list', list_id)
+    return jsonify(shopping_list.to_dict())
+
+class LockTimer:
+    """Track write statements and write lock hold time on an engine"""
+
+    def __init__(self, engine):
+        self.writes = 0
+        self.held_ms = 0.0
+        self._start = None
+        event.listen(engine, 'before_cursor_execute', self.before_execute)
+        event.listen(engine, 'commit', self.commit)
+
+    def before_execute(self, conn, cursor, statement, *args):
+        if statement.lstrip().split(' ', 1)[0].upper() in ('INSERT', 'UPDATE', 'DELETE'):
+            self.writes += 1
+            if self._start is None:
+                self._start = time.perf_counter()
+
+    def commit(self, conn):
+        if self._start is not None:
+            self.held_ms += (time.perf_counter() - self._start) * 1000
+            self._start = None
+
+def main():
+    fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        app = make_app(f'sqlite:///{db_path}', blueprints=[shopping_lists_bp])
+        app.add_url_rule('/old/shopping-lists/<int:list_id>', 'replace_all_items',
+                         replace_all_items, methods=['PUT'])
+        with app.app_context():
+            client = app.test_client()
+            for item_count in ITEM_COUNTS:
+                shopping_list = ShoppingList(name=f'List {item_count}')
+                db.session.add(shopping_list)
+                db.session.flush()
+                db.session.execute(insert(ShoppingListItem.__table__), [
+                    {'shopping_list_id': shopping_list.id, 'ingredient_name': f'Item {i}',
+                     'quantity': 1.0, 'unit': 'pieces', 'checked': False}
+                    for i in range(item_count)
+                ])
+                db.session.commit()
+                list_id = shopping_list.id
+
+                for label, url in (('replace', f'/old/shopping-lists/{list_id}'),
+                                   ('diff', f'/api/shopping-lists/{list_id}')):
+                    timer = LockTimer(db.engine)
+                    with timed() as elapsed:
+                        for run in range(REPEAT):
+                            items = client.get(f'/api/shopping-lists/{list_id}').get_json()['items']
+                            for item in items[:CHANGED_ITEMS]:
+                                item['quantity'] += 1
+                            response = client.put(url, json={'items': items})
+                            assert response.status_code == 200
+                    event.remove(db.engine, 'before_cursor_execute', timer.before_execute)
+                    event.remove(db.engine, 'commit', timer.commit)
+                    print(f"{item_count:>5} items, {label:>7}: {elapsed['ms'] / REPEAT:8.1f} ms/round trip, "
+                          f"{timer.writes / REPEAT:>6.1f} writes, lock held {timer.held_ms / REPEAT:7.2f} ms")
+    finally:
+        os.remove(db_path)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+How long exports hold a request thread when rendered inline versus queued
+as export jobs.
+
+Concurrent clients each export their own 5,000-item list as Excel, first
+with the synchronous endpoint and then by submitting a job and long-polling
+it. The second run also has every client request the same list, which the
+job manager renders only once.
+"""
+import os
+import sys
+import tempfile
+import threading
+
+from sqlalchemy import insert
+from common import make_app, timed, db, ShoppingList, ShoppingListItem
+from src.routes.shopping_lists import shopping_lists_bp
+
+CLIENTS = int(os.environ.get('CLIENTS', 8))
+ITEM_COUNT = 5000
+
+def seed(list_count):
+    db.session.execute(insert(ShoppingList), [
+        {'id': i + 1, 'name': f'Shop {i + 1}'} for i in range(list_count)
+    ])
+    db.session.execute(insert(ShoppingListItem), [
+        {'shopping_list_id': i + 1, 'ingredient_name': f'Ingredient {j + 1}', 'quantity': 1.5, 'unit': 'g'}
+        for i in range(list_count)
+        for j in range(ITEM_COUNT)
+    ])
+    db.session.commit()
+
+def run_clients(app, work):
+    """Run work(client, index) on CLIENTS threads, return per-client results and wall time"""
+    results = [None] * CLIENTS
+
+    def client_thread(index):
+        results[index] = work(app.test_client(), index)
+
+    threads = [threading.Thread(target=client_thread, args=(i,)) for i in range(CLIENTS)]
+    with timed() as elapsed:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return results, elapsed['ms']
+
+def inline_export(client, index):
+    with timed() as elapsed:
+        response = client.get(f'/api/shopping-lists/{index + 1}/export/excel')
+        response.get_data()
+        response.close()
+    return elapsed['ms']
+
+def job_export(list_id_for):
+    def work(client, index):
+        with timed() as submit:
+            response = client.post('/api/shopping-lists/export-jobs', json={
+                'format': 'excel', 'shopping_list_ids': [list_id_for(index)]
+            })
+        job = response.get_json()
+        while job['status'] in ('queued', 'running'):
+            job = client.get(f"/api/shopping-lists/export-jobs/{job['id']}?wait=30").get_json()
+        response = client.get(f"/api/shopping-lists/export-jobs/{job['id']}/download")
+        response.get_data()
+        response.close()
+        return submit['ms'], job['id']
+    return work
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        app = make_app(blueprints=[shopping_lists_bp])
+        app.config['EXPORT_JOB_DIR'] = directory
+        with app.app_context():
+            seed(CLIENTS)
+
+        print(f"{CLIENTS} clients, {ITEM_COUNT} items per list")
+        times, wall = run_clients(app, inline_export)
+        print(f"{'inline':>18}: request held {sum(times) / len(times):7.0f}ms on average, all done in {wall:7.0f}ms")
+
+        results, wall = run_clients(app, job_export(lambda index: index + 1))
+        submit_ms = [submit for submit, _ in results]
+        print(
+            f"{'jobs':>18}: submit took {sum(submit_ms) / len(submit_ms):7.1f}ms on average, "
+            f"all done in {wall:7.0f}ms"
+        )
+
+        # A new version of the list, so the shared job has to render it
+        app.test_client().put('/api/shopping-lists/1', json={'name': 'Shop 1 (renamed)'})
+        results, wall = run_clients(app, job_export(lambda index: 1))
+        jobs = {job_id for _, job_id in results}
+        print(f"{'jobs, same list':>18}: {len(jobs)} render(s) for {CLIENTS} requests, all done in {wall:7.0f}ms")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Disk used by recipe images in the content-addressed store, and what garbage
+collection reclaims.
+
+Every recipe gets a photo of its own, then half of them switch to the same
+shared photo (a stock image, say) and a quarter are deleted. Per-upload
+file names would keep a copy of the shared photo's variants for every
+recipe; the store keeps one, and collection removes the replaced and
+deleted photos that nothing refers to any more.
+"""
+import io
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+from PIL import Image
+from common import make_app, seed_catalog, timed
+from src.models.image_store import collect_garbage
+from src.models.search import ensure_search_index
+from src.routes.recipes import recipes_bp
+
+RECIPES = 40
+
+def photo(seed):
+    image = Image.effect_mandelbrot((2000, 1500), (-2.2 + seed * 0.01, -1.2, 1.0, 1.2), 100).convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+def directory_size(path):
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        images_dir = os.path.join(directory, 'images')
+        app = make_app(
+            f"sqlite:///{os.path.join(directory, 'images.db')}",
+            blueprints=[recipes_bp],
+            configure_engine=True
+        )
+        app.config['IMAGES_DIR'] = images_dir
+        with app.app_context():
+            seed_catalog(RECIPES)
+            ensure_search_index()
+        client = app.test_client()
+
+        def upload(recipe_id, data):
+            response = client.post(f'/api/recipes/{recipe_id}/image', data={'image': (io.BytesIO(data), 'photo.jpg')})
+            assert response.status_code == 202, response.get_json()
+
+        def wait():
+            while any(recipe['image_status'] == 'processing' for recipe in client.get('/api/recipes').get_json()):
+                time.sleep(0.05)
+
+        for recipe_id in range(1, RECIPES + 1):
+            upload(recipe_id, photo(recipe_id))
+        wait()
+        own_photos = directory_size(images_dir)
+
+        # Half of the recipes switch to the same photo and a quarter are
+        # deleted, leaving their own photos unreferenced
+        shared = photo(0)
+        for recipe_id in range(1, RECIPES // 2 + 1):
+            upload(recipe_id, shared)
+        wait()
+        shared_size = directory_size(images_dir) - own_photos
+        for recipe_id in range(RECIPES - RECIPES // 4 + 1, RECIPES + 1):
+            assert client.delete(f'/api/recipes/{recipe_id}').status_code == 200
+        before = directory_size(images_dir)
+
+        print(f"{RECIPES} recipes, {RECIPES // 2} switched to one shared photo, {RECIPES // 4} deleted")
+        print(f"{'shared photo':>22}: {shared_size / 1024:.0f}KB stored once, {shared_size * (RECIPES // 2) / 1024:.0f}KB with per-upload files")
+        print(f"{'before collection':>22}: {before / 1024:.0f}KB on disk")
+
+        with app.app_context():
+            with timed() as elapsed:
+                report = collect_garbage(images_dir, timedelta(0))
+        print(
+            f"garbage collection: {report['blobs_removed']} blobs, {report['orphans_removed']} orphans, "
+            f"{report['bytes_reclaimed'] / 1024:.0f}KB reclaimed in {elapsed['ms']:.1f}ms, "
+            f"{directory_size(images_dir) / 1024:.0f}KB left"
+        )
+
+        # Everything still referenced must have survived
+        for recipe in client.get('/api/recipes').get_json():
+            assert os.path.exists(os.path.join(images_dir, recipe['image']['webp'].rsplit('/', 1)[-1]))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Check the cold start of the app against a time budget.
+
+Each run is a fresh interpreter that imports src.main under
+`python -X importtime` and then calls create_app(). The import time is
+the cumulative figure importtime reports for src.main, so it is inflated
+by importtime's own overhead, as was the budget it is compared against.
+
+Exits non-zero when the median import or create_app() time is over budget,
+when an export or imaging library is imported before it is used, or when
+building the app touches the database. Nothing runs this automatically;
+run it by hand after changing imports. The import budget leaves about 20%
+over the ~620 ms median measured after the export and imaging libraries
+were made lazy, so it catches regressions without tripping on noise; the
+lazy libraries themselves are checked directly. Budgets can be overridden
+with IMPORT_TIME_BUDGET_MS and CREATE_APP_BUDGET_MS for slower machines.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RUNS = 9
+IMPORT_TIME_BUDGET_MS = float(os.environ.get('IMPORT_TIME_BUDGET_MS', 750))
+CREATE_APP_BUDGET_MS = float(os.environ.get('CREATE_APP_BUDGET_MS', 150))
+
+# Loaded on first use by the routes that need them
+LAZY_MODULES = ('reportlab', 'openpyxl', 'PIL')
+
+CHILD = '''
+import json, sys, time
+import src.main
+start = time.perf_counter()
+src.main.create_app()
+print(json.dumps({
+    'create_app_ms': (time.perf_counter() - start) * 1000,
+    'loaded': sorted(name for name in %r if name in sys.modules)
+}))
+''' % (LAZY_MODULES,)
+
+def run_once(database_path):
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{database_path}')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CHILD],
+        cwd=APP_ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    import_us = None
+    for line in result.stderr.splitlines():
+        fields = [field.strip() for field in line.split('|')]
+        if len(fields) == 3 and fields[2] == 'src.main':
+            import_us = int(fields[1])
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    return import_us / 1000, report['create_app_ms'], report['loaded']
+
+def main():
+    import_ms = []
+    create_ms = []
+    loaded = set()
+    with tempfile.TemporaryDirectory() as directory:
+        database_path = os.path.join(directory, 'app.db')
+        for _ in range(RUNS):
+            run_import_ms, run_create_ms, run_loaded = run_once(database_path)
+            import_ms.append(run_import_ms)
+            create_ms.append(run_create_ms)
+            loaded.update(run_loaded)
+        database_touched = os.path.exists(database_path)
+
+    import_median = statistics.median(import_ms)
+    create_median = statistics.median(create_ms)
+    print(f"import src.main: {import_median:7.1f} ms median of {RUNS} (budget {IMPORT_TIME_BUDGET_MS:.0f} ms)")
+    print(f"create_app():    {create_median:7.1f} ms median of {RUNS} (budget {CREATE_APP_BUDGET_MS:.0f} ms)")
+
+    failures = []
+    if import_median > IMPORT_TIME_BUDGET_MS:
+        failures.append('import time is over budget')
+    if create_median > CREATE_APP_BUDGET_MS:
+        failures.append('create_app() is over budget')
+    if loaded:
+        failures.append(f"imported at startup: {', '.join(sorted(loaded))}")
+    if database_touched:
+        failures.append('building the app created the database')
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        return 1
+    print("OK: cold start is within budget")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Throughput of concurrent shopping-list item toggles written directly, one
+transaction per request, and through the item state queue, which batches
+them into shared transactions.
+
+Every request sets an explicit checked value, and the final state of each
+item is checked against the last value written to it.
+"""
+import os
+import sys
+import tempfile
+import threading
+
+from sqlalchemy import event, insert
+from common import make_app, timed, db, ShoppingList, ShoppingListItem
+from src.routes.shopping_lists import shopping_lists_bp
+
+ITEM_COUNT = 200
+THREADS = int(os.environ.get('THREADS', 16))
+TOGGLES_PER_THREAD = int(os.environ.get('TOGGLES_PER_THREAD', 100))
+
+def run(use_queue):
+    with tempfile.TemporaryDirectory() as directory:
+        app = make_app(
+            f"sqlite:///{os.path.join(directory, 'toggles.db')}",
+            blueprints=[shopping_lists_bp],
+            configure_engine=True
+        )
+        app.config['SHOPPING_ITEM_WRITE_QUEUE'] = use_queue
+        with app.app_context():
+            db.session.execute(insert(ShoppingList), [{'id': 1, 'name': 'Weekly shop'}])
+            db.session.execute(insert(ShoppingListItem), [
+                {'shopping_list_id': 1, 'ingredient_name': f'Item {i}', 'quantity': 1.0, 'unit': 'pieces'}
+                for i in range(ITEM_COUNT)
+            ])
+            db.session.commit()
+            engine = db.engine
+
+        commits = {'count': 0, 'errors': 0}
+        lock = threading.Lock()
+
+        def on_commit(connection):
+            commits['count'] += 1
+
+        event.listen(engine, 'commit', on_commit)
+
+        # Each thread owns its own items, so the last value it writes to an
+        # item must be the final state
+        expected = {}
+
+        def shopper(thread_index):
+            client = app.test_client()
+            for n in range(TOGGLES_PER_THREAD):
+                item_id = thread_index + THREADS * (n % (ITEM_COUNT // THREADS)) + 1
+                checked = n % 3 != 0
+                response = client.put(f'/api/shopping-lists/1/items/{item_id}/toggle', json={'checked': checked})
+                if response.status_code != 200:
+                    with lock:
+                        commits['errors'] += 1
+                    continue
+                expected[item_id] = checked
+
+        threads = [threading.Thread(target=shopper, args=(i,)) for i in range(THREADS)]
+        with timed() as elapsed:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        event.remove(engine, 'commit', on_commit)
+
+        with app.app_context():
+            final = dict(db.session.query(ShoppingListItem.id, ShoppingListItem.checked))
+            mismatches = sum(1 for item_id, checked in expected.items() if final[item_id] != checked)
+            db.session.remove()
+            db.engine.dispose()
+    return elapsed['ms'], commits['count'], commits['errors'], mismatches
+
+def main():
+    total = THREADS * TOGGLES_PER_THREAD
+    print(f"{THREADS} threads x {TOGGLES_PER_THREAD} toggles")
+    for label, use_queue in [('direct', False), ('write queue', True)]:
+        ms, commit_count, errors, mismatches = run(use_queue)
+        print(
+            f"{label:>12}: {total / (ms / 1000):7.0f} toggles/s, {commit_count:>5} commits, "
+            f"{errors} errors, {mismatches} wrong final states"
+        )
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
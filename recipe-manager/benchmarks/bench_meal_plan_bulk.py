@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Compare planning a four-week rotation with one POST /api/meal-plans per
+plan against POST /api/meal-plans/bulk and POST /api/meal-plans/copy.
+"""
+import sys
+from datetime import date, timedelta
+
+from common import make_app, seed_catalog, seed_meal_plans, count_queries, timed, db, MealPlan
+from src.routes.meal_plans import meal_plans_bp
+
+RECIPE_COUNT = 500
+MEALS_PER_DAY = 3
+WEEKS = 4
+
+def setup():
+    app = make_app(blueprints=[meal_plans_bp])
+    with app.app_context():
+        seed_catalog(RECIPE_COUNT)
+        # One week of plans to copy from
+        category_ids = seed_meal_plans(7 * MEALS_PER_DAY, RECIPE_COUNT, MEALS_PER_DAY)
+        db.session.remove()
+    return app, category_ids
+
+def rotation(category_ids):
+    start = date(2024, 1, 8)
+    return [
+        {
+            'date': (start + timedelta(days=i // MEALS_PER_DAY)).isoformat(),
+            'meal_category_id': category_ids[i % MEALS_PER_DAY],
+            'recipe_id': (i * 37) % RECIPE_COUNT + 1,
+            'people_count': 2 + i % 4
+        }
+        for i in range(7 * WEEKS * MEALS_PER_DAY)
+    ]
+
+def run_single():
+    app, category_ids = setup()
+    with app.app_context():
+        client = app.test_client()
+        with count_queries() as queries, timed() as elapsed:
+            for plan in rotation(category_ids):
+                assert client.post('/api/meal-plans', json=plan).status_code == 201
+        return queries['count'], elapsed['ms'], db.session.query(MealPlan).count()
+
+def run_bulk():
+    app, category_ids = setup()
+    with app.app_context():
+        client = app.test_client()
+        with count_queries() as queries, timed() as elapsed:
+            response = client.post('/api/meal-plans/bulk', json={'meal_plans': rotation(category_ids)})
+        assert response.status_code == 201
+        return queries['count'], elapsed['ms'], db.session.query(MealPlan).count()
+
+def run_copy():
+    app, _ = setup()
+    with app.app_context():
+        client = app.test_client()
+        with count_queries() as queries, timed() as elapsed:
+            response = client.post('/api/meal-plans/copy', json={
+                'source_start': '2024-01-01', 'source_end': '2024-01-07',
+                'target_start': '2024-01-08', 'repeat': WEEKS
+            })
+        assert response.status_code == 201
+        return queries['count'], elapsed['ms'], db.session.query(MealPlan).count()
+
+def main():
+    for label, run in [('one POST per plan', run_single), ('bulk', run_bulk), ('copy week x4', run_copy)]:
+        query_count, ms, plan_count = run()
+        print(f"{label:>18}: {query_count:>4} queries, {ms:8.1f} ms, {plan_count} plans in total")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Check that GET /api/meal-plans/calendar issues a constant number of
+queries whatever the length of the range.
+
+Exits non-zero if the query count grows with the number of plans returned.
+"""
+import sys
+
+from common import make_app, seed_catalog, seed_meal_plans, count_queries, timed, db
+from src.routes.meal_plans import meal_plans_bp
+from src.response_cache import response_cache
+
+RECIPE_COUNT = 1000
+PLAN_COUNT = 3 * 366
+RANGES = [
+    ('week', 'date=2024-03-06&view=week'),
+    ('month', 'date=2024-03-06&view=month'),
+    ('quarter', 'start_date=2024-01-01&end_date=2024-03-31'),
+    ('year', 'start_date=2024-01-01&end_date=2024-12-31'),
+]
+
+def main():
+    app = make_app(blueprints=[meal_plans_bp])
+    counts = set()
+    with app.app_context():
+        seed_catalog(RECIPE_COUNT)
+        seed_meal_plans(PLAN_COUNT, RECIPE_COUNT)
+        db.session.remove()
+        client = app.test_client()
+        for label, query in RANGES:
+            response_cache.clear()
+            with count_queries() as queries, timed() as elapsed:
+                response = client.get(f'/api/meal-plans/calendar?{query}')
+            assert response.status_code == 200
+            plan_count = sum(day['meal_count'] for day in response.get_json()['days'].values())
+            counts.add(queries['count'])
+            print(f"{label:>8}: {plan_count:>5} plans, {queries['count']} queries, {elapsed['ms']:8.1f} ms")
+
+    if len(counts) != 1:
+        print("FAIL: query count depends on the range")
+        return 1
+    print("OK: query count is constant")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
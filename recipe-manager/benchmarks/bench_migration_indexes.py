@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Run the schema migrations on a database laid out like an older release
+(no secondary indexes, user_version 0) and report each hot query's plan
+and time before and after.
+"""
+import os
+import sys
+import tempfile
+
+from sqlalchemy import insert, text
+from common import make_app, seed_catalog, seed_meal_plans, timed, db, ShoppingList, ShoppingListItem
+from src.models.schema import HOT_QUERIES, migrate
+
+RECIPE_COUNT = 20000
+PLAN_COUNT = 3000
+LIST_COUNT = 200
+ITEMS_PER_LIST = 30
+REPEAT = 200
+
+MANAGED_INDEXES = [
+    'uq_meal_plan_date_category',
+    'ix_ingredient_recipe_id',
+    'ix_shopping_list_item_shopping_list_id',
+    'ix_category_name_type',
+    'ix_recipe_created_at_id',
+]
+
+def seed():
+    seed_catalog(RECIPE_COUNT)
+    seed_meal_plans(PLAN_COUNT, RECIPE_COUNT)
+    db.session.execute(insert(ShoppingList), [{'name': f'List {i + 1}'} for i in range(LIST_COUNT)])
+    db.session.execute(insert(ShoppingListItem), [
+        {'shopping_list_id': i + 1, 'ingredient_name': f'Item {j}', 'quantity': 1.0, 'unit': 'pieces'}
+        for i in range(LIST_COUNT)
+        for j in range(ITEMS_PER_LIST)
+    ])
+    db.session.commit()
+
+def make_legacy():
+    """Drop the managed indexes and reset the schema version"""
+    for name in MANAGED_INDEXES:
+        db.session.execute(text(f'DROP INDEX IF EXISTS {name}'))
+    db.session.execute(text('PRAGMA user_version = 0'))
+    db.session.commit()
+
+def time_hot_queries():
+    timings = {}
+    for name, (sql, params) in HOT_QUERIES.items():
+        statement = text(sql)
+        with timed() as elapsed:
+            for _ in range(REPEAT):
+                db.session.execute(statement, params).all()
+        timings[name] = elapsed['ms'] / REPEAT
+    return timings
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        app = make_app(f"sqlite:///{os.path.join(directory, 'legacy.db')}")
+        with app.app_context():
+            seed()
+            make_legacy()
+            before = time_hot_queries()
+            applied, plans = migrate()
+            after = time_hot_queries()
+            db.session.remove()
+
+    for version, description in applied:
+        print(f"applied {version}: {description}")
+    print()
+    for name in HOT_QUERIES:
+        plan_before, plan_after = plans[name]
+        print(f"{name}: {before[name]:.3f} ms -> {after[name]:.3f} ms")
+        print(f"  before: {plan_before}")
+        print(f"  after:  {plan_after}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
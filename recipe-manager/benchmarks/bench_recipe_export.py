@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Stream GET /api/recipes/export for growing catalogs and report peak RSS.
+
+Each catalog is seeded into a temporary database file by one subprocess and
+exported by another, so the reported peak RSS covers only the export.
+It should stay roughly flat as the catalog grows, unlike GET /api/recipes
+which builds the whole list in memory.
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+from common import make_app, seed_catalog, timed
+from src.routes.recipes import recipes_bp
+
+CATALOG_SIZES = [10000, 50000, 100000]
+
+def seed(db_path, recipe_count):
+    app = make_app(f'sqlite:///{db_path}', blueprints=[recipes_bp])
+    with app.app_context():
+        seed_catalog(recipe_count, ingredients_per_recipe=8)
+
+def export(db_path, export_format):
+    app = make_app(f'sqlite:///{db_path}', blueprints=[recipes_bp])
+    with app.app_context():
+        client = app.test_client()
+        total = 0
+        with timed() as elapsed:
+            response = client.get(f'/api/recipes/export?format={export_format}', buffered=False)
+            for chunk in response.response:
+                total += len(chunk)
+            response.close()
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print(f"{export_format:>6}: {total / 1024 / 1024:7.1f} MiB streamed "
+              f"in {elapsed['ms'] / 1000:5.1f} s, peak RSS {peak / 1024:6.1f} MiB")
+
+def main():
+    if len(sys.argv) == 4:
+        command, db_path, argument = sys.argv[1:]
+        if command == 'seed':
+            seed(db_path, int(argument))
+        else:
+            export(db_path, argument)
+        return 0
+
+    script = os.path.abspath(__file__)
+    for recipe_count in CATALOG_SIZES:
+        fd, db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        try:
+            subprocess.run([sys.executable, script, 'seed', db_path, str(recipe_count)], check=True)
+            print(f"{recipe_count} recipes")
+            sys.stdout.flush()
+            for export_format in ('ndjson', 'csv'):
+                subprocess.run([sys.executable, script, 'export', db_path, export_format], check=True)
+        finally:
+            os.remove(db_path)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Bytes a recipe listing page costs the browser, with uploads stored as-is
+(as before) and with the resized variants the API now returns for lists.
+
+A phone-sized 12 MP JPEG is uploaded for every recipe on the page. The page
+cost is the JSON body plus every image it references; the "before" figure
+uses the original upload for each card. Upload latency and the background
+processing time are reported too.
+"""
+import io
+import os
+import sys
+import tempfile
+import time
+
+from PIL import Image
+from common import make_app, seed_catalog, timed
+from src.routes.recipes import recipes_bp
+
+PAGE_SIZE = 20
+PHOTO_SIZE = (4032, 3024)
+
+def phone_photo():
+    """A noisy 12 MP JPEG, about the size a phone camera produces"""
+    base = Image.effect_mandelbrot(PHOTO_SIZE, (-2.2, -1.2, 1.0, 1.2), 200).convert('RGB')
+    noise = Image.effect_noise(PHOTO_SIZE, 40).convert('RGB')
+    photo = Image.blend(base, noise, 0.35)
+    buffer = io.BytesIO()
+    photo.save(buffer, 'JPEG', quality=95)
+    return buffer.getvalue()
+
+def file_size(directory, url):
+    return os.path.getsize(os.path.join(directory, url.rsplit('/', 1)[-1]))
+
+def main():
+    photo = phone_photo()
+    with tempfile.TemporaryDirectory() as directory:
+        # Workers write from their own threads, so use a file database
+        # rather than one in-memory connection shared by every thread
+        app = make_app(
+            f"sqlite:///{os.path.join(directory, 'images.db')}",
+            blueprints=[recipes_bp],
+            configure_engine=True
+        )
+        app.config['IMAGES_DIR'] = os.path.join(directory, 'images')
+        with app.app_context():
+            seed_catalog(PAGE_SIZE)
+        client = app.test_client()
+
+        upload_ms = []
+        with timed() as processing:
+            for recipe_id in range(1, PAGE_SIZE + 1):
+                with timed() as elapsed:
+                    response = client.post(f'/api/recipes/{recipe_id}/image', data={
+                        'image': (io.BytesIO(photo), 'photo.jpg')
+                    })
+                assert response.status_code == 202, response.get_json()
+                upload_ms.append(elapsed['ms'])
+            pending = set(range(1, PAGE_SIZE + 1))
+            while pending:
+                time.sleep(0.05)
+                pending = {
+                    recipe_id for recipe_id in pending
+                    if client.get(f'/api/recipes/{recipe_id}').get_json()['image_status'] == 'processing'
+                }
+
+        body = client.get(f'/api/recipes?limit={PAGE_SIZE}').get_data()
+        recipes = client.get(f'/api/recipes?limit={PAGE_SIZE}').get_json()['recipes']
+        jpeg = sum(file_size(app.config['IMAGES_DIR'], recipe['image']['jpeg']) for recipe in recipes)
+        webp = sum(file_size(app.config['IMAGES_DIR'], recipe['image']['webp']) for recipe in recipes)
+        before = len(body) + len(photo) * len(recipes)
+
+        print(f"{PAGE_SIZE} recipes per page, {len(photo) / 1024 / 1024:.1f}MB upload each")
+        print(f"{'original uploads':>22}: {before / 1024:10.0f}KB per page")
+        print(f"{'card JPEG variants':>22}: {(len(body) + jpeg) / 1024:10.0f}KB per page")
+        print(f"{'card WebP variants':>22}: {(len(body) + webp) / 1024:10.0f}KB per page")
+        print(
+            f"upload response {sum(upload_ms) / len(upload_ms):.0f}ms on average, "
+            f"all variants ready after {processing['ms']:.0f}ms"
+        )
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
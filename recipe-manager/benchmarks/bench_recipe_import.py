@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Time POST /api/recipes/import with a large NDJSON body.
+
+Writes the NDJSON to a temporary file and streams it to the endpoint, then
+reports throughput and the process's peak RSS.
+"""
+import json
+import os
+import sys
+import tempfile
+import resource
+
+from common import make_app, timed, recipe_name, PANTRY, db
+from src.models.recipe import Category, Recipe, Ingredient
+from src.models.search import ensure_search_index
+from src.routes.recipes import recipes_bp
+
+RECIPE_COUNT = int(os.environ.get("RECIPE_COUNT", 100000))
+INGREDIENTS_PER_RECIPE = 8
+
+def write_ndjson(path):
+    with open(path, 'w') as f:
+        for i in range(RECIPE_COUNT):
+            f.write(json.dumps({
+                'name': recipe_name(i),
+                'description': f'Description for recipe {i + 1}',
+                'instructions': 'Mix everything together and cook until done.',
+                'prep_time': 10,
+                'cook_time': 20,
+                'servings': 4,
+                'category_name': 'Dinner',
+                'ingredients': [
+                    {'name': PANTRY[(i + j) % len(PANTRY)], 'quantity': 100, 'unit': 'grams'}
+                    for j in range(INGREDIENTS_PER_RECIPE)
+                ]
+            }))
+            f.write('\n')
+            if i % 10000 == 0:
+                f.write('{"name": ""}\n')
+
+def main():
+    fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    ndjson_path = db_path + '.ndjson'
+    try:
+        write_ndjson(ndjson_path)
+        app = make_app(f'sqlite:///{db_path}', blueprints=[recipes_bp])
+        with app.app_context():
+            db.session.add(Category(name='Dinner', type='recipe'))
+            db.session.commit()
+            ensure_search_index()
+
+            client = app.test_client()
+            with open(ndjson_path, 'rb') as body, timed() as elapsed:
+                response = client.post(
+                    '/api/recipes/import',
+                    input_stream=body,
+                    content_type='application/x-ndjson',
+                    content_length=os.path.getsize(ndjson_path)
+                )
+            peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+            summary = response.get_json()
+            seconds = elapsed['ms'] / 1000
+            print(f"imported {summary['imported']} recipes ({summary['failed']} failed lines) "
+                  f"in {seconds:.1f} s, {summary['imported'] / seconds:.0f} recipes/s")
+            print(f"peak RSS: {peak_kib / 1024:.1f} MiB")
+            print(f"rows: {Recipe.query.count()} recipes, {Ingredient.query.count()} ingredients")
+    finally:
+        for path in (db_path, ndjson_path):
+            if os.path.exists(path):
+                os.remove(path)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
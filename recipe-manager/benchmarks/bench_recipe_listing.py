@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Check that GET /api/recipes issues a constant number of queries.
+
+The full listing and the first and a later keyset page are counted for
+catalogs of increasing size, with a before_cursor_execute listener. Exits
+non-zero if any of the counts grows with the size of the catalog.
+
+The repo has no test suite or CI, so this is a script to run by hand
+rather than a test.
+"""
+import sys
+
+from common import make_app, seed_catalog, count_queries, timed, db
+from src.routes.recipes import recipes_bp
+
+CATALOG_SIZES = [10, 100, 1000, 5000]
+PAGE_SIZE = 5
+
+def get(client, url):
+    with count_queries() as queries, timed() as elapsed:
+        response = client.get(url)
+    assert response.status_code == 200
+    return response.get_json(), queries['count'], elapsed['ms']
+
+def run(recipe_count):
+    """Return {listing: query count} and the full listing's time"""
+    app = make_app(blueprints=[recipes_bp])
+    with app.app_context():
+        seed_catalog(recipe_count)
+        client = app.test_client()
+        counts = {}
+        body, counts['full list'], ms = get(client, '/api/recipes')
+        assert len(body) == recipe_count
+        body, counts['first page'], _ = get(client, f'/api/recipes?limit={PAGE_SIZE}')
+        assert len(body['recipes']) == PAGE_SIZE
+        body, counts['next page'], _ = get(client, f"/api/recipes?limit={PAGE_SIZE}&cursor={body['next_cursor']}")
+        assert len(body['recipes']) == PAGE_SIZE
+        db.session.remove()
+        db.drop_all()
+    return counts, ms
+
+def main():
+    counts_by_listing = {}
+    for recipe_count in CATALOG_SIZES:
+        counts, ms = run(recipe_count)
+        for listing, query_count in counts.items():
+            counts_by_listing.setdefault(listing, set()).add(query_count)
+        summary = ', '.join(f'{listing} {query_count}' for listing, query_count in counts.items())
+        print(f"{recipe_count:>6} recipes: queries: {summary}; full list {ms:8.1f} ms")
+
+    growing = [listing for listing, counts in counts_by_listing.items() if len(counts) != 1]
+    if growing:
+        print(f"FAIL: query count depends on catalog size for: {', '.join(growing)}")
+        return 1
+    print("OK: query count is constant")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Time keyset-paginated recipe listing at increasing page depths.
+
+With a (created_at, id) cursor every page is an index seek, so late pages
+should cost about the same as the first one.
+"""
+import sys
+
+from common import make_app, seed_catalog, timed
+from src.routes.recipes import recipes_bp
+
+RECIPE_COUNT = 50000
+PAGE_SIZE = 50
+SAMPLE_PAGES = [1, 10, 100, 500, 999]
+
+def main():
+    app = make_app(blueprints=[recipes_bp])
+    with app.app_context():
+        seed_catalog(RECIPE_COUNT, ingredients_per_recipe=2)
+        client = app.test_client()
+        cursor = None
+        for page in range(1, max(SAMPLE_PAGES) + 1):
+            url = f'/api/recipes?limit={PAGE_SIZE}&fields=id,name,category_name,prep_time'
+            if cursor:
+                url += f'&cursor={cursor}'
+            with timed() as elapsed:
+                response = client.get(url)
+            body = response.get_json()
+            if page in SAMPLE_PAGES:
+                print(f"page {page:>4}: {elapsed['ms']:6.2f} ms, {len(response.data)} bytes")
+            cursor = body['next_cursor']
+            if cursor is None:
+                break
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
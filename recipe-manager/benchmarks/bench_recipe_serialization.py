@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+GET /api/recipes on a 10,000 recipe catalog: the previous path (eager ORM
+query, Recipe.to_dict() per recipe, jsonify) against the row-tuple
+serializers the route uses now.
+
+Loading and serializing are timed separately from encoding the body, and
+the response size is reported with and without gzip.
+"""
+import gzip
+import statistics
+
+from flask import jsonify
+from common import make_app, seed_catalog, timed
+from src.json_response import compress, encode_json
+from src.models.serializers import RECIPE_SCHEMA, INGREDIENT_SCHEMA, attach_children
+from src.models.images import select_image
+from src.models.recipe import db, Recipe, Category
+from src.routes.recipes import recipes_bp, eager_recipe_query, LIST_IMAGE_SIZE
+
+RECIPE_COUNT = 10_000
+ROUNDS = 5
+
+def to_dict_path():
+    recipes = eager_recipe_query().order_by(Recipe.created_at.desc(), Recipe.id.desc()).all()
+    return [recipe.to_dict(LIST_IMAGE_SIZE) for recipe in recipes]
+
+def row_path():
+    rows = db.session.query(Recipe.id, *RECIPE_SCHEMA.columns, Recipe.image_variants).outerjoin(
+        Category, Recipe.category_id == Category.id
+    ).order_by(Recipe.created_at.desc(), Recipe.id.desc()).all()
+    results = [RECIPE_SCHEMA.serialize(row[1:]) for row in rows]
+    for result, row in zip(results, rows):
+        result['image_path'], result['image'] = select_image(result['image_path'], row[-1], LIST_IMAGE_SIZE)
+    attach_children(results, [row[0] for row in rows], 'ingredients', INGREDIENT_SCHEMA, 'recipe_id')
+    return results
+
+def median_ms(function):
+    samples = []
+    for _ in range(ROUNDS):
+        db.session.expunge_all()
+        with timed() as elapsed:
+            result = function()
+        samples.append(elapsed['ms'])
+    return statistics.median(samples), result
+
+def main():
+    app = make_app(blueprints=[recipes_bp])
+    with app.app_context():
+        seed_catalog(RECIPE_COUNT)
+
+        with app.test_request_context():
+            load_before, before = median_ms(to_dict_path)
+            load_after, after = median_ms(row_path)
+            assert before == after, 'serializers disagree with to_dict()'
+            encode_before, body_before = median_ms(lambda: jsonify(before).get_data())
+            encode_after, body_after = median_ms(lambda: encode_json(after))
+
+        print(f"{RECIPE_COUNT} recipes, median of {ROUNDS} runs")
+        print(f"  load + serialize: to_dict {load_before:8.1f} ms   rows {load_after:8.1f} ms")
+        print(f"  encode:           jsonify {encode_before:8.1f} ms   bytes {encode_after:8.1f} ms")
+
+        client = app.test_client()
+        route_ms, response = median_ms(lambda: client.get('/api/recipes'))
+        gzip_ms, gzipped = median_ms(lambda: client.get('/api/recipes', headers={'Accept-Encoding': 'gzip'}))
+        assert gzipped.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(gzipped.get_data()) == response.get_data()
+        with timed() as compressing:
+            compress(body_after)
+        print(
+            f"  route: {route_ms:.1f} ms, {len(response.get_data()) / 1024:.0f} KB; "
+            f"gzipped {gzip_ms:.1f} ms ({compressing['ms']:.1f} ms compressing), "
+            f"{len(gzipped.get_data()) / 1024:.0f} KB"
+        )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Time /api/ai/recipe-suggestions as the pantry grows.
+
+The old implementation ran one ILIKE join per pantry item; the ingredient
+index answers the whole pantry in memory after one query checking its
+version.
+"""
+import sys
+
+from common import make_app, seed_catalog, count_queries, timed, PANTRY
+from src.models.ingredient_index import ingredient_index
+from src.routes.ai_assistant import ai_assistant_bp
+
+RECIPE_COUNT = 20000
+PANTRY_SIZES = [1, 5, 10, 20]
+REPEAT = 10
+
+def main():
+    app = make_app(blueprints=[ai_assistant_bp])
+    with app.app_context():
+        seed_catalog(RECIPE_COUNT, ingredients_per_recipe=8)
+        with timed() as elapsed:
+            ingredient_index.load()
+        print(f"built index for {RECIPE_COUNT} recipes in {elapsed['ms']:.0f} ms")
+
+        client = app.test_client()
+        for size in PANTRY_SIZES:
+            body = {'ingredients': PANTRY[:size]}
+            with count_queries() as queries, timed() as elapsed:
+                for _ in range(REPEAT):
+                    response = client.post('/api/ai/recipe-suggestions', json=body)
+            top = response.get_json()['suggestions'][0]
+            print(f"pantry of {size:>2}: {elapsed['ms'] / REPEAT:6.2f} ms/request, "
+                  f"{queries['count'] // REPEAT} queries, top coverage {top.get('coverage')}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
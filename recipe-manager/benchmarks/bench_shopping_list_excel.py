@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Peak Python memory and time of Excel exports: an in-memory openpyxl
+workbook with per-cell fonts, as the export used to build it, against the
+streaming write-only export, for a single growing list and for a workbook
+of many lists in both layouts.
+
+Times include tracemalloc's overhead, so compare them with each other only.
+"""
+import io
+import sys
+import tempfile
+import tracemalloc
+
+import openpyxl
+from openpyxl.styles import Font, Alignment
+from sqlalchemy import insert
+from common import make_app, timed, db, ShoppingList, ShoppingListItem
+from src.models.shopping_list_export import write_excel
+
+SIZES = [1000, 10000, 25000]
+MULTI_LISTS = 20
+MULTI_ITEMS = 1000
+
+def seed(list_count, item_count):
+    db.session.execute(insert(ShoppingList), [
+        {'id': i + 1, 'name': f'Shop {i + 1}'} for i in range(list_count)
+    ])
+    db.session.execute(insert(ShoppingListItem), [
+        {
+            'shopping_list_id': i + 1,
+            'ingredient_name': f'Ingredient {j + 1}',
+            'quantity': round(1 + j * 0.25, 2),
+            'unit': 'g',
+            'checked': j % 5 == 0
+        }
+        for i in range(list_count)
+        for j in range(item_count)
+    ])
+    db.session.commit()
+
+def in_memory_export(list_id):
+    """The previous export: a regular workbook saved to a BytesIO"""
+    shopping_list = db.session.get(ShoppingList, list_id)
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Shopping List"
+    ws['A1'] = f"Shopping List: {shopping_list.name}"
+    ws['A1'].font = Font(size=16, bold=True)
+    ws.merge_cells('A1:D1')
+    for col, header in enumerate(['Checked', 'Item', 'Quantity', 'Unit'], 1):
+        cell = ws.cell(row=4, column=col, value=header)
+        cell.font = Font(bold=True)
+        cell.alignment = Alignment(horizontal='center')
+    for row, item in enumerate(shopping_list.items, 5):
+        ws.cell(row=row, column=1, value='✓' if item.checked else '')
+        ws.cell(row=row, column=2, value=item.ingredient_name)
+        ws.cell(row=row, column=3, value=item.quantity)
+        ws.cell(row=row, column=4, value=item.unit)
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.tell()
+
+def streaming_export(lists, layout='sheets'):
+    with tempfile.TemporaryFile() as file:
+        write_excel(lists, file, layout)
+        return file.tell()
+
+def measure(export):
+    db.session.expunge_all()
+    tracemalloc.start()
+    with timed() as elapsed:
+        size = export()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed['ms'], peak / 1024 / 1024, size
+
+def report(label, ms, peak, size):
+    print(f"{label:>28}: {ms:8.0f}ms  peak {peak:7.1f}MB  {size / 1024:8.0f}KB")
+
+def main():
+    for item_count in SIZES:
+        app = make_app()
+        with app.app_context():
+            seed(1, item_count)
+            print(f"one list, {item_count} items")
+            report('in-memory workbook', *measure(lambda: in_memory_export(1)))
+            report('write-only workbook', *measure(lambda: streaming_export([(1, 'Shop 1')])))
+
+    app = make_app()
+    with app.app_context():
+        seed(MULTI_LISTS, MULTI_ITEMS)
+        lists = [(i + 1, f'Shop {i + 1}') for i in range(MULTI_LISTS)]
+        print(f"{MULTI_LISTS} lists, {MULTI_ITEMS} items each")
+        report('one sheet per list', *measure(lambda: streaming_export(lists, 'sheets')))
+        report('consolidated sheet', *measure(lambda: streaming_export(lists, 'consolidated')))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
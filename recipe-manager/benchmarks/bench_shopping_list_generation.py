@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Check that POST /api/shopping-lists/generate issues a constant number of
+queries: one aggregate SELECT plus the shopping list, item and covered
+meal plan inserts.
+
+Exits non-zero if the query count grows with the number of meal plans.
+"""
+import sys
+
+from common import make_app, seed_catalog, seed_meal_plans, count_queries, timed, db, MealPlan
+from src.routes.shopping_lists import shopping_lists_bp
+
+RECIPE_COUNT = 500
+PLAN_COUNTS = [10, 50, 200, 1000]
+
+def run(plan_count):
+    app = make_app(blueprints=[shopping_lists_bp])
+    with app.app_context():
+        seed_catalog(RECIPE_COUNT)
+        seed_meal_plans(plan_count, RECIPE_COUNT)
+        plan_ids = [plan_id for plan_id, in db.session.query(MealPlan.id)]
+        db.session.remove()
+        client = app.test_client()
+        with count_queries() as queries, timed() as elapsed:
+            response = client.post('/api/shopping-lists/generate', json={
+                'name': 'Benchmark list',
+                'meal_plan_ids': plan_ids
+            })
+        assert response.status_code == 201, response.get_json()
+        item_count = len(response.get_json()['items'])
+        db.session.remove()
+        db.drop_all()
+    return queries['count'], elapsed['ms'], item_count
+
+def main():
+    counts = set()
+    for plan_count in PLAN_COUNTS:
+        query_count, ms, item_count = run(plan_count)
+        counts.add(query_count)
+        print(f"{plan_count:>5} meal plans: {query_count} queries, {item_count} items, {ms:8.1f} ms")
+
+    if len(counts) != 1:
+        print("FAIL: query count depends on the number of meal plans")
+        return 1
+    print("OK: query count is constant")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
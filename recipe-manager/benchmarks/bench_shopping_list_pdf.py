@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Time PDF exports of shopping lists with 10, 500 and 5,000 items.
+
+For each size the first download renders the document, a repeat download of
+the unchanged list is served from the PDF cache, a download with the ETag
+gets a 304, and a download after checking off an item renders again.
+"""
+import sys
+
+from sqlalchemy import insert
+from common import make_app, timed, db, ShoppingList, ShoppingListItem
+from src.routes.shopping_lists import shopping_lists_bp, pdf_cache
+
+SIZES = [10, 500, 5000]
+
+def seed_list(list_id, item_count):
+    db.session.execute(insert(ShoppingList), [{'id': list_id, 'name': f'Shop {item_count}'}])
+    db.session.execute(insert(ShoppingListItem), [
+        {
+            'shopping_list_id': list_id,
+            'ingredient_name': f'Ingredient {i + 1}',
+            'quantity': round(1 + i * 0.25, 2),
+            'unit': 'g',
+            'checked': i % 5 == 0
+        }
+        for i in range(item_count)
+    ])
+    db.session.commit()
+
+def download(client, list_id, etag=None):
+    headers = {'If-None-Match': etag} if etag else {}
+    with timed() as elapsed:
+        response = client.get(f'/api/shopping-lists/{list_id}/export/pdf', headers=headers)
+        body = response.get_data()
+        response.close()
+    assert response.status_code in (200, 304), response.status_code
+    return elapsed['ms'], response, len(body)
+
+def main():
+    app = make_app(blueprints=[shopping_lists_bp])
+    client = app.test_client()
+    pdf_cache.clear()
+    print(f"{'items':>6} {'first':>10} {'cached':>10} {'304':>10} {'changed':>10} {'size':>10}")
+    for list_id, item_count in enumerate(SIZES, 1):
+        with app.app_context():
+            seed_list(list_id, item_count)
+        first_ms, response, size = download(client, list_id)
+        cached_ms, response, _ = download(client, list_id)
+        not_modified_ms, _, _ = download(client, list_id, response.headers['ETag'])
+
+        item_id = client.get(f'/api/shopping-lists/{list_id}').get_json()['items'][0]['id']
+        client.put(f'/api/shopping-lists/{list_id}/items/{item_id}/toggle')
+        changed_ms, _, _ = download(client, list_id)
+
+        with app.app_context():
+            exported_at = db.session.get(ShoppingList, list_id).exported_at
+        assert exported_at is not None, 'exported_at was not recorded'
+        print(
+            f"{item_count:>6} {first_ms:>8.1f}ms {cached_ms:>8.1f}ms {not_modified_ms:>8.1f}ms "
+            f"{changed_ms:>8.1f}ms {size:>9,}B"
+        )
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Reader/writer throughput on a file database with SQLAlchemy's default
+engine settings (rollback journal) and with the configuration from
+src/db_config.py (WAL, busy_timeout, pool).
+
+Reader threads stream the recipe export while writer threads toggle
+shopping-list items, the two requests that used to fail with "database is
+locked". Failed requests are counted as errors.
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import insert
+from common import make_app, seed_catalog, db, ShoppingList, ShoppingListItem
+from src.routes.recipes import recipes_bp
+from src.routes.shopping_lists import shopping_lists_bp
+
+RECIPE_COUNT = 2000
+ITEM_COUNT = 200
+READERS = int(os.environ.get('READERS', 4))
+WRITERS = int(os.environ.get('WRITERS', 2))
+DURATION = float(os.environ.get('DURATION', 5))
+
+def seed():
+    seed_catalog(RECIPE_COUNT)
+    db.session.execute(insert(ShoppingList), [{'id': 1, 'name': 'Weekly shop'}])
+    db.session.execute(insert(ShoppingListItem), [
+        {'shopping_list_id': 1, 'ingredient_name': f'Item {i}', 'quantity': 1.0, 'unit': 'pieces'}
+        for i in range(ITEM_COUNT)
+    ])
+    db.session.commit()
+
+def run(configure_engine):
+    with tempfile.TemporaryDirectory() as directory:
+        app = make_app(
+            f"sqlite:///{os.path.join(directory, 'concurrency.db')}",
+            blueprints=[recipes_bp, shopping_lists_bp],
+            configure_engine=configure_engine
+        )
+        with app.app_context():
+            seed()
+            db.session.remove()
+
+        counts = {'reads': 0, 'writes': 0, 'errors': 0}
+        lock = threading.Lock()
+        deadline = time.monotonic() + DURATION
+
+        def record(key):
+            with lock:
+                counts[key] += 1
+
+        def reader():
+            client = app.test_client()
+            while time.monotonic() < deadline:
+                response = client.get('/api/recipes/export?format=ndjson')
+                try:
+                    response.get_data()
+                    record('reads' if response.status_code == 200 else 'errors')
+                except Exception:
+                    record('errors')
+
+        def writer(offset):
+            client = app.test_client()
+            item_id = offset
+            while time.monotonic() < deadline:
+                response = client.put(f'/api/shopping-lists/1/items/{item_id % ITEM_COUNT + 1}/toggle')
+                record('writes' if response.status_code == 200 else 'errors')
+                item_id += WRITERS
+
+        threads = [threading.Thread(target=reader) for _ in range(READERS)]
+        threads += [threading.Thread(target=writer, args=(i,)) for i in range(WRITERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+    return counts
+
+def main():
+    print(f"{READERS} readers, {WRITERS} writers, {DURATION:.0f} s each")
+    for label, configure_engine in [('default engine', False), ('WAL + pragmas', True)]:
+        counts = run(configure_engine)
+        print(
+            f"{label:>15}: {counts['reads'] / DURATION:7.1f} exports/s, "
+            f"{counts['writes'] / DURATION:7.1f} toggles/s, {counts['errors']} errors"
+        )
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Cost of loading the frontend (index.html, the stylesheet, the scripts and
+the favicon) through the old catch-all route, which probed the filesystem
+and sent every file uncompressed from disk, and through the asset manifest.
+
+Both are run on a copy of src/static precompressed the way
+`flask precompress-static` does at deploy time. A first visit fetches every
+file; a repeat visit revalidates whatever the browser may not reuse: every
+file before, now only index.html and the favicon since the assets index.html
+links are immutable.
+"""
+import os
+import re
+import shutil
+import statistics
+import tempfile
+
+from flask import send_from_directory
+from common import make_app, timed
+from src.static_assets import DYNAMIC_DIRS, AssetManifest, is_dynamic, precompress, send_dynamic
+
+STATIC_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'static')
+ROUNDS = 200
+BROWSER_HEADERS = {'Accept-Encoding': 'gzip, deflate, br'}
+STATIC_URL = re.compile(r'''(?:src|href)="(/static/[^"]+)"''')
+
+def old_app(static_folder):
+    app = make_app()
+
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve(path):
+        if path != "" and os.path.exists(os.path.join(static_folder, path)):
+            return send_from_directory(static_folder, path)
+        return send_from_directory(static_folder, 'index.html')
+
+    # The app's own /static route, pointed at the copied folder
+    app.view_functions['static'] = lambda filename: send_from_directory(static_folder, filename)
+    return app
+
+def new_app(static_folder):
+    app = make_app()
+    manifest = AssetManifest(static_folder)
+
+    def static(filename):
+        asset = manifest.get(filename)
+        if asset is not None:
+            return manifest.respond(asset)
+        if is_dynamic(filename):
+            return send_dynamic(static_folder, filename)
+        return "Not found", 404
+
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve(path):
+        return manifest.respond(manifest.get(path) or manifest.get('index.html'))
+
+    app.view_functions['static'] = static
+    return app
+
+def page_urls(client):
+    html = client.get('/').get_data(as_text=True)
+    return ['/'] + STATIC_URL.findall(html) + ['/favicon.ico']
+
+def first_visit(client, urls):
+    """Fetch every file; returns (bytes sent, {url: ETag to revalidate with})"""
+    sent = 0
+    revalidate = {}
+    for url in urls:
+        response = client.get(url, headers=BROWSER_HEADERS)
+        assert response.status_code == 200, (url, response.status_code)
+        sent += len(response.get_data())
+        if 'immutable' not in response.headers.get('Cache-Control', ''):
+            revalidate[url] = response.headers['ETag']
+    return sent, revalidate
+
+def repeat_visit(client, revalidate):
+    """Revalidate the files a browser may not reuse from its cache; returns bytes sent"""
+    sent = 0
+    for url, etag in revalidate.items():
+        response = client.get(url, headers=dict(BROWSER_HEADERS, **{'If-None-Match': etag}))
+        assert response.status_code == 304, (url, response.status_code)
+        sent += len(response.get_data())
+    return sent
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        static_folder = os.path.join(directory, 'static')
+        shutil.copytree(STATIC_FOLDER, static_folder, ignore=shutil.ignore_patterns(*DYNAMIC_DIRS, '*.gz'))
+        precompress(static_folder)
+
+        for label, app in (('before', old_app(static_folder)), ('manifest', new_app(static_folder))):
+            client = app.test_client()
+            urls = page_urls(client)
+            first_bytes, revalidate = first_visit(client, urls)
+            repeat_bytes = repeat_visit(client, revalidate)
+
+            samples = []
+            for _ in range(ROUNDS):
+                with timed() as elapsed:
+                    first_visit(client, urls)
+                samples.append(elapsed['ms'])
+            print(
+                f"{label:>8}: first visit {len(urls)} requests, {first_bytes / 1024:.1f} KB, "
+                f"median {statistics.median(samples):.2f} ms; "
+                f"repeat visit {len(revalidate)} requests, {repeat_bytes} bytes"
+            )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Each benchmark builds its own Flask app on a scratch SQLite database so it
+never touches src/database/app.db.
+"""
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import event, insert
+from src.models.user import db
+from src.db_config import configure_database
+from src.models.recipe import Category, Recipe, Ingredient, MealPlan, ShoppingList, ShoppingListItem
+
+ADJECTIVES = ['Spicy', 'Creamy', 'Roasted', 'Grilled', 'Smoky', 'Tangy', 'Crispy', 'Braised', 'Herbed', 'Zesty']
+DISHES = ['Chicken', 'Lentil', 'Mushroom', 'Salmon', 'Tofu', 'Beef', 'Pumpkin', 'Chickpea', 'Pork', 'Aubergine', 'Prawn']
+STYLES = ['Curry', 'Stew', 'Pasta', 'Salad', 'Soup', 'Tacos', 'Risotto', 'Pie', 'Bowl', 'Skewers', 'Wraps', 'Bake', 'Noodles']
+PANTRY = ['flour', 'butter', 'garlic', 'onion', 'olive oil', 'salt', 'black pepper', 'rice', 'milk', 'eggs',
+          'tomato', 'ginger', 'cumin', 'lemon', 'parsley', 'cream', 'carrot', 'celery', 'honey', 'soy sauce']
+
+def recipe_name(i):
+    return f'{ADJECTIVES[i % len(ADJECTIVES)]} {DISHES[i % len(DISHES)]} {STYLES[i % len(STYLES)]} {i + 1}'
+
+def make_app(database_uri='sqlite://', blueprints=(), configure_engine=False):
+    """Create a throwaway app bound to database_uri with the given blueprints.
+
+    With configure_engine the app gets the same pool and SQLite pragmas as
+    src/main.py; otherwise it uses SQLAlchemy's defaults.
+    """
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    if configure_engine:
+        configure_database(app, db)
+    else:
+        db.init_app(app)
+    for blueprint in blueprints:
+        app.register_blueprint(blueprint, url_prefix='/api')
+    with app.app_context():
+        db.create_all()
+    return app
+
+def seed_catalog(recipe_count, ingredients_per_recipe=8, category_count=10):
+    """Bulk insert recipe categories, recipes and ingredients"""
+    db.session.execute(insert(Category), [
+        {'id': i + 1, 'name': f'Category {i + 1}', 'type': 'recipe'}
+        for i in range(category_count)
+    ])
+    base = datetime(2024, 1, 1)
+    db.session.execute(insert(Recipe), [
+        {
+            'id': i + 1,
+            'name': recipe_name(i),
+            'description': f'Description for recipe {i + 1}',
+            'instructions': 'Mix everything together and cook until done.',
+            'prep_time': 10,
+            'cook_time': 20,
+            'servings': 4,
+            'category_id': (i % category_count) + 1,
+            'created_at': base + timedelta(minutes=i),
+            'updated_at': base + timedelta(minutes=i)
+        }
+        for i in range(recipe_count)
+    ])
+    db.session.execute(insert(Ingredient), [
+        {
+            'recipe_id': i + 1,
+            'name': PANTRY[(i * 7 + j * 3) % len(PANTRY)],
+            'quantity': 100.0,
+            'unit': 'grams',
+            'notes': ''
+        }
+        for i in range(recipe_count)
+        for j in range(ingredients_per_recipe)
+    ])
+    db.session.commit()
+
+def seed_meal_plans(plan_count, recipe_count, meal_category_count=3, start=date(2024, 1, 1)):
+    """Bulk insert meal categories and plans, one per category per day from start"""
+    category_ids = db.session.execute(
+        insert(Category).returning(Category.id, sort_by_parameter_order=True),
+        [{'name': f'Meal {i + 1}', 'type': 'meal'} for i in range(meal_category_count)]
+    ).scalars().all()
+    db.session.execute(insert(MealPlan), [
+        {
+            'name': f'Plan {i + 1}',
+            'date': start + timedelta(days=i // meal_category_count),
+            'meal_category_id': category_ids[i % meal_category_count],
+            'recipe_id': (i * 37) % recipe_count + 1,
+            'people_count': 2 + i % 4
+        }
+        for i in range(plan_count)
+    ])
+    db.session.commit()
+    return category_ids
+
+@contextmanager
+def count_queries():
+    """Count the SQL statements executed inside the block"""
+    counter = {'count': 0}
+
+    def before_cursor_execute(*args):
+        counter['count'] += 1
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+@contextmanager
+def timed():
+    """Measure the wall clock time of the block in milliseconds"""
+    result = {'ms': 0.0}
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result['ms'] = (time.perf_counter() - start) * 1000
@@ -0,0 +1,83 @@
+"""
+Engine configuration for the SQLite database.
+
+Every setting comes from app.config and can be overridden from the
+environment:
+
+    DATABASE_URL            SQLAlchemy URI (default: src/database/app.db)
+    SQLITE_JOURNAL_MODE     WAL lets readers run while a write is in progress
+    SQLITE_SYNCHRONOUS      NORMAL is durable with WAL except on power loss
+    SQLITE_BUSY_TIMEOUT     ms to wait for a lock before "database is locked"
+    SQLITE_CACHE_SIZE       page cache per connection, negative means KiB
+    SQLITE_MMAP_SIZE        bytes of the file to memory-map for reads
+    DB_POOL_SIZE            connections kept open
+    DB_MAX_OVERFLOW         extra connections allowed under load
+    DB_POOL_TIMEOUT         seconds to wait for a free connection
+
+The pragmas are applied to each new connection as the pool opens it.
+"""
+import os
+from sqlalchemy import event
+
+DEFAULT_DATABASE_URI = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -16000,
+    'mmap_size': 128 * 1024 * 1024,
+}
+
+DEFAULT_POOL = {
+    'pool_size': 8,
+    'max_overflow': 8,
+    'pool_timeout': 30,
+}
+
+def _env(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return int(value) if isinstance(default, int) else value
+
+def load_database_config(app):
+    """Fill in database settings not already set in app.config"""
+    app.config.setdefault('SQLALCHEMY_DATABASE_URI', _env('DATABASE_URL', DEFAULT_DATABASE_URI))
+    app.config.setdefault('SQLALCHEMY_TRACK_MODIFICATIONS', False)
+    app.config.setdefault('SQLITE_PRAGMAS', {
+        name: _env(f'SQLITE_{name.upper()}', default) for name, default in DEFAULT_PRAGMAS.items()
+    })
+
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    # In-memory databases live in a single connection, so only file
+    # databases get a real pool
+    if uri.startswith('sqlite') and ':memory:' not in uri and uri.rstrip('/') != 'sqlite:':
+        for name, default in DEFAULT_POOL.items():
+            options.setdefault(name, _env(f'DB_{name.upper()}', default))
+        connect_args = options.setdefault('connect_args', {})
+        # Connections are handed between request threads by the pool
+        connect_args.setdefault('check_same_thread', False)
+        connect_args.setdefault('timeout', app.config['SQLITE_PRAGMAS']['busy_timeout'] / 1000)
+
+def register_sqlite_pragmas(engine, pragmas):
+    """Run PRAGMA statements on every new connection of engine"""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+        finally:
+            cursor.close()
+
+def configure_database(app, db):
+    """Initialise db for app with the configured engine options and pragmas"""
+    load_database_config(app)
+    db.init_app(app)
+    with app.app_context():
+        register_sqlite_pragmas(db.engine, app.config['SQLITE_PRAGMAS'])
@@ -0,0 +1,308 @@
+"""
+Background rendering of shopping-list exports.
+
+Requests submit an export and get a job back straight away. A bounded
+thread pool renders the file into the export directory, and clients poll
+(or long-poll) the job until it is done before downloading. Threads rather
+than processes are used because rendering needs the app's database session;
+the pool size caps how much CPU exports can take from request handling.
+
+Each job's state is written to a JSON file next to its output, so a
+status poll or download that a multi-process server hands to another
+worker finds the job there. Job ids are an HMAC of the format, layout and
+the (id, updated_at) of every list exported, and the state file is created
+atomically, so whichever worker creates it renders the export and every
+other worker submitting the same export of unchanged lists gets that job
+back. Finished files are kept for a TTL and then deleted, along with files
+left behind by earlier processes.
+
+Every file a manager writes is named export-<job id>.<extension>, and only
+files named like that are ever deleted from the export directory.
+"""
+import hashlib
+import hmac
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from src.models.shopping_list_export import load_items, render_pdf, write_excel
+
+DEFAULT_WORKERS = 2
+DEFAULT_TTL = 3600
+DEFAULT_MAX_PENDING = 100
+
+# How often a request waiting on another worker's job rereads its state
+REMOTE_POLL_INTERVAL = 0.25
+
+JOB_FILE_PREFIX = 'export-'
+JOB_ID = re.compile(r'^[0-9a-f]{32}$')
+JOB_FILE = re.compile(r'^export-[0-9a-f]{32}\.(?:pdf|xlsx|json)(?:(?:\.\w+)?\.part)?$')
+
+EXPORT_FORMATS = {
+    'pdf': ('.pdf', 'application/pdf'),
+    'excel': ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+_managers_lock = threading.Lock()
+
+class ExportQueueFull(Exception):
+    """Raised when too many export jobs are already waiting"""
+
+def _expired(job, now):
+    return job.expires_at is not None and job.expires_at <= now
+
+class ExportJob:
+    """One export being rendered, or rendered and kept until it expires"""
+
+    def __init__(self, job_id, export_format, lists, layout, download_name, directory):
+        self.id = job_id
+        self.format = export_format
+        self.lists = lists
+        self.layout = layout
+        self.download_name = download_name
+        self.path = os.path.join(directory, f'{JOB_FILE_PREFIX}{self.id}{EXPORT_FORMATS[export_format][0]}')
+        self.state_path = os.path.join(directory, f'{JOB_FILE_PREFIX}{self.id}.json')
+        self.status = 'queued'
+        self.error = None
+        self.created_at = datetime.utcnow()
+        self.finished_at = None
+        # time.time() value, comparable across processes
+        self.expires_at = None
+        self.done = threading.Event()
+
+    @classmethod
+    def load(cls, directory, job_id):
+        """Read the job's state as last saved, or None if there is none"""
+        try:
+            with open(os.path.join(directory, f'{JOB_FILE_PREFIX}{job_id}.json')) as file:
+                state = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return None
+        job = cls(
+            job_id, state['format'], [tuple(entry) for entry in state['lists']],
+            state['layout'], state['download_name'], directory
+        )
+        job.status = state['status']
+        job.error = state['error']
+        job.created_at = datetime.fromisoformat(state['created_at'])
+        job.finished_at = datetime.fromisoformat(state['finished_at']) if state['finished_at'] else None
+        job.expires_at = state['expires_at']
+        if job.status in ('done', 'failed'):
+            job.done.set()
+        return job
+
+    def create(self):
+        """Save the job's first state unless the job already exists.
+
+        Returns False when another worker has created the same job. The
+        state is written to a temporary file first and hard-linked into
+        place, which fails if the name is taken, so readers never see a
+        partial file.
+        """
+        descriptor, partial = tempfile.mkstemp(
+            dir=os.path.dirname(self.state_path), prefix=f'{os.path.basename(self.state_path)}.', suffix='.part'
+        )
+        try:
+            with os.fdopen(descriptor, 'w') as file:
+                self._write_state(file)
+            os.link(partial, self.state_path)
+            return True
+        except FileExistsError:
+            return False
+        finally:
+            os.remove(partial)
+
+    def save(self):
+        """Write the job's state for other workers to read"""
+        partial = f'{self.state_path}.part'
+        with open(partial, 'w') as file:
+            self._write_state(file)
+        os.replace(partial, self.state_path)
+
+    def _write_state(self, file):
+        json.dump({
+            'format': self.format,
+            'lists': self.lists,
+            'layout': self.layout,
+            'download_name': self.download_name,
+            'status': self.status,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'expires_at': self.expires_at
+        }, file)
+
+    def remove_files(self):
+        for path in (self.path, self.state_path):
+            # A download already in progress keeps its open file
+            if os.path.exists(path):
+                os.remove(path)
+
+    @property
+    def mimetype(self):
+        return EXPORT_FORMATS[self.format][1]
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'format': self.format,
+            'layout': self.layout,
+            'shopping_list_ids': [list_id for list_id, _ in self.lists],
+            'status': self.status,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class ExportJobManager:
+    """Render export jobs for one app on a bounded pool of threads"""
+
+    def __init__(self, app, directory, max_workers=DEFAULT_WORKERS, ttl=DEFAULT_TTL, max_pending=DEFAULT_MAX_PENDING):
+        self.app = app
+        self.directory = directory
+        self.ttl = ttl
+        self.max_pending = max_pending
+        self._secret = (app.secret_key or '').encode()
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='export-worker')
+        os.makedirs(directory, exist_ok=True)
+        self._remove_stale_files()
+
+    def submit(self, export_format, lists, layout, versions, download_name):
+        """Return (job, created) for an export of lists.
+
+        lists is a sequence of (list id, name) and versions the lists'
+        updated_at values, which together with the format and layout decide
+        whether an existing job, rendered by any worker, can be reused.
+        Raises ExportQueueFull when max_pending jobs are already waiting to
+        be rendered here.
+        """
+        job_id = self._job_id(export_format, layout, lists, versions)
+        with self._lock:
+            self._expire()
+            job = self._jobs.get(job_id)
+            if job is not None and job.status != 'failed':
+                return job, False
+
+            pending = sum(1 for other in self._jobs.values() if other.status in ('queued', 'running'))
+            if pending >= self.max_pending:
+                raise ExportQueueFull()
+
+            while True:
+                existing = ExportJob.load(self.directory, job_id)
+                if existing is not None:
+                    if existing.status != 'failed' and not _expired(existing, time.time()):
+                        return existing, False
+                    # Start a failed or expired job over
+                    existing.remove_files()
+                    self._jobs.pop(job_id, None)
+                job = ExportJob(job_id, export_format, list(lists), layout, download_name, self.directory)
+                if job.create():
+                    break
+                # Another worker created it since; reuse that one
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job)
+        return job, True
+
+    def get(self, job_id):
+        """Return the job with job_id, or None if unknown or expired.
+
+        Jobs submitted to other workers are read from their saved state.
+        """
+        if not JOB_ID.match(job_id):
+            return None
+        with self._lock:
+            self._expire()
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        job = ExportJob.load(self.directory, job_id)
+        if job is not None and _expired(job, time.time()):
+            job.remove_files()
+            return None
+        return job
+
+    def wait(self, job, timeout):
+        """Wait up to timeout seconds for job to finish; returns its latest state"""
+        if job.done.wait(0) or self._jobs.get(job.id) is job:
+            job.done.wait(timeout)
+            return job
+        # Another worker is rendering it, so all there is to go on is its file
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            time.sleep(min(REMOTE_POLL_INTERVAL, max(deadline - time.monotonic(), 0)))
+            latest = ExportJob.load(self.directory, job.id)
+            if latest is None:
+                break
+            job = latest
+            if job.done.is_set():
+                break
+        return job
+
+    def _run(self, job):
+        job.status = 'running'
+        job.save()
+        partial = f'{job.path}.part'
+        try:
+            with self.app.app_context():
+                with open(partial, 'wb') as file:
+                    if job.format == 'pdf':
+                        list_id, name = job.lists[0]
+                        file.write(render_pdf(name, load_items(list_id)))
+                    else:
+                        write_excel(job.lists, file, job.layout)
+            # Only complete files ever appear under the job's path
+            os.replace(partial, job.path)
+            job.status = 'done'
+        except Exception as e:
+            if os.path.exists(partial):
+                os.remove(partial)
+            self.app.logger.exception('Export job %s failed', job.id)
+            job.status = 'failed'
+            job.error = str(e)
+        job.finished_at = datetime.utcnow()
+        job.expires_at = time.time() + self.ttl
+        job.save()
+        job.done.set()
+
+    def _job_id(self, export_format, layout, lists, versions):
+        # Keyed with the app's secret so ids cannot be worked out from list ids
+        key = json.dumps([export_format, layout, [
+            [list_id, version.isoformat() if version else None] for (list_id, _), version in zip(lists, versions)
+        ]])
+        return hmac.new(self._secret, key.encode(), hashlib.sha256).hexdigest()[:32]
+
+    def _expire(self):
+        now = time.time()
+        for job in [job for job in self._jobs.values() if _expired(job, now)]:
+            del self._jobs[job.id]
+            job.remove_files()
+
+    def _remove_stale_files(self):
+        """Delete job files older than the TTL, left by processes that exited.
+
+        The directory may be shared with other programs, so files not named
+        like a job's are left alone.
+        """
+        cutoff = time.time() - self.ttl
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and JOB_FILE.match(entry.name) and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+
+def get_export_jobs(app):
+    """Return app's export job manager, creating it on first use"""
+    with _managers_lock:
+        if 'export_jobs' not in app.extensions:
+            app.extensions['export_jobs'] = ExportJobManager(
+                app,
+                app.config.get('EXPORT_JOB_DIR') or os.path.join(tempfile.gettempdir(), 'recipe-manager-exports'),
+                max_workers=app.config.get('EXPORT_JOB_WORKERS', DEFAULT_WORKERS),
+                ttl=app.config.get('EXPORT_JOB_TTL', DEFAULT_TTL),
+                max_pending=app.config.get('EXPORT_JOB_MAX_PENDING', DEFAULT_MAX_PENDING)
+            )
+        return app.extensions['export_jobs']
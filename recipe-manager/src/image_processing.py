@@ -0,0 +1,108 @@
+"""
+Background processing of recipe image uploads.
+
+The upload route stores the file in a staging directory, marks the recipe's
+image as processing and hands it to a small thread pool; Pillow releases
+the GIL while it decodes, scales and encodes, so the threads run in
+parallel. The variants go into the content-addressed image store and are
+recorded on the recipe, which also releases its previous image's files for
+garbage collection.
+
+If a recipe gets a second upload before the first has finished, only the
+newest one is applied; older results are thrown away.
+"""
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from src.models.recipe import db, Recipe
+from src.models.images import IMAGES_DIR, render_variants, variant_files
+from src.models.image_store import UPLOADS_DIR_NAME, add_references, release_references, store_variants
+from src.response_cache import response_cache
+
+DEFAULT_WORKERS = 2
+
+_processors_lock = threading.Lock()
+
+class ImageProcessor:
+    """Turn staged uploads into image variants for one app"""
+
+    def __init__(self, app, images_dir=IMAGES_DIR, max_workers=DEFAULT_WORKERS):
+        self.app = app
+        self.images_dir = images_dir
+        self.uploads_dir = os.path.join(images_dir, UPLOADS_DIR_NAME)
+        self._latest = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='image-worker')
+        os.makedirs(self.uploads_dir, exist_ok=True)
+
+    def stage(self, file):
+        """Save an uploaded file to the staging directory and return its path"""
+        path = os.path.join(self.uploads_dir, uuid.uuid4().hex)
+        file.save(path)
+        return path
+
+    def submit(self, recipe_id, upload_path):
+        """Queue a staged upload for recipe_id; returns a Future of the variants"""
+        token = os.path.basename(upload_path)
+        with self._lock:
+            self._latest[recipe_id] = token
+        return self._executor.submit(self._process, recipe_id, upload_path, token)
+
+    def _is_latest(self, recipe_id, token):
+        with self._lock:
+            return self._latest.get(recipe_id) == token
+
+    def _process(self, recipe_id, upload_path, token):
+        try:
+            rendered = render_variants(upload_path)
+            with self.app.app_context():
+                recipe = db.session.get(Recipe, recipe_id)
+                if recipe is None or not self._is_latest(recipe_id, token):
+                    return None
+                variants, sizes = store_variants(self.images_dir, rendered)
+                add_references(variant_files(variants), sizes)
+                release_references(variant_files(recipe.image_variants))
+                recipe.image_variants = variants
+                recipe.image_path = variants['full']['jpeg']
+                recipe.image_status = 'ready'
+                db.session.commit()
+            # Garbage collection may have deleted a file that was unreferenced
+            # until this commit; storing again puts it back
+            store_variants(self.images_dir, rendered)
+            self._invalidate(recipe_id)
+            return variants
+        except Exception:
+            self.app.logger.exception('Processing image for recipe %s failed', recipe_id)
+            self._mark_failed(recipe_id, token)
+            raise
+        finally:
+            os.remove(upload_path)
+            with self._lock:
+                if self._latest.get(recipe_id) == token:
+                    del self._latest[recipe_id]
+
+    def _mark_failed(self, recipe_id, token):
+        with self.app.app_context():
+            try:
+                recipe = db.session.get(Recipe, recipe_id)
+                if recipe is not None and self._is_latest(recipe_id, token):
+                    recipe.image_status = 'failed'
+                    db.session.commit()
+                    self._invalidate(recipe_id)
+            except Exception:
+                db.session.rollback()
+
+    def _invalidate(self, recipe_id):
+        response_cache.invalidate('recipe', recipe_id)
+
+def get_image_processor(app):
+    """Return app's image processor, creating it on first use"""
+    with _processors_lock:
+        if 'image_processor' not in app.extensions:
+            app.extensions['image_processor'] = ImageProcessor(
+                app,
+                app.config.get('IMAGES_DIR', IMAGES_DIR),
+                max_workers=app.config.get('IMAGE_WORKERS', DEFAULT_WORKERS)
+            )
+        return app.extensions['image_processor']
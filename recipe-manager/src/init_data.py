@@ -8,7 +8,9 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from src.models.user import db
 from src.models.recipe import Category, Recipe, Ingredient
-from src.main import app
+from src.main import create_app, init_database
+
+app = create_app()
 
 def init_categories():
     """Create default categories for recipes and meals"""
@@ -137,6 +139,7 @@ def create_sample_recipes():
 
 if __name__ == '__main__':
     print("Initializing database...")
+    init_database(app)
     init_categories()
     create_sample_recipes()
     print("Database initialization complete!")
@@ -0,0 +1,124 @@
+"""
+Single-writer queue that coalesces shopping-list item check/uncheck writes.
+
+Each request puts its change on the app's queue and waits on a Future. One
+background thread drains the queue, gathering every change that arrives
+within a short window, and applies the whole batch in one transaction: a
+SELECT of the affected items, one executemany UPDATE and one bump of the
+lists' updated_at. Futures are resolved only after the commit, so a
+response means the change is durable.
+
+Changes either set checked to an explicit value, which is idempotent and
+safe to retry, or flip it. Within a batch they are applied in arrival
+order, so flips see the result of earlier changes to the same item.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from sqlalchemy import update
+from src.models.user import db
+from src.models.recipe import ShoppingList, ShoppingListItem
+from src.response_cache import response_cache
+
+DEFAULT_BATCH_WINDOW = 0.005
+DEFAULT_MAX_BATCH = 500
+
+_queues_lock = threading.Lock()
+
+class ItemStateQueue:
+    """Batch item checked-state changes for one app into shared transactions"""
+
+    def __init__(self, app, batch_window=DEFAULT_BATCH_WINDOW, max_batch=DEFAULT_MAX_BATCH):
+        self.app = app
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.batches = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, list_id, item_id, checked=None):
+        """Queue a change and return a Future for the item's new to_dict().
+
+        checked=None flips the item. The Future resolves to None if the item
+        is not on the list, and raises if the batch failed to commit.
+        """
+        self._ensure_started()
+        future = Future()
+        self._queue.put((list_id, item_id, checked, future))
+        return future
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='item-state-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            with self.app.app_context():
+                self._apply(batch)
+
+    def _apply(self, batch):
+        try:
+            rows = {
+                item.id: item.to_dict()
+                for item in ShoppingListItem.query.filter(
+                    ShoppingListItem.id.in_({item_id for _, item_id, _, _ in batch})
+                )
+            }
+            results = []
+            changed = {}
+            for list_id, item_id, checked, future in batch:
+                item = rows.get(item_id)
+                if item is None or item['shopping_list_id'] != list_id:
+                    results.append((future, None))
+                    continue
+                item['checked'] = (not item['checked']) if checked is None else checked
+                changed[item_id] = item['checked']
+                results.append((future, dict(item)))
+
+            if changed:
+                db.session.execute(update(ShoppingListItem), [
+                    {'id': item_id, 'checked': checked} for item_id, checked in changed.items()
+                ])
+                list_ids = {rows[item_id]['shopping_list_id'] for item_id in changed}
+                db.session.execute(
+                    update(ShoppingList).where(ShoppingList.id.in_(list_ids)).values(updated_at=datetime.utcnow()),
+                    execution_options={'synchronize_session': False}
+                )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            for _, _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        if changed:
+            for list_id in list_ids:
+                response_cache.invalidate('shopping_list', list_id)
+        for future, result in results:
+            future.set_result(result)
+
+def get_item_state_queue(app):
+    """Return app's queue, creating it on first use"""
+    with _queues_lock:
+        if 'item_state_queue' not in app.extensions:
+            app.extensions['item_state_queue'] = ItemStateQueue(
+                app,
+                batch_window=app.config.get('SHOPPING_ITEM_BATCH_WINDOW_MS', DEFAULT_BATCH_WINDOW * 1000) / 1000
+            )
+        return app.extensions['item_state_queue']
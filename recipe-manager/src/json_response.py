@@ -0,0 +1,50 @@
+"""
+JSON bodies encoded straight to bytes, gzipped when the client accepts it.
+
+Bodies are encoded with a single json.dumps call: compact, without sorting
+keys and without escaping non-ASCII text. Values json cannot encode itself
+go through the app's JSON provider, so they come out as they would from
+jsonify. Bodies of at least GZIP_MIN_SIZE bytes are sent gzipped to clients
+whose Accept-Encoding allows it; below that compressing is not worth the
+CPU time. A gzipped body gets its own ETag, since its bytes differ.
+"""
+import gzip
+import json
+from flask import current_app, request
+
+GZIP_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+
+# Appended to the ETag of gzipped bodies
+GZIP_ETAG_SUFFIX = '-gz'
+
+def encode_json(data):
+    return json.dumps(
+        data, ensure_ascii=False, separators=(',', ':'), default=current_app.json.default
+    ).encode('utf-8')
+
+def wants_gzip(body):
+    """Whether body should be sent gzipped to the current request"""
+    return len(body) >= GZIP_MIN_SIZE and request.accept_encodings.quality('gzip') > 0
+
+def compress(body):
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+def json_response(body, status=200, etag=None, gzip_body=None):
+    """Return a response for the encoded JSON body.
+
+    gzip_body can pass an already compressed copy of body to use when the
+    response is gzipped.
+    """
+    response = current_app.response_class(status=status, mimetype=current_app.json.mimetype)
+    if len(body) >= GZIP_MIN_SIZE:
+        response.vary.add('Accept-Encoding')
+    if wants_gzip(body):
+        body = gzip_body if gzip_body is not None else compress(body)
+        response.headers['Content-Encoding'] = 'gzip'
+        if etag is not None:
+            etag += GZIP_ETAG_SUFFIX
+    response.set_data(body)
+    if etag is not None:
+        response.set_etag(etag)
+    return response
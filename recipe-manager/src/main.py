@@ -3,10 +3,21 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+import click
+import threading
+from datetime import timedelta
+from flask import Flask, current_app
+from flask.cli import with_appcontext
 from flask_cors import CORS
 from src.models.user import db
+from src.db_config import configure_database
 from src.models.recipe import Category, Recipe, Ingredient, MealPlan, ShoppingList, ShoppingListItem
+from src.models.schema import migrate, explain_hot_queries
+from src.models.search import ensure_search_index
+from src.models.ingredient_index import ingredient_index
+from src.models.images import IMAGES_DIR
+from src.models.image_store import collect_garbage
+from src.static_assets import AssetManifest, is_dynamic, precompress, send_dynamic
 from src.routes.user import user_bp
 from src.routes.categories import categories_bp
 from src.routes.recipes import recipes_bp
@@ -14,42 +25,141 @@ from src.routes.meal_plans import meal_plans_bp
 from src.routes.shopping_lists import shopping_lists_bp
 from src.routes.ai_assistant import ai_assistant_bp
 
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
-
-# Enable CORS for all routes
-CORS(app)
-
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(categories_bp, url_prefix='/api')
-app.register_blueprint(recipes_bp, url_prefix='/api')
-app.register_blueprint(meal_plans_bp, url_prefix='/api')
-app.register_blueprint(shopping_lists_bp, url_prefix='/api')
-app.register_blueprint(ai_assistant_bp, url_prefix='/api')
-
-# uncomment if you need to use database
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
-with app.app_context():
-    db.create_all()
-
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-            return "Static folder not configured", 404
-
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
+STATIC_FOLDER = os.path.join(os.path.dirname(__file__), 'static')
+
+_app = None
+_app_lock = threading.Lock()
+
+def create_app(config=None):
+    """Build the app without touching the database.
+
+    Run init_database() (or `flask init-db`) once before serving to create
+    the schema and apply migrations.
+    """
+    # Static files are served by the static() view below from the asset manifest
+    app = Flask(__name__, static_folder=None)
+    app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
+    app.config.update(config or {})
+
+    # Enable CORS for all routes
+    CORS(app)
+
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(categories_bp, url_prefix='/api')
+    app.register_blueprint(recipes_bp, url_prefix='/api')
+    app.register_blueprint(meal_plans_bp, url_prefix='/api')
+    app.register_blueprint(shopping_lists_bp, url_prefix='/api')
+    app.register_blueprint(ai_assistant_bp, url_prefix='/api')
+
+    # Database URI, engine pool and SQLite pragmas come from config/environment
+    configure_database(app, db)
+
+    # Batch shopping-list item check/uncheck writes through a single writer
+    app.config.setdefault('SHOPPING_ITEM_WRITE_QUEUE', os.environ.get('SHOPPING_ITEM_WRITE_QUEUE', '0') == '1')
+    app.config.setdefault('SHOPPING_ITEM_BATCH_WINDOW_MS', float(os.environ.get('SHOPPING_ITEM_BATCH_WINDOW_MS', 5)))
+
+    # Background export jobs: render threads, where files go and how long they are kept
+    app.config.setdefault('EXPORT_JOB_WORKERS', int(os.environ.get('EXPORT_JOB_WORKERS', 2)))
+    app.config.setdefault('EXPORT_JOB_DIR', os.environ.get('EXPORT_JOB_DIR'))
+    app.config.setdefault('EXPORT_JOB_TTL', int(os.environ.get('EXPORT_JOB_TTL', 3600)))
+
+    # Threads that resize uploaded recipe images into their variants
+    app.config.setdefault('IMAGE_WORKERS', int(os.environ.get('IMAGE_WORKERS', 2)))
+
+    # Read the frontend's files into memory once; restart to pick up new ones
+    asset_manifest = AssetManifest(STATIC_FOLDER)
+
+    @app.route('/static/<path:filename>')
+    def static(filename):
+        asset = asset_manifest.get(filename)
+        if asset is not None:
+            return asset_manifest.respond(asset)
+        if is_dynamic(filename):
+            return send_dynamic(STATIC_FOLDER, filename)
+        return "Not found", 404
+
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve(path):
+        asset = asset_manifest.get(path) or asset_manifest.get('index.html')
+        if asset is None:
             return "index.html not found", 404
+        return asset_manifest.respond(asset)
+
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(explain_hot_queries_command)
+    app.cli.add_command(gc_images_command)
+    app.cli.add_command(precompress_static_command)
+    return app
+
+def init_database(app):
+    """Create missing tables, apply pending migrations and load the in-memory indexes"""
+    with app.app_context():
+        applied, query_plans = migrate()
+        for version, description in applied:
+            app.logger.info('Applied migration %d: %s', version, description)
+        for name, (before, after) in query_plans.items():
+            app.logger.info('Query plan for %s: %s -> %s', name, before, after)
+        ensure_search_index()
+        ingredient_index.load()
+    return applied
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Create the schema and apply pending migrations"""
+    applied = init_database(current_app)
+    for version, description in applied:
+        print(f"Applied migration {version}: {description}")
+    print(f"Database is up to date ({len(applied)} migrations applied)")
+
+@click.command('explain-hot-queries')
+@with_appcontext
+def explain_hot_queries_command():
+    """Print the query plans of the hot route queries"""
+    for name, plan in explain_hot_queries().items():
+        print(f"{name}: {plan}")
+
+@click.command('gc-images')
+@click.option('--grace-hours', default=1.0, show_default=True,
+              help='Only delete files unreferenced for at least this long')
+@with_appcontext
+def gc_images_command(grace_hours):
+    """Delete recipe image files that nothing refers to any more"""
+    report = collect_garbage(current_app.config.get('IMAGES_DIR', IMAGES_DIR), timedelta(hours=grace_hours))
+    print(
+        f"Removed {report['blobs_removed']} unreferenced images and {report['orphans_removed']} "
+        f"orphaned files, reclaimed {report['bytes_reclaimed'] / 1024 / 1024:.1f} MB"
+    )
+
+@click.command('precompress-static')
+def precompress_static_command():
+    """Write gzipped copies of the static files for the server to send"""
+    results = precompress(STATIC_FOLDER)
+    for path, size, compressed_size in results:
+        print(f"{path}: {size} -> {compressed_size} bytes")
+    total = sum(size for _, size, _ in results)
+    compressed_total = sum(compressed_size for _, _, compressed_size in results)
+    print(f"Precompressed {len(results)} files, {total} -> {compressed_total} bytes")
+
+def __getattr__(name):
+    """Build the module-level app on first access.
+
+    Keeps `gunicorn src.main:app` and `flask --app src.main` working while
+    a plain import of this module stays cheap and leaves the database alone.
+    """
+    global _app
+    if name != 'app':
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _app_lock:
+        if _app is None:
+            app = create_app()
+            init_database(app)
+            _app = app
+    return _app
 
 
 if __name__ == '__main__':
+    app = create_app()
+    init_database(app)
     app.run(host='0.0.0.0', port=5000, debug=True)
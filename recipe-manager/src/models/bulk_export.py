@@ -0,0 +1,105 @@
+"""
+Streaming export of the whole recipe catalog as NDJSON or CSV.
+
+Recipes, their category names and ingredients are read with a single
+joined SELECT ordered by recipe id and fetched in batches, so only one
+batch of rows is in memory at any time regardless of catalog size.
+"""
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from sqlalchemy import select
+from src.models.user import db
+from src.models.recipe import Category, Recipe, Ingredient
+
+FETCH_BATCH_SIZE = 1000
+
+RECIPE_COLUMNS = [
+    'id', 'name', 'description', 'instructions', 'prep_time', 'cook_time',
+    'servings', 'category_id', 'category_name', 'image_path', 'created_at', 'updated_at'
+]
+INGREDIENT_COLUMNS = ['id', 'recipe_id', 'name', 'quantity', 'unit', 'notes']
+
+CSV_HEADER = RECIPE_COLUMNS + [f'ingredient_{column}' for column in INGREDIENT_COLUMNS if column != 'recipe_id']
+
+def parse_since(value):
+    """Parse an ISO 8601 ?since= value into a naive UTC datetime"""
+    since = datetime.fromisoformat(value)
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    return since
+
+def _format(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def iter_recipes(since=None):
+    """Yield recipe dicts in the to_dict() shape, ordered by id.
+
+    With since, only recipes updated after that time are exported. Ingredient
+    edits bump the recipe's updated_at, so they are included too.
+    """
+    stmt = select(
+        Recipe.id, Recipe.name, Recipe.description, Recipe.instructions,
+        Recipe.prep_time, Recipe.cook_time, Recipe.servings, Recipe.category_id,
+        Category.name, Recipe.image_path, Recipe.created_at, Recipe.updated_at,
+        Ingredient.id, Ingredient.recipe_id, Ingredient.name, Ingredient.quantity,
+        Ingredient.unit, Ingredient.notes
+    ).outerjoin(
+        Category, Recipe.category_id == Category.id
+    ).outerjoin(
+        Ingredient, Ingredient.recipe_id == Recipe.id
+    ).order_by(Recipe.id, Ingredient.id)
+    if since is not None:
+        stmt = stmt.where(Recipe.updated_at > since)
+
+    recipe_width = len(RECIPE_COLUMNS)
+    current = None
+    result = db.session.execute(stmt.execution_options(yield_per=FETCH_BATCH_SIZE))
+    for row in result:
+        if current is None or current['id'] != row[0]:
+            if current is not None:
+                yield current
+            current = {column: _format(value) for column, value in zip(RECIPE_COLUMNS, row[:recipe_width])}
+            current['ingredients'] = []
+        if row[recipe_width] is not None:
+            current['ingredients'].append(dict(zip(INGREDIENT_COLUMNS, row[recipe_width:])))
+    if current is not None:
+        yield current
+
+def iter_ndjson(since=None):
+    """Yield NDJSON text, one line per recipe, in batches of lines"""
+    lines = []
+    for recipe in iter_recipes(since):
+        lines.append(json.dumps(recipe, ensure_ascii=False))
+        if len(lines) >= FETCH_BATCH_SIZE:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+def iter_csv(since=None):
+    """Yield CSV text with one row per ingredient.
+
+    Recipe columns are repeated on each of the recipe's rows; recipes
+    without ingredients get a single row with empty ingredient columns.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+
+    rows_in_buffer = 0
+    for recipe in iter_recipes(since):
+        recipe_values = [recipe[column] for column in RECIPE_COLUMNS]
+        ingredients = recipe['ingredients'] or [{}]
+        for ingredient in ingredients:
+            writer.writerow(recipe_values + [
+                ingredient.get(column) for column in INGREDIENT_COLUMNS if column != 'recipe_id'
+            ])
+            rows_in_buffer += 1
+        if rows_in_buffer >= FETCH_BATCH_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            rows_in_buffer = 0
+    yield buffer.getvalue()
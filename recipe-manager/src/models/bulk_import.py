@@ -0,0 +1,217 @@
+"""
+Streaming bulk import of recipes from NDJSON.
+
+Each line of the input is one recipe object in the same shape that
+POST /api/recipes accepts. Lines are validated against a category map
+loaded once, buffered into chunks and written with one executemany for
+the recipes and one for their ingredients, each chunk in its own
+transaction; a chunk that fails is retried line by line so only the bad
+lines are lost. Only one chunk is held in memory at a time.
+"""
+import io
+import json
+import math
+from sqlalchemy import insert
+from src.models.user import db
+from src.models.recipe import Category, Recipe, Ingredient
+from src.models.search import index_recipes
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_LINE_BYTES = 1024 * 1024
+READ_BUFFER_SIZE = 64 * 1024
+# Only the first errors are reported in detail; the rest are just counted
+MAX_REPORTED_ERRORS = 1000
+
+class ImportLineError(ValueError):
+    pass
+
+def iter_lines(stream, max_line_bytes=MAX_LINE_BYTES):
+    """Yield (line_number, raw_line) from a binary stream.
+
+    Lines longer than max_line_bytes are yielded as None so the caller can
+    report them without ever holding them in memory.
+    """
+    line_number = 0
+    while True:
+        line = stream.readline(max_line_bytes + 1)
+        if not line:
+            return
+        line_number += 1
+        if len(line) > max_line_bytes and not line.endswith(b'\n'):
+            # Skip the rest of the oversized line
+            while line and not line.endswith(b'\n'):
+                line = stream.readline(max_line_bytes + 1)
+            yield line_number, None
+            continue
+        yield line_number, line
+
+def _optional_int(data, field):
+    value = data.get(field)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value != int(value):
+        raise ImportLineError(f'{field} must be an integer')
+    return int(value)
+
+def _optional_str(data, field, label=None):
+    value = data.get(field, '')
+    if value is not None and not isinstance(value, str):
+        raise ImportLineError(f'{label or field} must be a string')
+    return value
+
+class RecipeImporter:
+    """Validate and insert recipes in chunked transactions"""
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self._chunk = []
+        # Recipe categories by id and by lowercased name
+        self._category_ids = set()
+        self._category_names = {}
+        for category_id, name in db.session.query(Category.id, Category.name).filter(
+            Category.type == 'recipe'
+        ):
+            self._category_ids.add(category_id)
+            self._category_names[name.lower()] = category_id
+
+    def add_line(self, line_number, raw_line):
+        if raw_line is None:
+            self._error(line_number, f'Line is longer than {MAX_LINE_BYTES} bytes')
+            return
+        if not raw_line.strip():
+            return
+        try:
+            recipe, ingredients = self._parse(raw_line)
+        except ImportLineError as e:
+            self._error(line_number, str(e))
+            return
+        self._chunk.append((line_number, recipe, ingredients))
+        if len(self._chunk) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered chunk in one transaction.
+
+        When the chunk fails as a whole its lines are retried one at a
+        time, so only the lines that cannot be saved are reported.
+        """
+        if not self._chunk:
+            return
+        chunk, self._chunk = self._chunk, []
+        try:
+            self._write(chunk)
+        except Exception as e:
+            db.session.rollback()
+            if len(chunk) == 1:
+                self._error(chunk[0][0], 'Failed to save recipe')
+                return
+            for entry in chunk:
+                try:
+                    self._write([entry])
+                except Exception as e:
+                    db.session.rollback()
+                    self._error(entry[0], 'Failed to save recipe')
+
+    def _write(self, chunk):
+        # Core inserts on the tables skip the ORM's per-row bookkeeping
+        recipe_table = Recipe.__table__
+        recipe_ids = db.session.execute(
+            insert(recipe_table).returning(recipe_table.c.id, sort_by_parameter_order=True),
+            [recipe for _, recipe, _ in chunk]
+        ).scalars().all()
+
+        ingredient_rows = []
+        for recipe_id, (_, _, ingredients) in zip(recipe_ids, chunk):
+            for ingredient in ingredients:
+                ingredient['recipe_id'] = recipe_id
+                ingredient_rows.append(ingredient)
+        if ingredient_rows:
+            db.session.execute(insert(Ingredient.__table__), ingredient_rows)
+
+        index_recipes(recipe_ids)
+        db.session.commit()
+
+        self.imported += len(chunk)
+
+    def import_stream(self, stream):
+        # Raw WSGI input streams implement readline() one byte at a time
+        if not isinstance(stream, io.BufferedIOBase):
+            stream = io.BufferedReader(stream, READ_BUFFER_SIZE)
+        for line_number, raw_line in iter_lines(stream):
+            self.add_line(line_number, raw_line)
+        self.flush()
+
+    def summary(self):
+        return {
+            'imported': self.imported,
+            'failed': self.failed,
+            'errors': self.errors
+        }
+
+    def _error(self, line_number, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line_number, 'error': message})
+
+    def _parse(self, raw_line):
+        try:
+            data = json.loads(raw_line)
+        except ValueError:
+            raise ImportLineError('Invalid JSON')
+        if not isinstance(data, dict):
+            raise ImportLineError('Each line must be a JSON object')
+
+        name = data.get('name')
+        if not isinstance(name, str) or not name.strip():
+            raise ImportLineError('Recipe name is required')
+
+        category_id = data.get('category_id')
+        if category_id:
+            if category_id not in self._category_ids:
+                raise ImportLineError('Invalid recipe category')
+        elif data.get('category_name'):
+            category_id = self._category_names.get(str(data['category_name']).lower())
+            if category_id is None:
+                raise ImportLineError('Invalid recipe category')
+        else:
+            category_id = None
+
+        servings = _optional_int(data, 'servings')
+        recipe = {
+            'name': name,
+            'description': _optional_str(data, 'description'),
+            'instructions': _optional_str(data, 'instructions'),
+            'prep_time': _optional_int(data, 'prep_time'),
+            'cook_time': _optional_int(data, 'cook_time'),
+            'servings': 4 if servings is None else servings,
+            'category_id': category_id
+        }
+
+        ingredients = []
+        raw_ingredients = data.get('ingredients') or []
+        if not isinstance(raw_ingredients, list):
+            raise ImportLineError('ingredients must be a list')
+        for ingredient_data in raw_ingredients:
+            # Same rule as create_recipe: incomplete ingredients are skipped
+            if not isinstance(ingredient_data, dict) or not all(
+                key in ingredient_data for key in ('name', 'quantity', 'unit')
+            ):
+                continue
+            ingredient_name = ingredient_data['name']
+            if not isinstance(ingredient_name, str) or not ingredient_name.strip():
+                raise ImportLineError('Ingredient names must be non-empty strings')
+            quantity = ingredient_data['quantity']
+            if isinstance(quantity, bool) or not isinstance(quantity, (int, float)) or not math.isfinite(quantity):
+                raise ImportLineError(f'Invalid quantity for ingredient {ingredient_name!r}')
+            if not isinstance(ingredient_data['unit'], str):
+                raise ImportLineError(f'Unit of ingredient {ingredient_name!r} must be a string')
+            ingredients.append({
+                'name': ingredient_name,
+                'quantity': float(quantity),
+                'unit': ingredient_data['unit'],
+                'notes': _optional_str(ingredient_data, 'notes', f'Notes of ingredient {ingredient_name!r}')
+            })
+        return recipe, ingredients
@@ -0,0 +1,84 @@
+"""
+Diff-based replacement of a parent's child rows.
+
+Used for a recipe's ingredients and a shopping list's items. Instead of
+deleting every row and inserting the new list, the incoming list is
+matched against the existing rows and only the rows that actually changed
+are written, so untouched rows keep their ids and the SQLite write lock is
+held for as few statements as possible.
+"""
+from sqlalchemy import delete, insert, update
+from src.models.user import db
+
+class UnknownChildRowError(LookupError):
+    """An incoming entry's id is not a child row of the parent"""
+
+    def __init__(self, row_id):
+        super().__init__(row_id)
+        self.row_id = row_id
+
+def sync_child_rows(model, parent_column, parent_id, incoming, fields, match_field):
+    """Make the children of parent_id match incoming.
+
+    incoming is a list of dicts holding every name in fields and optionally
+    an 'id'. Entries with an id update that row; entries without one are
+    matched to a remaining row with the same match_field (case-insensitive)
+    so clients that never send ids still keep them, and the rest are
+    inserted. Existing rows left unmatched are deleted.
+
+    Raises UnknownChildRowError if an entry refers to an id that is not a child of
+    parent_id. Returns a dict of insert/update/delete counts. The caller
+    commits.
+    """
+    columns = [getattr(model, field) for field in fields]
+    # Read before flushing pending parent changes so the write lock is only
+    # taken once the diff is known
+    with db.session.no_autoflush:
+        existing = {
+            row[0]: dict(zip(fields, row[1:]))
+            for row in db.session.query(model.id, *columns).filter(parent_column == parent_id)
+        }
+
+    matched = {}
+    unkeyed = []
+    for entry in incoming:
+        entry_id = entry.get('id')
+        if entry_id is None:
+            unkeyed.append(entry)
+        elif entry_id in existing and entry_id not in matched:
+            matched[entry_id] = entry
+        else:
+            raise UnknownChildRowError(entry_id)
+
+    # Pair id-less entries with leftover rows of the same name
+    leftovers = {}
+    for row_id, values in existing.items():
+        if row_id not in matched:
+            leftovers.setdefault(str(values[match_field]).lower(), []).append(row_id)
+    inserts = []
+    for entry in unkeyed:
+        candidates = leftovers.get(str(entry[match_field]).lower())
+        if candidates:
+            matched[candidates.pop(0)] = entry
+        else:
+            inserts.append(entry)
+
+    updates = []
+    for row_id, entry in matched.items():
+        changes = {field: entry[field] for field in fields if entry[field] != existing[row_id][field]}
+        if changes:
+            updates.append({'id': row_id, **changes})
+    deletes = [row_id for row_id in existing if row_id not in matched]
+
+    if deletes:
+        db.session.execute(delete(model).where(model.id.in_(deletes)))
+    if updates:
+        db.session.execute(update(model), updates)
+    if inserts:
+        parent_field = parent_column.key
+        db.session.execute(insert(model.__table__), [
+            {parent_field: parent_id, **{field: entry[field] for field in fields}}
+            for entry in inserts
+        ])
+
+    return {'inserted': len(inserts), 'updated': len(updates), 'deleted': len(deletes)}
@@ -0,0 +1,153 @@
+"""
+Content-addressed storage of recipe image files.
+
+Files are named by the SHA-256 of their bytes, so identical images are kept
+once however many recipes use them. An ImageBlob row counts the recipe
+image variants referring to each file; reference changes are made in the
+same transaction as the recipe change that causes them.
+
+Files are never deleted when their count drops to zero. collect_garbage()
+removes them later, once they have been unreferenced for a grace period,
+together with files no row or recipe knows about (uploads stored before
+this scheme, and files whose recipe update never committed).
+"""
+import hashlib
+import os
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, delete, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.models.recipe import db, Recipe, ImageBlob
+from src.models.images import IMAGES_URL, IMAGE_FORMATS, variant_files
+
+DEFAULT_GC_GRACE = timedelta(hours=1)
+
+# Holds staged uploads waiting to be processed
+UPLOADS_DIR_NAME = 'uploads'
+
+def blob_filename(data, extension):
+    return f'{hashlib.sha256(data).hexdigest()}.{extension}'
+
+def write_blob(directory, data, extension):
+    """Store data under its content hash unless it is already there; returns the filename"""
+    filename = blob_filename(data, extension)
+    path = os.path.join(directory, filename)
+    if not os.path.exists(path):
+        partial = f'{path}.{os.getpid()}.part'
+        with open(partial, 'wb') as file:
+            file.write(data)
+        os.replace(partial, path)
+    return filename
+
+def store_variants(directory, rendered):
+    """Write the encoded variants from render_variants() into directory.
+
+    Returns (variants, sizes): the variants with each format's bytes
+    replaced by its URL, and {filename: size} of the files they use.
+    Files that already exist are left alone, so storing is idempotent.
+    """
+    variants = {}
+    sizes = {}
+    for name, variant in rendered.items():
+        stored = {'width': variant['width'], 'height': variant['height']}
+        for extension in IMAGE_FORMATS:
+            filename = write_blob(directory, variant[extension], extension)
+            stored[extension] = f'{IMAGES_URL}/{filename}'
+            sizes[filename] = len(variant[extension])
+        variants[name] = stored
+    return variants, sizes
+
+def add_references(filenames, sizes):
+    """Count one reference per entry in filenames, creating missing blobs"""
+    counts = Counter(filenames)
+    if not counts:
+        return
+    now = datetime.utcnow()
+    stmt = sqlite_insert(ImageBlob)
+    db.session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[ImageBlob.filename],
+            set_={'ref_count': ImageBlob.ref_count + stmt.excluded.ref_count, 'updated_at': now}
+        ),
+        [
+            {'filename': filename, 'size': sizes[filename], 'ref_count': count, 'updated_at': now}
+            for filename, count in counts.items()
+        ]
+    )
+
+def release_references(filenames):
+    """Drop one reference per entry in filenames"""
+    counts = Counter(filenames)
+    if not counts:
+        return
+    blobs = ImageBlob.__table__
+    db.session.execute(
+        update(blobs).where(blobs.c.filename == bindparam('released')).values(
+            ref_count=blobs.c.ref_count - bindparam('count'),
+            updated_at=datetime.utcnow()
+        ),
+        [{'released': filename, 'count': count} for filename, count in counts.items()]
+    )
+
+def rebuild_references(directory):
+    """Recount every blob from the recipes' image variants"""
+    counts = Counter()
+    for variants in db.session.scalars(select(Recipe.image_variants).where(Recipe.image_variants.isnot(None))):
+        counts.update(variant_files(variants))
+    db.session.execute(delete(ImageBlob))
+    sizes = {}
+    for filename in counts:
+        path = os.path.join(directory, filename)
+        sizes[filename] = os.path.getsize(path) if os.path.exists(path) else 0
+    add_references(list(counts.elements()), sizes)
+
+def collect_garbage(directory, grace=DEFAULT_GC_GRACE):
+    """Delete image files nothing has referred to for longer than grace.
+
+    Returns {'blobs_removed', 'orphans_removed', 'bytes_reclaimed'}.
+    """
+    cutoff = datetime.utcnow() - grace
+    report = {'blobs_removed': 0, 'orphans_removed': 0, 'bytes_reclaimed': 0}
+
+    def remove(path):
+        if os.path.exists(path):
+            report['bytes_reclaimed'] += os.path.getsize(path)
+            os.remove(path)
+
+    try:
+        # Files are unlinked before the rows' deletion commits: a worker
+        # taking a new reference to one of them waits for this transaction
+        # and then writes the file again
+        released = db.session.execute(
+            delete(ImageBlob).where(
+                ImageBlob.ref_count <= 0, ImageBlob.updated_at < cutoff
+            ).returning(ImageBlob.filename)
+        ).scalars().all()
+        for filename in released:
+            remove(os.path.join(directory, filename))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    report['blobs_removed'] = len(released)
+
+    known = set(db.session.scalars(select(ImageBlob.filename)))
+    known.update(
+        image_path.rsplit('/', 1)[-1]
+        for image_path in db.session.scalars(select(Recipe.image_path).where(Recipe.image_path.isnot(None)))
+    )
+    cutoff_timestamp = time.time() - grace.total_seconds()
+    uploads_dir = os.path.join(directory, UPLOADS_DIR_NAME)
+    for folder, check_known in ((directory, True), (uploads_dir, False)):
+        if not os.path.isdir(folder):
+            continue
+        for entry in os.scandir(folder):
+            # Recent files may belong to an upload still being processed
+            if not entry.is_file() or entry.stat().st_mtime >= cutoff_timestamp:
+                continue
+            if check_known and entry.name in known:
+                continue
+            remove(entry.path)
+            report['orphans_removed'] += 1
+    return report
@@ -0,0 +1,115 @@
+"""
+Resized WebP and JPEG variants of uploaded recipe images.
+
+Every upload is decoded once, turned upright from its EXIF orientation and
+then re-encoded without any metadata, so camera details and GPS positions
+never reach the static folder. Each variant is scaled to fit its box from
+the next larger one, which is much cheaper than scaling the full photo
+three times, and JPEG sources are decoded at a reduced size when the
+largest variant allows it.
+
+Pillow is imported by the functions that decode images, so only processes
+that handle uploads load it.
+"""
+import io
+import os
+
+IMAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'images')
+IMAGES_URL = '/static/images'
+
+# Variant name -> bounding box; images are only ever scaled down to fit
+IMAGE_VARIANTS = {
+    'full': (1600, 1600),
+    'card': (640, 480),
+    'thumbnail': (160, 160),
+}
+
+# Variant used when a view does not ask for one
+DEFAULT_IMAGE_SIZE = 'full'
+
+IMAGE_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# Refuse decompression bombs well before they exhaust memory
+MAX_IMAGE_PIXELS = 50_000_000
+
+class InvalidImage(ValueError):
+    """Raised when an upload cannot be read as an image"""
+
+def check_image(file):
+    """Raise InvalidImage unless file holds an image Pillow can decode.
+
+    Only the header is parsed, so this is cheap enough to run in the
+    request before the upload is queued for processing.
+    """
+    from PIL import Image
+
+    try:
+        with Image.open(file) as image:
+            if image.width * image.height > MAX_IMAGE_PIXELS:
+                raise InvalidImage('Image is too large')
+            image.verify()
+    except InvalidImage:
+        raise
+    except Exception as e:
+        raise InvalidImage('File is not a supported image') from e
+    finally:
+        file.seek(0)
+
+def _flatten(image):
+    """Return image as RGB, compositing any transparency onto white"""
+    from PIL import Image
+
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+def render_variants(source):
+    """Encode the variants of the image at source.
+
+    Returns {variant: {'width', 'height', 'jpeg', 'webp'}} with the encoded
+    bytes of each format, ready to be stored.
+    """
+    from PIL import Image, ImageOps
+
+    variants = {}
+    with Image.open(source) as image:
+        if image.width * image.height > MAX_IMAGE_PIXELS:
+            raise InvalidImage('Image is too large')
+        # Let the JPEG decoder skip detail the largest variant would discard
+        image.draft('RGB', IMAGE_VARIANTS['full'])
+        current = _flatten(ImageOps.exif_transpose(image))
+
+    for name, box in IMAGE_VARIANTS.items():
+        # Variants are ordered largest first, so each is scaled from the last
+        current.thumbnail(box, Image.Resampling.LANCZOS, reducing_gap=3.0)
+        variant = {'width': current.width, 'height': current.height}
+        for extension, (image_format, options) in IMAGE_FORMATS.items():
+            buffer = io.BytesIO()
+            current.save(buffer, image_format, **options)
+            variant[extension] = buffer.getvalue()
+        variants[name] = variant
+    return variants
+
+def variant_files(variants):
+    """Return the file names of every variant in variants"""
+    files = []
+    for variant in (variants or {}).values():
+        files.extend(variant[extension].rsplit('/', 1)[-1] for extension in IMAGE_FORMATS)
+    return files
+
+def select_image(image_path, variants, size=DEFAULT_IMAGE_SIZE):
+    """Return (image_path, image) for the view that wants size.
+
+    image is the chosen variant's dimensions and URLs, or None for images
+    uploaded before variants existed, whose original path is kept.
+    """
+    if not variants or size not in variants:
+        return image_path, None
+    variant = variants[size]
+    return variant['jpeg'], dict(variant, size=size)
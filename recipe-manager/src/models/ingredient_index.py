@@ -0,0 +1,200 @@
+"""
+In-memory inverted index from ingredient words to recipes.
+
+Every distinct (normalized) ingredient name gets an integer id, and each
+recipe is stored as the sorted tuple of its ingredient ids, with a set of
+recipes per ingredient id. A pantry is turned into a set of the same ids,
+so coverage and missing ingredients are counted from those sets in memory
+instead of SQL queries.
+
+The index lives in the process and each worker keeps its own copy. It is
+versioned like the categories: by the recipe count and the newest recipe
+updated_at. Every lookup checks that version with one small query; recipes
+updated since the last check are re-indexed, and the whole index is
+reloaded when recipes have been deleted, so writes made by any worker show
+up in every worker's suggestions.
+"""
+import heapq
+import re
+from collections import Counter
+import threading
+from sqlalchemy import func, select
+from src.models.user import db
+from src.models.recipe import Recipe, Ingredient
+
+_WORD_RE = re.compile(r'[^\W\d_]+', re.UNICODE)
+
+def normalize_word(word):
+    """Lowercase a word and strip simple English plurals"""
+    word = word.lower()
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 4 and word.endswith('oes'):
+        return word[:-2]
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+def ingredient_words(name):
+    """Normalized words of an ingredient name, e.g. 'Cherry Tomatoes' -> ('cherry', 'tomato')"""
+    return tuple(normalize_word(word) for word in _WORD_RE.findall(name))
+
+class IngredientIndex:
+    """Inverted index of ingredient words with a sorted ingredient id tuple per recipe"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.loaded = False
+        self._reset()
+
+    def _reset(self):
+        self._ids = {}                # ingredient key -> ingredient id
+        self._word_ingredients = {}   # word -> set of ingredient ids containing it
+        self._ingredient_recipes = {} # ingredient id -> set of recipe ids
+        self._recipes = {}            # recipe id -> recipe entry
+        self._sizes = {}              # recipe id -> number of distinct ingredients
+        self._version = None          # (recipe count, newest updated_at) indexed
+
+    def load(self):
+        """(Re)build the whole index"""
+        version = self._current_version()
+        recipes = self._read_recipes()
+        with self._lock:
+            self._reset()
+            for recipe_id, (info, names) in recipes.items():
+                self._add(recipe_id, info, names)
+            self._version = version
+            self.loaded = True
+
+    def ensure_loaded(self):
+        """Bring the index up to date with the database"""
+        version = self._current_version()
+        if self.loaded and version == self._version:
+            return
+        if not self.loaded or self._version[1] is None:
+            self.load()
+            return
+
+        # Re-index what changed since the indexed version. Ties on
+        # updated_at are read again, which is harmless.
+        changed = self._read_recipes(Recipe.updated_at >= self._version[1])
+        with self._lock:
+            for recipe_id, (info, names) in changed.items():
+                self._remove(recipe_id)
+                self._add(recipe_id, info, names)
+            complete = len(self._recipes) == version[0]
+            if complete:
+                self._version = version
+        if not complete:
+            # Recipes were deleted, which leaves no updated_at to find them by
+            self.load()
+
+    def match(self, pantry, limit=None):
+        """Rank recipes by how much of their ingredient list the pantry covers.
+
+        Each pantry entry matches every ingredient whose name contains all
+        of its words, so 'chicken' covers 'Chicken breast'. Returns dicts
+        with the recipe info, coverage and missing ingredient names, best
+        coverage first.
+        """
+        self.ensure_loaded()
+        with self._lock:
+            pantry_ids = set()
+            for item in pantry:
+                words = ingredient_words(item)
+                if not words:
+                    continue
+                item_ids = None
+                for word in words:
+                    ids = self._word_ingredients.get(word, set())
+                    item_ids = ids if item_ids is None else item_ids & ids
+                pantry_ids |= item_ids
+
+            # How many of each recipe's ingredients the pantry has
+            counts = Counter()
+            for ingredient_id in pantry_ids:
+                counts.update(self._ingredient_recipes.get(ingredient_id, ()))
+            sizes = self._sizes
+            scored = [(-have / sizes[recipe_id], -have, recipe_id) for recipe_id, have in counts.items()]
+            if limit is not None:
+                scored = heapq.nsmallest(limit, scored)
+            else:
+                scored.sort()
+
+            results = []
+            for coverage, have, recipe_id in scored:
+                entry = self._recipes[recipe_id]
+                results.append({
+                    'id': recipe_id,
+                    **entry['info'],
+                    'matched_count': -have,
+                    'ingredient_count': len(entry['ids']),
+                    'coverage': -coverage,
+                    'missing_ingredients': [
+                        name for ingredient_id, name in entry['names'] if ingredient_id not in pantry_ids
+                    ]
+                })
+            return results
+
+    @staticmethod
+    def _current_version():
+        # Deletes change the count, inserts and updates the newest updated_at.
+        # Separate subqueries let SQLite answer both from the index without
+        # scanning it.
+        return tuple(db.session.execute(select(
+            select(func.count()).select_from(Recipe).scalar_subquery(),
+            select(func.max(Recipe.updated_at)).scalar_subquery()
+        )).one())
+
+    @staticmethod
+    def _read_recipes(*criteria):
+        """Read {recipe id: (info, ingredient names)} with one query"""
+        rows = db.session.query(
+            Recipe.id, Recipe.name, Recipe.description,
+            Recipe.prep_time, Recipe.cook_time, Recipe.servings,
+            Ingredient.name
+        ).outerjoin(Ingredient, Ingredient.recipe_id == Recipe.id).filter(*criteria).order_by(
+            Recipe.id, Ingredient.id
+        )
+        recipes = {}
+        for row in rows:
+            if row[0] not in recipes:
+                recipes[row[0]] = ({
+                    'name': row[1],
+                    'description': row[2],
+                    'prep_time': row[3],
+                    'cook_time': row[4],
+                    'servings': row[5]
+                }, [])
+            if row[6] is not None:
+                recipes[row[0]][1].append(row[6])
+        return recipes
+
+    def _add(self, recipe_id, info, ingredient_names):
+        ids = set()
+        names = []
+        for name in ingredient_names:
+            key = ingredient_words(name)
+            if not key:
+                continue
+            ingredient_id = self._ids.get(key)
+            if ingredient_id is None:
+                ingredient_id = self._ids[key] = len(self._ids)
+                for word in key:
+                    self._word_ingredients.setdefault(word, set()).add(ingredient_id)
+            if ingredient_id not in ids:
+                ids.add(ingredient_id)
+                names.append((ingredient_id, name))
+                self._ingredient_recipes.setdefault(ingredient_id, set()).add(recipe_id)
+        self._recipes[recipe_id] = {'info': info, 'ids': tuple(sorted(ids)), 'names': names}
+        self._sizes[recipe_id] = len(ids)
+
+    def _remove(self, recipe_id):
+        entry = self._recipes.pop(recipe_id, None)
+        if entry is None:
+            return
+        del self._sizes[recipe_id]
+        for ingredient_id in entry['ids']:
+            self._ingredient_recipes[ingredient_id].discard(recipe_id)
+
+ingredient_index = IngredientIndex()
@@ -1,11 +1,26 @@
 from src.models.user import db
+from src.models.units import to_canonical
+from src.models.images import DEFAULT_IMAGE_SIZE, select_image
 from datetime import datetime
 
+def _canonical_default(position):
+    """Column default filled from the row's quantity and unit on insert"""
+    def default(context):
+        params = context.get_current_parameters()
+        return to_canonical(params['quantity'], params['unit'])[position]
+    return default
+
 class Category(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     type = db.Column(db.String(20), nullable=False)  # 'recipe' or 'meal'
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Category writes check for an existing (name, type)
+    __table_args__ = (
+        db.Index('ix_category_name_type', 'name', 'type'),
+    )
     
     # Relationships
     recipes = db.relationship('Recipe', backref='category', lazy=True, cascade='all, delete-orphan')
@@ -32,9 +47,20 @@ class Recipe(db.Model):
     servings = db.Column(db.Integer, default=4)
     category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=True)
     image_path = db.Column(db.String(255))
+    # {variant: {'width', 'height', 'jpeg', 'webp'}} once an upload has been
+    # processed; image_path then points at the full-size JPEG
+    image_variants = db.Column(db.JSON)
+    image_status = db.Column(db.String(20))  # processing, ready or failed
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Keyset pagination walks recipes by (created_at, id); the ingredient
+    # index versions itself by the newest updated_at
+    __table_args__ = (
+        db.Index('ix_recipe_created_at_id', 'created_at', 'id'),
+        db.Index('ix_recipe_updated_at', 'updated_at'),
+    )
+    
     # Relationships
     ingredients = db.relationship('Ingredient', backref='recipe', lazy=True, cascade='all, delete-orphan')
     meal_plans = db.relationship('MealPlan', backref='recipe', lazy=True, cascade='all, delete-orphan')
@@ -42,7 +68,8 @@ class Recipe(db.Model):
     def __repr__(self):
         return f'<Recipe {self.name}>'
 
-    def to_dict(self):
+    def to_dict(self, image_size=DEFAULT_IMAGE_SIZE):
+        image_path, image = select_image(self.image_path, self.image_variants, image_size)
         return {
             'id': self.id,
             'name': self.name,
@@ -53,7 +80,9 @@ class Recipe(db.Model):
             'servings': self.servings,
             'category_id': self.category_id,
             'category_name': self.category.name if self.category else None,
-            'image_path': self.image_path,
+            'image_path': image_path,
+            'image': image,
+            'image_status': self.image_status,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
             'ingredients': [ingredient.to_dict() for ingredient in self.ingredients]
@@ -66,6 +95,14 @@ class Ingredient(db.Model):
     quantity = db.Column(db.Float, nullable=False)
     unit = db.Column(db.String(50), nullable=False)  # grams, ml, pieces, etc.
     notes = db.Column(db.Text)
+    # quantity converted to the base unit of its dimension (g, ml, pieces), or
+    # unconverted under the cleaned unit name when the unit is not known
+    canonical_quantity = db.Column(db.Float, default=_canonical_default(0))
+    canonical_unit = db.Column(db.String(50), default=_canonical_default(1))
+    
+    __table_args__ = (
+        db.Index('ix_ingredient_recipe_id', 'recipe_id'),
+    )
 
     def __repr__(self):
         return f'<Ingredient {self.name}>'
@@ -88,6 +125,13 @@ class MealPlan(db.Model):
     recipe_id = db.Column(db.Integer, db.ForeignKey('recipe.id'), nullable=False)
     people_count = db.Column(db.Integer, default=4)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # One plan per date and meal category; date range scans (week view,
+    # shopping-list generation) seek the same index
+    __table_args__ = (
+        db.Index('uq_meal_plan_date_category', 'date', 'meal_category_id', unique=True),
+    )
 
     def __repr__(self):
         return f'<MealPlan {self.name}>'
@@ -105,14 +149,26 @@ class MealPlan(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+# Meal plans a shopping list was generated from, so later generations can
+# skip plans that are already covered
+shopping_list_meal_plan = db.Table(
+    'shopping_list_meal_plan',
+    db.Column('shopping_list_id', db.Integer, db.ForeignKey('shopping_list.id'), primary_key=True),
+    db.Column('meal_plan_id', db.Integer, db.ForeignKey('meal_plan.id'), primary_key=True),
+    db.Index('ix_shopping_list_meal_plan_meal_plan_id', 'meal_plan_id')
+)
+
 class ShoppingList(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Also bumped by item changes so it versions the whole list
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     exported_at = db.Column(db.DateTime)
     
     # Relationships
     items = db.relationship('ShoppingListItem', backref='shopping_list', lazy=True, cascade='all, delete-orphan')
+    meal_plans = db.relationship('MealPlan', secondary=shopping_list_meal_plan, lazy=True, backref='shopping_lists')
 
     def __repr__(self):
         return f'<ShoppingList {self.name}>'
@@ -133,6 +189,10 @@ class ShoppingListItem(db.Model):
     quantity = db.Column(db.Float, nullable=False)
     unit = db.Column(db.String(50), nullable=False)
     checked = db.Column(db.Boolean, default=False)
+    
+    __table_args__ = (
+        db.Index('ix_shopping_list_item_shopping_list_id', 'shopping_list_id'),
+    )
 
     def __repr__(self):
         return f'<ShoppingListItem {self.ingredient_name}>'
@@ -147,3 +207,14 @@ class ShoppingListItem(db.Model):
             'checked': self.checked
         }
 
+
+class ImageBlob(db.Model):
+    # <sha256 of the content>.<extension>, the file's name under static/images
+    filename = db.Column(db.String(80), primary_key=True)
+    size = db.Column(db.Integer, nullable=False)
+    # Recipe image variants using the file; at zero it is garbage
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ImageBlob {self.filename}>'
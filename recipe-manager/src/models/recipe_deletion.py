@@ -0,0 +1,20 @@
+"""
+Cleanup for recipes being deleted, whichever route deletes them.
+
+A recipe is deleted on its own or together with its category, and either
+way it holds on to state outside its own rows. release_recipes() gives
+that state up inside the deleting transaction, before the commit.
+"""
+from src.models.images import variant_files
+from src.models.image_store import release_references
+from src.models.search import remove_recipes_from_index
+
+def release_recipes(recipes):
+    """Release what recipes refer to; call in the transaction deleting them"""
+    files = []
+    for recipe in recipes:
+        # The files are shared and stay until garbage collection finds
+        # nothing else uses them
+        files.extend(variant_files(recipe.image_variants))
+    release_references(files)
+    remove_recipes_from_index([recipe.id for recipe in recipes])
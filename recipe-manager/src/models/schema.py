@@ -0,0 +1,230 @@
+"""
+Versioned schema migrations for existing SQLite databases.
+
+db.create_all() only creates missing tables, so columns, indexes and data
+changes for tables that already exist are applied here. Each migration has
+a version number; the database's current version is kept in SQLite's
+PRAGMA user_version and only newer migrations run. New databases are
+created from the models and stamped with the latest version directly.
+
+Migrations must be safe to re-run, since pysqlite commits DDL as soon as
+it runs and a crash can leave a migration half applied.
+"""
+import os
+from flask import current_app
+from sqlalchemy import inspect, text, update
+from src.models.user import db
+from src.models.recipe import Ingredient, Recipe
+from src.models.units import to_canonical
+from src.models.images import IMAGES_DIR, IMAGES_URL, IMAGE_FORMATS
+from src.models.image_store import rebuild_references, write_blob
+
+MIGRATIONS = []
+
+# Queries the routes run on every request, with representative parameters,
+# whose plans are reported before and after migrating
+HOT_QUERIES = {
+    'meal plans in a week': (
+        'SELECT id FROM meal_plan WHERE date >= :start AND date <= :end ORDER BY date, meal_category_id',
+        {'start': '2024-01-01', 'end': '2024-01-07'}
+    ),
+    'meal plan slot check': (
+        'SELECT id FROM meal_plan WHERE date = :date AND meal_category_id = :category_id LIMIT 1',
+        {'date': '2024-01-01', 'category_id': 1}
+    ),
+    'recipe ingredients': (
+        'SELECT id, name, quantity, unit FROM ingredient WHERE recipe_id = :recipe_id',
+        {'recipe_id': 1}
+    ),
+    'shopping list items': (
+        'SELECT id, ingredient_name, quantity, unit FROM shopping_list_item WHERE shopping_list_id = :list_id',
+        {'list_id': 1}
+    ),
+    'category name check': (
+        'SELECT id FROM category WHERE name = :name AND type = :type LIMIT 1',
+        {'name': 'Dinner', 'type': 'meal'}
+    ),
+    'recipe page': (
+        'SELECT id FROM recipe ORDER BY created_at DESC, id DESC LIMIT 20',
+        {}
+    ),
+    'ingredient index version': (
+        'SELECT (SELECT count(*) FROM recipe), (SELECT max(updated_at) FROM recipe)',
+        {}
+    ),
+}
+
+def migration(version, description):
+    """Register a migration function under version"""
+    def register(func):
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda entry: entry[0])
+        return func
+    return register
+
+def latest_version():
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+def current_version():
+    return db.session.execute(text('PRAGMA user_version')).scalar()
+
+def _set_version(version):
+    db.session.execute(text(f'PRAGMA user_version = {int(version)}'))
+
+def explain_hot_queries():
+    """Return {query name: EXPLAIN QUERY PLAN text} for HOT_QUERIES"""
+    # EXPLAIN plans against the connection's cached schema without checking
+    # it is current; a real read first picks up indexes made elsewhere
+    db.session.execute(text('SELECT count(*) FROM sqlite_master')).scalar()
+    plans = {}
+    for name, (sql, params) in HOT_QUERIES.items():
+        rows = db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}'), params).all()
+        plans[name] = '; '.join(row[-1] for row in rows)
+    return plans
+
+def migrate():
+    """Create missing tables and apply pending migrations.
+
+    Returns (applied, plans): the (version, description) of each migration
+    run, and {query name: (plan before, plan after)} for HOT_QUERIES when
+    anything was applied.
+    """
+    is_new = not inspect(db.engine).get_table_names()
+    db.create_all()
+    if is_new:
+        _set_version(latest_version())
+        db.session.commit()
+        return [], {}
+
+    pending = [entry for entry in MIGRATIONS if entry[0] > current_version()]
+    if not pending:
+        return [], {}
+
+    before = explain_hot_queries()
+    applied = []
+    for version, description, func in pending:
+        try:
+            func()
+            _set_version(version)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        applied.append((version, description))
+    after = explain_hot_queries()
+    return applied, {name: (before[name], after[name]) for name in HOT_QUERIES}
+
+def _create_indexes(*names):
+    """Create model indexes by name if they do not exist yet"""
+    indexes = {index.name: index for table in db.metadata.sorted_tables for index in table.indexes}
+    for name in names:
+        indexes[name].create(db.session.connection(), checkfirst=True)
+
+def _add_columns(*columns):
+    """Add (table, column, DDL type) columns that existing tables are missing.
+
+    The columns are spelled out per migration rather than read from the
+    models, so each version adds the same columns whenever it runs. Only
+    nullable columns without server defaults can be added this way; new
+    rows get their Python-side defaults from the model.
+    """
+    inspector = inspect(db.session.connection())
+    for table, name, column_type in columns:
+        if name in {column['name'] for column in inspector.get_columns(table)}:
+            continue
+        db.session.execute(text(f'ALTER TABLE "{table}" ADD COLUMN "{name}" {column_type}'))
+
+@migration(1, 'Add updated_at and canonical ingredient quantity columns')
+def add_version_and_canonical_columns():
+    """Add the updated_at columns that version responses and the canonical ingredient quantity"""
+    _add_columns(
+        ('category', 'updated_at', 'DATETIME'),
+        ('meal_plan', 'updated_at', 'DATETIME'),
+        ('shopping_list', 'updated_at', 'DATETIME'),
+        ('ingredient', 'canonical_quantity', 'FLOAT'),
+        ('ingredient', 'canonical_unit', 'VARCHAR(50)'),
+    )
+    # Versions are built from max(updated_at), which ignores NULLs
+    for table in ('category', 'meal_plan', 'shopping_list'):
+        db.session.execute(text(
+            f'UPDATE "{table}" SET updated_at = CURRENT_TIMESTAMP WHERE updated_at IS NULL'
+        ))
+
+@migration(2, 'Backfill canonical ingredient quantities')
+def backfill_canonical_quantities(batch_size=1000):
+    """Fill Ingredient.canonical_quantity/unit for rows written before they existed"""
+    while True:
+        rows = db.session.query(Ingredient.id, Ingredient.quantity, Ingredient.unit).filter(
+            Ingredient.canonical_unit.is_(None)
+        ).limit(batch_size).all()
+        if not rows:
+            return
+        updates = []
+        for ingredient_id, quantity, unit in rows:
+            canonical_quantity, canonical_unit = to_canonical(quantity, unit)
+            updates.append({'id': ingredient_id, 'canonical_quantity': canonical_quantity, 'canonical_unit': canonical_unit})
+        db.session.execute(update(Ingredient), updates)
+
+@migration(3, 'Index hot query paths and make meal plan slots unique')
+def add_hot_path_indexes():
+    """Create the indexes the routes rely on, including the unique meal plan slot"""
+    # Duplicates can only come from edits made before the constraint
+    # existed, so refuse to guess which plan to keep
+    duplicates = db.session.execute(text(
+        'SELECT date, meal_category_id FROM meal_plan '
+        'GROUP BY date, meal_category_id HAVING count(*) > 1'
+    )).all()
+    if duplicates:
+        slots = ', '.join(f'{date} (meal category {category_id})' for date, category_id in duplicates)
+        raise RuntimeError(f'Several meal plans share a date and meal category, resolve them first: {slots}')
+
+    # Superseded by the unique index on the same columns
+    db.session.execute(text('DROP INDEX IF EXISTS ix_meal_plan_date_category'))
+    _create_indexes(
+        'uq_meal_plan_date_category',
+        'ix_ingredient_recipe_id',
+        'ix_shopping_list_item_shopping_list_id',
+        'ix_category_name_type',
+        'ix_recipe_created_at_id',
+        'ix_shopping_list_meal_plan_meal_plan_id',
+    )
+    # Give the planner statistics for the new indexes
+    db.session.execute(text('ANALYZE'))
+
+@migration(4, 'Add recipe image variant columns')
+def add_image_variant_columns():
+    """Add Recipe.image_variants and image_status to existing databases"""
+    _add_columns(
+        ('recipe', 'image_variants', 'JSON'),
+        ('recipe', 'image_status', 'VARCHAR(20)'),
+    )
+
+@migration(5, 'Move processed recipe images into the content-addressed store')
+def content_address_images():
+    """Rename processed image variants after their content hash and count references.
+
+    The old files are left in place; nothing refers to them afterwards, so
+    image garbage collection deletes them.
+    """
+    images_dir = current_app.config.get('IMAGES_DIR', IMAGES_DIR)
+    for recipe in Recipe.query.filter(Recipe.image_variants.isnot(None)):
+        variants = {}
+        for name, variant in (recipe.image_variants or {}).items():
+            stored = dict(variant)
+            for extension in IMAGE_FORMATS:
+                path = os.path.join(images_dir, variant[extension].rsplit('/', 1)[-1])
+                if not os.path.exists(path):
+                    continue
+                with open(path, 'rb') as file:
+                    stored[extension] = f'{IMAGES_URL}/{write_blob(images_dir, file.read(), extension)}'
+            variants[name] = stored
+        if variants and variants != recipe.image_variants:
+            recipe.image_variants = variants
+            recipe.image_path = variants['full']['jpeg']
+    rebuild_references(images_dir)
+
+@migration(6, 'Index recipe updated_at')
+def add_recipe_updated_at_index():
+    """Create the index the ingredient index reads its version from"""
+    _create_indexes('ix_recipe_updated_at')
+    db.session.execute(text('ANALYZE'))
@@ -0,0 +1,137 @@
+"""
+Full-text search over recipes backed by an SQLite FTS5 table.
+
+recipe_fts holds one row per recipe, keyed by the recipe id as rowid, with
+the recipe name, description, instructions and the names of its ingredients.
+The route handlers keep it in sync inside the same transaction as the
+recipe write; rebuild_search_index() repopulates it from scratch.
+"""
+import re
+from sqlalchemy import bindparam, text
+from src.models.user import db
+
+SEARCH_TABLE = 'recipe_fts'
+
+# Column weights for bm25(): a hit in the name counts most, then ingredients
+BM25_WEIGHTS = '10.0, 3.0, 1.0, 5.0'
+
+_CREATE_SQL = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+    name, description, instructions, ingredients,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+_INSERT_SQL = f"""
+INSERT INTO {SEARCH_TABLE} (rowid, name, description, instructions, ingredients)
+SELECT recipe.id,
+       recipe.name,
+       coalesce(recipe.description, ''),
+       coalesce(recipe.instructions, ''),
+       coalesce(ingredient_names.names, '')
+FROM recipe
+LEFT JOIN (
+    SELECT recipe_id, group_concat(name, ' ') AS names
+    FROM ingredient
+    {{ingredient_filter}}
+    GROUP BY recipe_id
+) AS ingredient_names ON ingredient_names.recipe_id = recipe.id
+{{recipe_filter}}
+"""
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+def search_index_exists():
+    """Return True if the FTS table exists in the current database"""
+    row = db.session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {'name': SEARCH_TABLE}
+    ).first()
+    return row is not None
+
+def ensure_search_index():
+    """Create the FTS table if needed, populating it when newly created"""
+    if db.engine.dialect.name != 'sqlite':
+        return
+    if not search_index_exists():
+        db.session.execute(text(_CREATE_SQL))
+        rebuild_search_index()
+    db.session.commit()
+
+def rebuild_search_index():
+    """Re-index every recipe. Returns the number of indexed recipes."""
+    db.session.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+    result = db.session.execute(text(
+        _INSERT_SQL.format(ingredient_filter='', recipe_filter='')
+    ))
+    return result.rowcount
+
+def index_recipe(recipe_id):
+    """(Re)index one recipe from its current rows.
+
+    Must run after the recipe and its ingredients have been flushed; the
+    caller commits.
+    """
+    db.session.flush()
+    remove_recipe_from_index(recipe_id)
+    db.session.execute(text(_INSERT_SQL.format(
+        ingredient_filter='WHERE recipe_id = :recipe_id',
+        recipe_filter='WHERE recipe.id = :recipe_id'
+    )), {'recipe_id': recipe_id})
+
+def index_recipes(recipe_ids):
+    """(Re)index a batch of flushed recipes with two statements"""
+    params = {'recipe_ids': list(recipe_ids)}
+    db.session.execute(
+        text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN :recipe_ids").bindparams(
+            bindparam('recipe_ids', expanding=True)
+        ),
+        params
+    )
+    db.session.execute(text(_INSERT_SQL.format(
+        ingredient_filter='WHERE recipe_id IN :recipe_ids',
+        recipe_filter='WHERE recipe.id IN :recipe_ids'
+    )).bindparams(bindparam('recipe_ids', expanding=True)), params)
+
+def remove_recipe_from_index(recipe_id):
+    db.session.execute(
+        text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :recipe_id"),
+        {'recipe_id': recipe_id}
+    )
+
+def remove_recipes_from_index(recipe_ids):
+    """Remove a batch of recipes from the index with one statement"""
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return
+    db.session.execute(
+        text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN :recipe_ids").bindparams(
+            bindparam('recipe_ids', expanding=True)
+        ),
+        {'recipe_ids': recipe_ids}
+    )
+
+def build_match_query(search):
+    """Turn free text into an FTS5 query.
+
+    Every word must match (implicit AND) and is treated as a prefix, so
+    "chick cur" finds "Chicken Curry". Returns None if there are no words.
+    """
+    terms = _TOKEN_RE.findall(search.lower())
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"*' for term in terms)
+
+def search_matches(match_query):
+    """Subquery of (recipe_id, rank) for an FTS5 query, best match first.
+
+    rank is the bm25 score, where lower is better.
+    """
+    return text(
+        f"SELECT rowid AS recipe_id, bm25({SEARCH_TABLE}, {BM25_WEIGHTS}) AS rank "
+        f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :match_query"
+    ).bindparams(match_query=match_query).columns(
+        recipe_id=db.Integer,
+        rank=db.Float
+    ).subquery('search_matches')
@@ -0,0 +1,130 @@
+"""
+Row-tuple serializers for collection responses.
+
+A RowSchema is the field list of one view of a model: the output names and
+the columns they are read from, in order. Collections are selected as plain
+tuples with schema.columns, so no ORM instances are built and nothing is
+loaded through relationships, and each row becomes a dict with a single
+zip. Which fields hold dates is worked out from the column types once, when
+the schema is defined, instead of checking every value.
+
+Child rows (a recipe's ingredients, a shopping list's items) are read with
+one query for all parents, whose ids are bound as a single JSON array, and
+attached to their parent's dict.
+"""
+import json
+from datetime import date
+from sqlalchemy import func, select
+from src.models.user import db
+from src.models.recipe import Category, Recipe, Ingredient, MealPlan, ShoppingList, ShoppingListItem
+
+def _is_date(column):
+    try:
+        return issubclass(column.type.python_type, date)
+    except NotImplementedError:
+        return False
+
+class RowSchema:
+    """Serialize row tuples into dicts with the given {name: column} fields"""
+
+    def __init__(self, fields):
+        self.fields = dict(fields)
+        self.names = tuple(self.fields)
+        self.columns = tuple(self.fields.values())
+        self._dates = tuple(name for name, column in self.fields.items() if _is_date(column))
+
+    def only(self, names):
+        """Return a schema with just the named fields, in the order given"""
+        return RowSchema({name: self.fields[name] for name in names})
+
+    def serialize(self, row):
+        """Return row as a dict; values past the schema's fields are ignored"""
+        data = dict(zip(self.names, row))
+        for name in self._dates:
+            value = data[name]
+            if value is not None:
+                data[name] = value.isoformat()
+        return data
+
+    def serialize_all(self, rows):
+        return [self.serialize(row) for row in rows]
+
+def attach_children(parents, parent_ids, name, schema, parent_field):
+    """Add each parent's child rows to it as a list under name.
+
+    parents are serialized dicts and parent_ids their ids, in the same
+    order. Children are read with schema, whose parent_field column points
+    at the parent, and keep the order of their ids.
+    """
+    children_by_parent = {}
+    for parent, parent_id in zip(parents, parent_ids):
+        parent[name] = children_by_parent[parent_id] = []
+    if not children_by_parent:
+        return
+    # One parameter however many parents there are, so the statement stays
+    # under SQLite's variable limit and the query count stays constant
+    ids = func.json_each(json.dumps(list(children_by_parent))).table_valued('value')
+    parent_column = schema.fields[parent_field]
+    rows = db.session.execute(
+        select(*schema.columns).where(
+            parent_column.in_(select(ids.c.value))
+        ).order_by(parent_column, schema.fields['id'])
+    )
+    for child in map(schema.serialize, rows):
+        children_by_parent[child[parent_field]].append(child)
+
+# Recipe.to_dict() without ingredients, which are attached as children, and
+# image, which is picked from the image variants by the route
+RECIPE_SCHEMA = RowSchema({
+    'id': Recipe.id,
+    'name': Recipe.name,
+    'description': Recipe.description,
+    'instructions': Recipe.instructions,
+    'prep_time': Recipe.prep_time,
+    'cook_time': Recipe.cook_time,
+    'servings': Recipe.servings,
+    'category_id': Recipe.category_id,
+    'category_name': Category.name,
+    'image_path': Recipe.image_path,
+    'image_status': Recipe.image_status,
+    'created_at': Recipe.created_at,
+    'updated_at': Recipe.updated_at
+})
+
+INGREDIENT_SCHEMA = RowSchema({
+    'id': Ingredient.id,
+    'recipe_id': Ingredient.recipe_id,
+    'name': Ingredient.name,
+    'quantity': Ingredient.quantity,
+    'unit': Ingredient.unit,
+    'notes': Ingredient.notes
+})
+
+MEAL_PLAN_SCHEMA = RowSchema({
+    'id': MealPlan.id,
+    'name': MealPlan.name,
+    'date': MealPlan.date,
+    'meal_category_id': MealPlan.meal_category_id,
+    'meal_category_name': Category.name,
+    'recipe_id': MealPlan.recipe_id,
+    'recipe_name': Recipe.name,
+    'people_count': MealPlan.people_count,
+    'created_at': MealPlan.created_at
+})
+
+# ShoppingList.to_dict() without items, which are attached as children
+SHOPPING_LIST_SCHEMA = RowSchema({
+    'id': ShoppingList.id,
+    'name': ShoppingList.name,
+    'created_at': ShoppingList.created_at,
+    'exported_at': ShoppingList.exported_at
+})
+
+SHOPPING_LIST_ITEM_SCHEMA = RowSchema({
+    'id': ShoppingListItem.id,
+    'shopping_list_id': ShoppingListItem.shopping_list_id,
+    'ingredient_name': ShoppingListItem.ingredient_name,
+    'quantity': ShoppingListItem.quantity,
+    'unit': ShoppingListItem.unit,
+    'checked': ShoppingListItem.checked
+})
@@ -0,0 +1,49 @@
+"""
+Shopping-list totals computed in SQL.
+
+Meal plans, their recipes and ingredients are joined in one SELECT that sums
+each ingredient's canonical quantity scaled by people_count / servings,
+grouped by normalized ingredient name and canonical unit. Only the grouped
+totals come back to Python, one row per shopping-list line.
+"""
+import json
+from sqlalchemy import func, select, distinct
+from src.models.user import db
+from src.models.recipe import MealPlan, Recipe, Ingredient
+from src.models.units import display_quantity
+
+def aggregate_ingredients(plan_condition):
+    """Total the ingredients of the meal plans matching plan_condition.
+
+    Returns (plan_count, lines) where plan_count is the number of matching
+    meal plans and lines is a list of (ingredient name, quantity, unit)
+    ready to store as shopping-list items.
+    """
+    plan_count = select(func.count(MealPlan.id)).where(plan_condition).scalar_subquery()
+    name_key = func.lower(func.trim(Ingredient.name))
+    canonical_unit = func.coalesce(Ingredient.canonical_unit, func.lower(func.trim(Ingredient.unit)))
+    stmt = select(
+        plan_count,
+        name_key,
+        canonical_unit,
+        func.sum(
+            func.coalesce(Ingredient.canonical_quantity, Ingredient.quantity)
+            * MealPlan.people_count * 1.0 / Recipe.servings
+        ),
+        func.json_group_array(distinct(Ingredient.unit))
+    ).select_from(MealPlan).join(
+        Recipe, MealPlan.recipe_id == Recipe.id
+    ).outerjoin(
+        # Outer join keeps a row (with a NULL name) for plans without ingredients
+        Ingredient, Ingredient.recipe_id == Recipe.id
+    ).where(plan_condition).group_by(name_key, canonical_unit).order_by(name_key, canonical_unit)
+
+    count = 0
+    lines = []
+    for count, name, unit, total, source_units in db.session.execute(stmt):
+        # No ingredients, or a recipe with no servings to scale by
+        if name is None or total is None:
+            continue
+        quantity, display_unit = display_quantity(total, unit, set(json.loads(source_units)))
+        lines.append((name.title(), round(quantity, 2), display_unit))
+    return count, lines
@@ -0,0 +1,224 @@
+"""
+Rendering of shopping lists into downloadable documents.
+
+Styles are built once at import and items are read as plain tuples, so a
+render only pays for laying out the rows. Table rows get a fixed height:
+every cell is a single line of text, and letting reportlab measure each
+cell to find the height was most of the cost for long lists.
+
+Excel workbooks use openpyxl's write-only mode. Rows are streamed from one
+query over all the exported lists and written straight to the sheet's
+temporary file, and formatting comes from a few named styles instead of
+per-cell Font objects, so memory stays flat however many items there are.
+
+reportlab and openpyxl take longer to import than the rest of the app, so
+they are imported on the first export rather than when the app starts.
+"""
+import io
+import re
+from datetime import datetime
+from functools import cache
+from src.models.recipe import db, ShoppingListItem
+
+FETCH_BATCH_SIZE = 1000
+
+# Points per inch, as in reportlab.lib.units
+INCH = 72
+
+ITEM_COLUMN_WIDTHS = [0.5*INCH, 3*INCH, 1*INCH, 1*INCH]
+
+# The heights reportlab computes for the single-line header and item rows
+HEADER_ROW_HEIGHT = 27
+ITEM_ROW_HEIGHT = 18
+
+# Named styles are added to each workbook, cells refer to them by name
+EXCEL_STYLES = {
+    'list_title': {'font': {'size': 16, 'bold': True}},
+    'list_date': {'font': {'size': 10}},
+    'list_header': {'font': {'bold': True}, 'alignment': {'horizontal': 'center'}},
+}
+
+EXCEL_LAYOUTS = ('sheets', 'consolidated')
+
+EXCEL_COLUMN_WIDTHS = {'A': 10, 'B': 30, 'C': 12, 'D': 12}
+CONSOLIDATED_COLUMN_WIDTHS = {'A': 30, 'B': 10, 'C': 30, 'D': 12, 'E': 12}
+
+# Characters Excel does not allow in sheet titles, which are capped at 31
+SHEET_TITLE_INVALID = re.compile(r'[\\/?*\[\]:]')
+SHEET_TITLE_LENGTH = 31
+
+def load_items(list_id):
+    """Return (checked, ingredient name, quantity, unit) tuples for a list"""
+    return db.session.query(
+        ShoppingListItem.checked,
+        ShoppingListItem.ingredient_name,
+        ShoppingListItem.quantity,
+        ShoppingListItem.unit
+    ).filter(ShoppingListItem.shopping_list_id == list_id).order_by(ShoppingListItem.id).all()
+
+def _single_line(value):
+    return ' '.join(str(value).split())
+
+@cache
+def _pdf_styles():
+    """Return the paragraph and table styles, built on the first render"""
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import TableStyle
+
+    styles = getSampleStyleSheet()
+    return {
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=18,
+            spaceAfter=30,
+            alignment=1  # Center alignment
+        ),
+        'date': ParagraphStyle(
+            'DateStyle',
+            parent=styles['Normal'],
+            fontSize=10,
+            alignment=1
+        ),
+        'empty': styles['Normal'],
+        'items': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ])
+    }
+
+def render_pdf(name, items):
+    """Render a shopping list to PDF bytes"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
+
+    styles = _pdf_styles()
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    story = [
+        Paragraph(f"Shopping List: {name}", styles['title']),
+        Spacer(1, 12),
+        Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M')}", styles['date']),
+        Spacer(1, 20)
+    ]
+
+    if items:
+        table_data = [['☐', 'Item', 'Quantity', 'Unit']]
+        for checked, ingredient_name, quantity, unit in items:
+            table_data.append([
+                '☑' if checked else '☐',
+                _single_line(ingredient_name),
+                str(quantity),
+                _single_line(unit)
+            ])
+        table = Table(
+            table_data,
+            colWidths=ITEM_COLUMN_WIDTHS,
+            rowHeights=[HEADER_ROW_HEIGHT] + [ITEM_ROW_HEIGHT] * len(items)
+        )
+        table.setStyle(styles['items'])
+        story.append(table)
+    else:
+        story.append(Paragraph("No items in this shopping list.", styles['empty']))
+
+    doc.build(story)
+    return buffer.getvalue()
+
+def iter_items(list_ids):
+    """Return (list id, checked, ingredient name, quantity, unit) rows, fetched in batches"""
+    stmt = db.select(
+        ShoppingListItem.shopping_list_id,
+        ShoppingListItem.checked,
+        ShoppingListItem.ingredient_name,
+        ShoppingListItem.quantity,
+        ShoppingListItem.unit
+    ).where(
+        ShoppingListItem.shopping_list_id.in_(list_ids)
+    ).order_by(ShoppingListItem.shopping_list_id, ShoppingListItem.id)
+    return db.session.execute(stmt.execution_options(yield_per=FETCH_BATCH_SIZE))
+
+def _new_workbook():
+    from openpyxl import Workbook
+    from openpyxl.styles import Alignment, Font, NamedStyle
+
+    workbook = Workbook(write_only=True)
+    for name, attributes in EXCEL_STYLES.items():
+        workbook.add_named_style(NamedStyle(
+            name,
+            font=Font(**attributes['font']),
+            alignment=Alignment(**attributes.get('alignment', {}))
+        ))
+    return workbook
+
+def _styled(sheet, value, style):
+    from openpyxl.cell import WriteOnlyCell
+
+    cell = WriteOnlyCell(sheet, value=value)
+    cell.style = style
+    return cell
+
+def _add_sheet(workbook, title, column_widths, used_titles):
+    title = _single_line(SHEET_TITLE_INVALID.sub(' ', title))[:SHEET_TITLE_LENGTH].rstrip() or 'Shopping List'
+    base, number = title, 2
+    while title.lower() in used_titles:
+        suffix = f' ({number})'
+        title = base[:SHEET_TITLE_LENGTH - len(suffix)] + suffix
+        number += 1
+    used_titles.add(title.lower())
+
+    sheet = workbook.create_sheet(title)
+    # Column widths must be set before the first row is written
+    for column, width in column_widths.items():
+        sheet.column_dimensions[column].width = width
+    return sheet
+
+def _write_list_sheets(workbook, lists, rows, generated_on):
+    used_titles = set()
+    row = next(rows, None)
+    for list_id, name in lists:
+        sheet = _add_sheet(workbook, name, EXCEL_COLUMN_WIDTHS, used_titles)
+        sheet.append([_styled(sheet, f"Shopping List: {name}", 'list_title')])
+        sheet.append([_styled(sheet, generated_on, 'list_date')])
+        sheet.append([])
+        sheet.append([_styled(sheet, header, 'list_header') for header in ('Checked', 'Item', 'Quantity', 'Unit')])
+        while row is not None and row[0] == list_id:
+            sheet.append(['✓' if row[1] else '', row[2], row[3], row[4]])
+            row = next(rows, None)
+
+def _write_consolidated_sheet(workbook, lists, rows, generated_on):
+    names = dict(lists)
+    sheet = _add_sheet(workbook, 'Shopping Lists', CONSOLIDATED_COLUMN_WIDTHS, set())
+    sheet.append([_styled(sheet, f"Shopping Lists ({len(lists)})", 'list_title')])
+    sheet.append([_styled(sheet, generated_on, 'list_date')])
+    sheet.append([])
+    sheet.append([_styled(sheet, header, 'list_header') for header in ('List', 'Checked', 'Item', 'Quantity', 'Unit')])
+    for list_id, checked, ingredient_name, quantity, unit in rows:
+        sheet.append([names[list_id], '✓' if checked else '', ingredient_name, quantity, unit])
+
+def write_excel(lists, file, layout='sheets'):
+    """Write an Excel workbook of shopping lists to file.
+
+    lists is a sequence of (list id, name). The 'sheets' layout gives each
+    list its own sheet, in list id order; 'consolidated' puts every item on
+    one sheet with the list name in the first column.
+    """
+    if layout not in EXCEL_LAYOUTS:
+        raise ValueError(f'Unknown layout: {layout}')
+    lists = list(lists)
+    workbook = _new_workbook()
+    generated_on = f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+    rows = iter(iter_items([list_id for list_id, _ in lists]))
+    if layout == 'sheets':
+        # Items come back grouped by list id, so lists must be in that order
+        lists.sort(key=lambda entry: entry[0])
+        _write_list_sheets(workbook, lists, rows, generated_on)
+    else:
+        _write_consolidated_sheet(workbook, lists, rows, generated_on)
+    workbook.save(file)
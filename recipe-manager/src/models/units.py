@@ -0,0 +1,93 @@
+"""
+Unit registry used to add up ingredient quantities written in different units.
+
+Every known unit belongs to a dimension (mass, volume or count) and has a
+factor to that dimension's base unit (grams, millilitres, pieces). Units
+outside the registry ("pinch", "cloves", ...) are kept as their own
+dimension, so they still sum with themselves but never with anything else.
+"""
+
+MASS = 'mass'
+VOLUME = 'volume'
+COUNT = 'count'
+
+BASE_UNITS = {MASS: 'g', VOLUME: 'ml', COUNT: 'pieces'}
+
+# canonical name -> (dimension, factor to the base unit, aliases)
+UNIT_DEFINITIONS = {
+    'mg': (MASS, 0.001, ('milligram', 'milligrams', 'milligramme', 'milligrammes')),
+    'g': (MASS, 1.0, ('gram', 'grams', 'gramme', 'grammes', 'gr', 'grs')),
+    'kg': (MASS, 1000.0, ('kilogram', 'kilograms', 'kilogramme', 'kilogrammes', 'kilo', 'kilos', 'kgs')),
+    'oz': (MASS, 28.349523125, ('ounce', 'ounces')),
+    'lb': (MASS, 453.59237, ('lbs', 'pound', 'pounds')),
+    'ml': (VOLUME, 1.0, ('milliliter', 'milliliters', 'millilitre', 'millilitres', 'mls')),
+    'cl': (VOLUME, 10.0, ('centiliter', 'centiliters', 'centilitre', 'centilitres')),
+    'dl': (VOLUME, 100.0, ('deciliter', 'deciliters', 'decilitre', 'decilitres')),
+    'l': (VOLUME, 1000.0, ('liter', 'liters', 'litre', 'litres', 'ltr')),
+    'tsp': (VOLUME, 4.92892159375, ('teaspoon', 'teaspoons', 'tsps')),
+    'tbsp': (VOLUME, 14.78676478125, ('tablespoon', 'tablespoons', 'tbsps', 'tbs', 'tbl')),
+    'fl oz': (VOLUME, 29.5735295625, ('fluid ounce', 'fluid ounces', 'floz')),
+    'cup': (VOLUME, 236.5882365, ('cups',)),
+    'pint': (VOLUME, 473.176473, ('pints', 'pt')),
+    'quart': (VOLUME, 946.352946, ('quarts', 'qt')),
+    'gallon': (VOLUME, 3785.411784, ('gallons', 'gal')),
+    'pieces': (COUNT, 1.0, ('piece', 'pc', 'pcs', 'each', 'ea', 'whole', 'unit', 'units', 'item', 'items')),
+    'dozen': (COUNT, 12.0, ('dozens', 'doz')),
+}
+
+# Once a total reaches a unit's threshold (in base units) it is shown in
+# that unit; thresholds are checked from the largest down
+DISPLAY_UNITS = {
+    MASS: ((1000.0, 'kg'), (0.0, 'g')),
+    VOLUME: ((1000.0, 'l'), (0.0, 'ml')),
+    COUNT: ((0.0, 'pieces'),),
+}
+
+def _build_aliases():
+    aliases = {}
+    for name, (dimension, factor, names) in UNIT_DEFINITIONS.items():
+        for alias in (name,) + names:
+            aliases[alias] = (name, dimension, factor)
+    return aliases
+
+UNIT_ALIASES = _build_aliases()
+
+def clean_unit(unit):
+    """Lowercase a unit string, drop dots and collapse whitespace"""
+    return ' '.join((unit or '').lower().replace('.', ' ').split())
+
+def lookup_unit(unit):
+    """Return (canonical name, dimension, factor) for a unit, or None if unknown"""
+    return UNIT_ALIASES.get(clean_unit(unit))
+
+def to_canonical(quantity, unit):
+    """Convert a quantity to (quantity in base units, base unit).
+
+    Unknown units are returned unconverted under their cleaned name.
+    """
+    known = lookup_unit(unit)
+    if known is None:
+        return quantity, clean_unit(unit)
+    _, dimension, factor = known
+    return quantity * factor, BASE_UNITS[dimension]
+
+def display_quantity(canonical_quantity, canonical_unit, source_units=()):
+    """Pick a readable (quantity, unit) for a total in canonical units.
+
+    A total whose ingredients all used the same unit is shown in that unit;
+    otherwise in the largest display unit it reaches.
+    """
+    dimension = next((dim for dim, base in BASE_UNITS.items() if base == canonical_unit), None)
+    if dimension is None:
+        return canonical_quantity, canonical_unit
+
+    known_units = {lookup_unit(unit): unit for unit in sorted(source_units, reverse=True)}
+    if len(known_units) == 1:
+        (known, unit), = known_units.items()
+        if known is not None and known[1] == dimension:
+            return canonical_quantity / known[2], unit
+
+    for threshold, unit in DISPLAY_UNITS[dimension]:
+        if canonical_quantity >= threshold:
+            return canonical_quantity / UNIT_DEFINITIONS[unit][1], unit
+    return canonical_quantity, canonical_unit
@@ -0,0 +1,91 @@
+"""
+Conditional GET support and an in-process cache of serialized responses.
+
+Read endpoints compute a cheap version for the data they return (usually
+updated_at values from a single aggregate query). The version becomes a
+strong ETag, so a matching If-None-Match is answered with 304 before any
+serialization, and it is part of the cache key so a stale body can never
+be served. Write routes also invalidate their entries explicitly to keep
+the cache from filling up with dead versions. Large bodies are gzipped for
+clients that accept it, and the compressed copy is cached next to the body.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from flask import current_app, request
+from src.json_response import GZIP_ETAG_SUFFIX, compress, encode_json, json_response, wants_gzip
+
+DEFAULT_MAX_ENTRIES = 1024
+
+class ResponseCache:
+    """LRU of serialized JSON bodies keyed by (endpoint, params, version)"""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def set(self, key, body):
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, endpoint, *params):
+        """Drop every entry for endpoint, or only those for the given params"""
+        with self._lock:
+            for key in [key for key in self._entries
+                        if key[0] == endpoint and (not params or key[1] == params)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+response_cache = ResponseCache()
+
+def make_etag(endpoint, params, version):
+    raw = repr((endpoint, params, version)).encode()
+    return hashlib.sha1(raw).hexdigest()
+
+def cached_json_response(endpoint, params, version, build):
+    """Return a JSON response for build(), honouring If-None-Match.
+
+    params must be a tuple identifying the request within the endpoint and
+    version anything hashable that changes whenever the output would.
+    build() is only called when neither the client nor the cache has the
+    current version.
+    """
+    etag = make_etag(endpoint, params, version)
+    for current in (etag, etag + GZIP_ETAG_SUFFIX):
+        if request.if_none_match.contains(current):
+            response = current_app.response_class(status=304)
+            response.set_etag(current)
+            return response
+
+    key = (endpoint, params, version)
+    body = response_cache.get(key)
+    if body is None:
+        body = encode_json(build())
+        response_cache.set(key, body)
+
+    gzip_body = None
+    if wants_gzip(body):
+        # Same endpoint and params, so invalidate() drops it with the body
+        gzip_key = key + ('gzip',)
+        gzip_body = response_cache.get(gzip_key)
+        if gzip_body is None:
+            gzip_body = compress(body)
+            response_cache.set(gzip_key, gzip_body)
+    return json_response(body, etag=etag, gzip_body=gzip_body)
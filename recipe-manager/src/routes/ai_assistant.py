@@ -1,9 +1,12 @@
 from flask import Blueprint, request, jsonify
-from src.models.recipe import db, Recipe, Ingredient, Category
+from src.models.ingredient_index import ingredient_index
 import random
 
 ai_assistant_bp = Blueprint('ai_assistant', __name__)
 
+# Maximum number of existing recipes returned as suggestions
+MAX_RECIPE_MATCHES = 5
+
 # Sample recipe suggestions and cooking tips
 RECIPE_SUGGESTIONS = {
     'chicken': [
@@ -80,28 +83,21 @@ def get_recipe_suggestions():
     ingredients = [ingredient.lower().strip() for ingredient in data['ingredients']]
     suggestions = []
     
-    # Find matching recipes from database
-    db_recipes = []
-    for ingredient in ingredients:
-        recipes = Recipe.query.join(Ingredient).filter(
-            Ingredient.name.ilike(f'%{ingredient}%')
-        ).distinct().limit(3).all()
-        db_recipes.extend(recipes)
-    
-    # Remove duplicates and add to suggestions
-    seen_recipes = set()
-    for recipe in db_recipes:
-        if recipe.id not in seen_recipes:
-            suggestions.append({
-                'type': 'existing_recipe',
-                'id': recipe.id,
-                'name': recipe.name,
-                'description': recipe.description,
-                'prep_time': recipe.prep_time,
-                'cook_time': recipe.cook_time,
-                'servings': recipe.servings
-            })
-            seen_recipes.add(recipe.id)
+    # Rank existing recipes by how much of each one the pantry covers
+    for match in ingredient_index.match(ingredients, limit=MAX_RECIPE_MATCHES):
+        suggestions.append({
+            'type': 'existing_recipe',
+            'id': match['id'],
+            'name': match['name'],
+            'description': match['description'],
+            'prep_time': match['prep_time'],
+            'cook_time': match['cook_time'],
+            'servings': match['servings'],
+            'coverage': round(match['coverage'], 2),
+            'matched_count': match['matched_count'],
+            'ingredient_count': match['ingredient_count'],
+            'missing_ingredients': match['missing_ingredients']
+        })
     
     # Add general suggestions based on ingredients
     for ingredient in ingredients:
@@ -1,5 +1,8 @@
 from flask import Blueprint, request, jsonify
 from src.models.recipe import db, Category
+from src.response_cache import cached_json_response, response_cache
+from src.models.recipe_deletion import release_recipes
+from sqlalchemy import func
 
 categories_bp = Blueprint('categories', __name__)
 
@@ -8,12 +11,17 @@ def get_categories():
     """Get all categories, optionally filtered by type"""
     category_type = request.args.get('type')  # 'recipe' or 'meal'
     
+    # Deletes change the count, inserts and updates the newest updated_at
+    version_query = db.session.query(func.count(Category.id), func.max(Category.updated_at))
     query = Category.query
     if category_type:
+        version_query = version_query.filter(Category.type == category_type)
         query = query.filter_by(type=category_type)
     
-    categories = query.order_by(Category.name).all()
-    return jsonify([category.to_dict() for category in categories])
+    return cached_json_response(
+        'categories', (category_type,), tuple(version_query.one()),
+        lambda: [category.to_dict() for category in query.order_by(Category.name).all()]
+    )
 
 @categories_bp.route('/categories', methods=['POST'])
 def create_category():
@@ -39,6 +47,7 @@ def create_category():
     try:
         db.session.add(category)
         db.session.commit()
+        response_cache.invalidate('categories')
         return jsonify(category.to_dict()), 201
     except Exception as e:
         db.session.rollback()
@@ -72,6 +81,8 @@ def update_category(category_id):
     
     try:
         db.session.commit()
+        # Category names appear in recipe and meal plan responses too
+        response_cache.clear()
         return jsonify(category.to_dict())
     except Exception as e:
         db.session.rollback()
@@ -83,8 +94,11 @@ def delete_category(category_id):
     category = Category.query.get_or_404(category_id)
     
     try:
+        # The category's recipes are deleted with it by the cascade
+        release_recipes(category.recipes)
         db.session.delete(category)
         db.session.commit()
+        response_cache.clear()
         return jsonify({'message': 'Category deleted successfully'})
     except Exception as e:
         db.session.rollback()
@@ -1,65 +1,156 @@
 from flask import Blueprint, request, jsonify
-from src.models.recipe import db, MealPlan, Recipe, Category
+from src.models.recipe import db, MealPlan, Recipe, Ingredient, Category
+from src.response_cache import cached_json_response, response_cache
+from src.json_response import encode_json, json_response
+from src.models.serializers import MEAL_PLAN_SCHEMA
 from datetime import datetime, timedelta
-from sqlalchemy import and_
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
 
 meal_plans_bp = Blueprint('meal_plans', __name__)
 
+MAX_CALENDAR_DAYS = 366
+MAX_BULK_PLANS = 5000
+ON_CONFLICT_MODES = ('error', 'skip', 'replace')
+
 @meal_plans_bp.route('/meal-plans', methods=['GET'])
 def get_meal_plans():
     """Get meal plans with optional date filtering"""
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    query = MealPlan.query
+    query = select(*MEAL_PLAN_SCHEMA.columns).outerjoin(
+        Category, MealPlan.meal_category_id == Category.id
+    ).outerjoin(Recipe, MealPlan.recipe_id == Recipe.id)
     
     if start_date:
         try:
             start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-            query = query.filter(MealPlan.date >= start_date)
+            query = query.where(MealPlan.date >= start_date)
         except ValueError:
             return jsonify({'error': 'Invalid start_date format. Use YYYY-MM-DD'}), 400
     
     if end_date:
         try:
             end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-            query = query.filter(MealPlan.date <= end_date)
+            query = query.where(MealPlan.date <= end_date)
         except ValueError:
             return jsonify({'error': 'Invalid end_date format. Use YYYY-MM-DD'}), 400
     
-    meal_plans = query.order_by(MealPlan.date, MealPlan.meal_category_id).all()
-    return jsonify([meal_plan.to_dict() for meal_plan in meal_plans])
+    rows = db.session.execute(query.order_by(MealPlan.date, MealPlan.meal_category_id))
+    return json_response(encode_json(MEAL_PLAN_SCHEMA.serialize_all(rows)))
+
+def range_version(start_date, end_date):
+    """Version of the plans in a date range for ETags and the response cache.
+    
+    The range changes when one of its plans, or a recipe or category they
+    reference, is added, removed or updated.
+    """
+    return tuple(db.session.query(
+        func.count(MealPlan.id),
+        func.max(MealPlan.updated_at),
+        func.max(Recipe.updated_at),
+        func.max(Category.updated_at)
+    ).outerjoin(Recipe, MealPlan.recipe_id == Recipe.id).outerjoin(
+        Category, MealPlan.meal_category_id == Category.id
+    ).filter(MealPlan.date >= start_date, MealPlan.date <= end_date).one())
+
+def load_calendar(start_date, end_date):
+    """Load the plans in a date range grouped by date and meal category.
+    
+    Plans, category and recipe names and the per-day meal count and headcount
+    all come from one joined query; the day totals are window aggregates.
+    Returns {date: {'meal_count', 'people_count', 'meal_plans': {category: plan}}}
+    with plans serialized by MEAL_PLAN_SCHEMA.
+    """
+    day = MealPlan.date
+    rows = db.session.execute(select(
+        *MEAL_PLAN_SCHEMA.columns,
+        func.count(MealPlan.id).over(partition_by=day),
+        func.sum(MealPlan.people_count).over(partition_by=day)
+    ).outerjoin(Recipe, MealPlan.recipe_id == Recipe.id).outerjoin(
+        Category, MealPlan.meal_category_id == Category.id
+    ).where(MealPlan.date >= start_date, MealPlan.date <= end_date).order_by(
+        MealPlan.date, MealPlan.meal_category_id
+    ))
+    
+    days = {}
+    for row in rows:
+        plan = MEAL_PLAN_SCHEMA.serialize(row)
+        meal_count, total_people = row[-2:]
+        if plan['date'] not in days:
+            days[plan['date']] = {'meal_count': meal_count, 'people_count': total_people or 0, 'meal_plans': {}}
+        days[plan['date']]['meal_plans'][plan['meal_category_name'] or 'Uncategorized'] = plan
+    return days
 
 @meal_plans_bp.route('/meal-plans/week/<date>', methods=['GET'])
 def get_week_meal_plans(date):
     """Get meal plans for a specific week"""
     try:
         target_date = datetime.strptime(date, '%Y-%m-%d').date()
-        # Get Monday of the week
-        monday = target_date - timedelta(days=target_date.weekday())
-        sunday = monday + timedelta(days=6)
-        
-        meal_plans = MealPlan.query.filter(
-            and_(MealPlan.date >= monday, MealPlan.date <= sunday)
-        ).order_by(MealPlan.date, MealPlan.meal_category_id).all()
-        
-        # Group by date and meal category
-        week_data = {}
-        for meal_plan in meal_plans:
-            date_str = meal_plan.date.isoformat()
-            if date_str not in week_data:
-                week_data[date_str] = {}
-            
-            category_name = meal_plan.meal_category.name if meal_plan.meal_category else 'Uncategorized'
-            week_data[date_str][category_name] = meal_plan.to_dict()
-        
-        return jsonify({
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    
+    # Get Monday of the week
+    monday = target_date - timedelta(days=target_date.weekday())
+    sunday = monday + timedelta(days=6)
+    
+    def build_week():
+        days = load_calendar(monday, sunday)
+        return {
             'week_start': monday.isoformat(),
             'week_end': sunday.isoformat(),
-            'meal_plans': week_data
-        })
+            'meal_plans': {date_str: day['meal_plans'] for date_str, day in days.items()}
+        }
+    
+    return cached_json_response(
+        'meal_plans', ('week', monday.isoformat()), range_version(monday, sunday), build_week
+    )
+
+@meal_plans_bp.route('/meal-plans/calendar', methods=['GET'])
+def get_meal_plan_calendar():
+    """Get meal plans for a week, a month or an arbitrary date range.
+    
+    Either pass start_date and end_date, or a date with view=week (Monday to
+    Sunday) or view=month. Plans are grouped by date and meal category, with
+    a meal count and total headcount for each day.
+    """
+    try:
+        if 'start_date' in request.args:
+            start_date = datetime.strptime(request.args['start_date'], '%Y-%m-%d').date()
+            end_date = datetime.strptime(request.args.get('end_date', request.args['start_date']), '%Y-%m-%d').date()
+        else:
+            target_date = datetime.strptime(request.args.get('date', ''), '%Y-%m-%d').date()
+            view = request.args.get('view', 'month')
+            if view == 'week':
+                start_date = target_date - timedelta(days=target_date.weekday())
+                end_date = start_date + timedelta(days=6)
+            elif view == 'month':
+                start_date = target_date.replace(day=1)
+                next_month = (start_date + timedelta(days=31)).replace(day=1)
+                end_date = next_month - timedelta(days=1)
+            else:
+                return jsonify({'error': 'view must be week or month'}), 400
     except ValueError:
-        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+        return jsonify({'error': 'Pass start_date and end_date, or date and view, as YYYY-MM-DD'}), 400
+    
+    if end_date < start_date:
+        return jsonify({'error': 'end_date must not be before start_date'}), 400
+    if (end_date - start_date).days >= MAX_CALENDAR_DAYS:
+        return jsonify({'error': f'Date range cannot exceed {MAX_CALENDAR_DAYS} days'}), 400
+    
+    def build_calendar():
+        return {
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'days': load_calendar(start_date, end_date)
+        }
+    
+    return cached_json_response(
+        'meal_plans', ('calendar', start_date.isoformat(), end_date.isoformat()),
+        range_version(start_date, end_date), build_calendar
+    )
 
 @meal_plans_bp.route('/meal-plans', methods=['POST'])
 def create_meal_plan():
@@ -104,11 +195,191 @@ def create_meal_plan():
     try:
         db.session.add(meal_plan)
         db.session.commit()
+        response_cache.invalidate('meal_plans')
         return jsonify(meal_plan.to_dict()), 201
+    except IntegrityError:
+        # Another request took the slot since the check above
+        db.session.rollback()
+        return jsonify({'error': 'Meal plan already exists for this date and category'}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to create meal plan'}), 500
 
+def find_conflicts(slots):
+    """List the (date, meal_category_id) slots that already have a meal plan"""
+    existing = {
+        (plan_date, category_id): plan_id
+        for plan_id, plan_date, category_id in db.session.query(
+            MealPlan.id, MealPlan.date, MealPlan.meal_category_id
+        ).filter(
+            MealPlan.date >= min(slots)[0], MealPlan.date <= max(slots)[0],
+            MealPlan.meal_category_id.in_({category_id for _, category_id in slots})
+        )
+    }
+    return [
+        {'date': plan_date.isoformat(), 'meal_category_id': category_id, 'meal_plan_id': existing[(plan_date, category_id)]}
+        for plan_date, category_id in slots if (plan_date, category_id) in existing
+    ]
+
+def conflict_response(conflicts):
+    """409 response listing the slots that are already taken"""
+    return jsonify({'error': 'Meal plans already exist for some dates and categories', 'conflicts': conflicts}), 409
+
+def insert_meal_plans(plans, on_conflict):
+    """Insert plan dicts in one transaction and return the JSON response.
+    
+    Slots already taken are found with one range query over the plans'
+    dates. on_conflict decides what happens to them: 'error' rejects the
+    whole request with 409, 'skip' keeps the existing plans and 'replace'
+    overwrites them in place through an upsert on the (date,
+    meal_category_id) unique index.
+    """
+    if on_conflict not in ON_CONFLICT_MODES:
+        return jsonify({'error': f"on_conflict must be one of {', '.join(ON_CONFLICT_MODES)}"}), 400
+    
+    slots = [(plan['date'], plan['meal_category_id']) for plan in plans]
+    if len(set(slots)) != len(slots):
+        return jsonify({'error': 'Several plans share a date and meal category'}), 400
+    
+    conflicts = find_conflicts(slots)
+    if conflicts and on_conflict == 'error':
+        return conflict_response(conflicts)
+    
+    now = datetime.utcnow()
+    for plan in plans:
+        plan['created_at'] = now
+        plan['updated_at'] = now
+    stmt = sqlite_insert(MealPlan.__table__)
+    if on_conflict == 'skip':
+        stmt = stmt.on_conflict_do_nothing(index_elements=['date', 'meal_category_id'])
+    elif on_conflict == 'replace':
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['date', 'meal_category_id'],
+            set_={column: stmt.excluded[column] for column in ('name', 'recipe_id', 'people_count', 'updated_at')}
+        )
+    
+    try:
+        db.session.execute(stmt, plans)
+        db.session.commit()
+        response_cache.invalidate('meal_plans')
+    except IntegrityError:
+        # Another request took a slot since the check above
+        db.session.rollback()
+        return conflict_response(find_conflicts(slots))
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to create meal plans'}), 500
+    
+    return jsonify({
+        'created': len(plans) - len(conflicts),
+        'replaced': len(conflicts) if on_conflict == 'replace' else 0,
+        'skipped': len(conflicts) if on_conflict == 'skip' else 0,
+        'conflicts': conflicts
+    }), 201
+
+@meal_plans_bp.route('/meal-plans/bulk', methods=['POST'])
+def bulk_create_meal_plans():
+    """Create many meal plans at once
+
+    Takes ``{'meal_plans': [{'date', 'meal_category_id', 'recipe_id',
+    'people_count', 'name'}, ...], 'on_conflict': 'error'}``. Categories and
+    recipes are validated against id sets loaded once for the whole request.
+    """
+    data = request.get_json()
+    
+    if not data or not data.get('meal_plans'):
+        return jsonify({'error': 'At least one meal plan is required'}), 400
+    if len(data['meal_plans']) > MAX_BULK_PLANS:
+        return jsonify({'error': f'Cannot create more than {MAX_BULK_PLANS} meal plans at once'}), 400
+    
+    for index, entry in enumerate(data['meal_plans']):
+        if not isinstance(entry, dict) or not all(
+            isinstance(entry.get(key), int) for key in ('meal_category_id', 'recipe_id')
+        ) or 'date' not in entry:
+            return jsonify({'error': f'Meal plan {index} needs a date, meal category ID and recipe ID'}), 400
+    
+    category_names = dict(db.session.query(Category.id, Category.name).filter(
+        Category.type == 'meal',
+        Category.id.in_({entry['meal_category_id'] for entry in data['meal_plans']})
+    ))
+    recipe_names = dict(db.session.query(Recipe.id, Recipe.name).filter(
+        Recipe.id.in_({entry['recipe_id'] for entry in data['meal_plans']})
+    ))
+    
+    plans = []
+    for index, entry in enumerate(data['meal_plans']):
+        try:
+            meal_date = datetime.strptime(entry['date'], '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            return jsonify({'error': f'Meal plan {index} has an invalid date. Use YYYY-MM-DD'}), 400
+        if entry['meal_category_id'] not in category_names:
+            return jsonify({'error': f'Meal plan {index} has an invalid meal category'}), 400
+        if entry['recipe_id'] not in recipe_names:
+            return jsonify({'error': f'Meal plan {index} has an invalid recipe'}), 400
+        people_count = entry.get('people_count', 4)
+        if not isinstance(people_count, int) or isinstance(people_count, bool) or people_count <= 0:
+            return jsonify({'error': 'People count must be positive'}), 400
+        plans.append({
+            'name': entry.get('name') or f"{recipe_names[entry['recipe_id']]} - {category_names[entry['meal_category_id']]}",
+            'date': meal_date,
+            'meal_category_id': entry['meal_category_id'],
+            'recipe_id': entry['recipe_id'],
+            'people_count': people_count
+        })
+    
+    return insert_meal_plans(plans, data.get('on_conflict', 'error'))
+
+@meal_plans_bp.route('/meal-plans/copy', methods=['POST'])
+def copy_meal_plans():
+    """Copy the plans of a date range to later ranges
+
+    Takes ``{'source_start', 'source_end', 'target_start', 'repeat': 1,
+    'on_conflict': 'error'}``. The source range is copied to target_start
+    and then to each following range of the same length, ``repeat`` times,
+    so last week can be repeated for the next four weeks in one request.
+    """
+    data = request.get_json()
+    
+    if not data or not all(key in data for key in ('source_start', 'source_end', 'target_start')):
+        return jsonify({'error': 'source_start, source_end and target_start are required'}), 400
+    try:
+        source_start = datetime.strptime(data['source_start'], '%Y-%m-%d').date()
+        source_end = datetime.strptime(data['source_end'], '%Y-%m-%d').date()
+        target_start = datetime.strptime(data['target_start'], '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    if source_end < source_start:
+        return jsonify({'error': 'source_end must not be before source_start'}), 400
+    
+    repeat = data.get('repeat', 1)
+    if not isinstance(repeat, int) or isinstance(repeat, bool) or repeat <= 0:
+        return jsonify({'error': 'repeat must be a positive integer'}), 400
+    span = (source_end - source_start).days + 1
+    if target_start <= source_end and target_start + timedelta(days=span * repeat - 1) >= source_start:
+        return jsonify({'error': 'Target ranges must not overlap the source range'}), 400
+    
+    source_plans = db.session.query(
+        MealPlan.name, MealPlan.date, MealPlan.meal_category_id, MealPlan.recipe_id, MealPlan.people_count
+    ).filter(MealPlan.date >= source_start, MealPlan.date <= source_end).all()
+    if not source_plans:
+        return jsonify({'error': 'No meal plans in the source range'}), 400
+    if len(source_plans) * repeat > MAX_BULK_PLANS:
+        return jsonify({'error': f'Cannot create more than {MAX_BULK_PLANS} meal plans at once'}), 400
+    
+    plans = []
+    for copy_index in range(repeat):
+        offset = (target_start - source_start) + timedelta(days=span * copy_index)
+        for name, plan_date, category_id, recipe_id, people_count in source_plans:
+            plans.append({
+                'name': name,
+                'date': plan_date + offset,
+                'meal_category_id': category_id,
+                'recipe_id': recipe_id,
+                'people_count': people_count
+            })
+    
+    return insert_meal_plans(plans, data.get('on_conflict', 'error'))
+
 @meal_plans_bp.route('/meal-plans/<int:meal_plan_id>', methods=['PUT'])
 def update_meal_plan(meal_plan_id):
     """Update an existing meal plan"""
@@ -146,7 +417,11 @@ def update_meal_plan(meal_plan_id):
     
     try:
         db.session.commit()
+        response_cache.invalidate('meal_plans')
         return jsonify(meal_plan.to_dict())
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'Meal plan already exists for this date and category'}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to update meal plan'}), 500
@@ -159,6 +434,7 @@ def delete_meal_plan(meal_plan_id):
     try:
         db.session.delete(meal_plan)
         db.session.commit()
+        response_cache.invalidate('meal_plans')
         return jsonify({'message': 'Meal plan deleted successfully'})
     except Exception as e:
         db.session.rollback()
@@ -200,6 +476,7 @@ def adjust_meal_portions():
     
     try:
         db.session.commit()
+        response_cache.invalidate('meal_plans')
         return jsonify({
             'meal_plan_id': meal_plan.id,
             'recipe_name': recipe.name,
@@ -212,3 +489,106 @@ def adjust_meal_portions():
         db.session.rollback()
         return jsonify({'error': 'Failed to update meal plan'}), 500
 
+@meal_plans_bp.route('/meal-plans/adjust-portions/batch', methods=['POST'])
+def adjust_portions_batch():
+    """Calculate adjusted portions for many recipes and meal plans at once
+
+    Takes ``{'entries': [{'meal_plan_id' or 'recipe_id', 'people_count'}, ...],
+    'persist': false}`` and returns one result per entry, in order. With
+    ``persist`` the new people counts of all meal plan entries are saved in
+    a single transaction.
+    """
+    data = request.get_json()
+    
+    if not data or not data.get('entries'):
+        return jsonify({'error': 'At least one entry is required'}), 400
+    
+    entries = []
+    for index, entry in enumerate(data['entries']):
+        if not isinstance(entry, dict) or ('recipe_id' in entry) == ('meal_plan_id' in entry):
+            return jsonify({'error': f'Entry {index} needs either a recipe ID or a meal plan ID'}), 400
+        entry_id = entry.get('meal_plan_id', entry.get('recipe_id'))
+        if not isinstance(entry_id, int) or isinstance(entry_id, bool):
+            return jsonify({'error': f'Entry {index} has an invalid ID'}), 400
+        try:
+            people_count = int(entry.get('people_count'))
+        except (TypeError, ValueError):
+            return jsonify({'error': f'Entry {index} needs a people count'}), 400
+        if people_count <= 0:
+            return jsonify({'error': 'People count must be positive'}), 400
+        entries.append((entry.get('meal_plan_id'), entry.get('recipe_id'), people_count))
+    
+    # Resolve meal plans to recipes with one query
+    meal_plan_ids = {meal_plan_id for meal_plan_id, _, _ in entries if meal_plan_id is not None}
+    meal_plan_recipes = {}
+    if meal_plan_ids:
+        meal_plan_recipes = dict(
+            db.session.query(MealPlan.id, MealPlan.recipe_id).filter(MealPlan.id.in_(meal_plan_ids))
+        )
+        if len(meal_plan_recipes) != len(meal_plan_ids):
+            return jsonify({'error': 'One or more meal plan IDs are invalid'}), 400
+    
+    # Load every needed recipe and its ingredients with one query
+    recipe_ids = {
+        meal_plan_recipes[meal_plan_id] if meal_plan_id is not None else recipe_id
+        for meal_plan_id, recipe_id, _ in entries
+    }
+    recipes = {}
+    rows = db.session.query(
+        Recipe.id, Recipe.name, Recipe.servings,
+        Ingredient.id, Ingredient.name, Ingredient.quantity, Ingredient.unit, Ingredient.notes
+    ).outerjoin(Ingredient, Ingredient.recipe_id == Recipe.id).filter(
+        Recipe.id.in_(recipe_ids)
+    ).order_by(Recipe.id, Ingredient.id)
+    for row in rows:
+        recipe = recipes.setdefault(row[0], {'name': row[1], 'servings': row[2], 'ingredients': []})
+        if row[3] is not None:
+            recipe['ingredients'].append(row[3:])
+    if len(recipes) != len(recipe_ids):
+        return jsonify({'error': 'One or more recipe IDs are invalid'}), 400
+    
+    results = []
+    # Later entries for the same meal plan win
+    people_counts = {}
+    for meal_plan_id, recipe_id, people_count in entries:
+        recipe_id = meal_plan_recipes[meal_plan_id] if meal_plan_id is not None else recipe_id
+        recipe = recipes[recipe_id]
+        if not recipe['servings']:
+            return jsonify({'error': f"Recipe {recipe['name']} has no servings"}), 400
+        scaling_factor = people_count / recipe['servings']
+        adjusted_ingredients = []
+        for ingredient_id, name, quantity, unit, notes in recipe['ingredients']:
+            adjusted_ingredients.append({
+                'id': ingredient_id,
+                'name': name,
+                'original_quantity': quantity,
+                'adjusted_quantity': round(quantity * scaling_factor, 2),
+                'unit': unit,
+                'notes': notes
+            })
+        result = {
+            'recipe_id': recipe_id,
+            'recipe_name': recipe['name'],
+            'original_servings': recipe['servings'],
+            'adjusted_servings': people_count,
+            'scaling_factor': round(scaling_factor, 2),
+            'adjusted_ingredients': adjusted_ingredients
+        }
+        if meal_plan_id is not None:
+            result['meal_plan_id'] = meal_plan_id
+            people_counts[meal_plan_id] = people_count
+        results.append(result)
+    
+    if data.get('persist') and people_counts:
+        try:
+            db.session.execute(update(MealPlan), [
+                {'id': meal_plan_id, 'people_count': people_count}
+                for meal_plan_id, people_count in people_counts.items()
+            ])
+            db.session.commit()
+            response_cache.invalidate('meal_plans')
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'error': 'Failed to update meal plans'}), 500
+    
+    return jsonify({'results': results})
@@ -1,37 +1,201 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, abort, stream_with_context
 from src.models.recipe import db, Recipe, Ingredient, Category
+from src.models.units import to_canonical
+from src.models.bulk_import import RecipeImporter
+from src.models.child_rows import UnknownChildRowError, sync_child_rows
+from src.models.bulk_export import iter_ndjson, iter_csv, parse_since
+from src.response_cache import cached_json_response, response_cache
+from src.json_response import encode_json, json_response
+from src.models.serializers import RECIPE_SCHEMA, INGREDIENT_SCHEMA, attach_children
+from src.models.images import DEFAULT_IMAGE_SIZE, IMAGE_VARIANTS, InvalidImage, check_image, select_image
+from src.models.recipe_deletion import release_recipes
+from src.image_processing import get_image_processor
+from src.models.search import build_match_query, search_matches, index_recipe, ensure_search_index, rebuild_search_index
+from sqlalchemy import tuple_
+from sqlalchemy.orm import joinedload, subqueryload
+from datetime import datetime
+import base64
+import binascii
 import os
-from werkzeug.utils import secure_filename
 
 recipes_bp = Blueprint('recipes', __name__)
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 
+INGREDIENT_FIELDS = ('name', 'quantity', 'unit', 'notes', 'canonical_quantity', 'canonical_unit')
+
+# Recipe cards in list views only need the card-sized image
+LIST_IMAGE_SIZE = 'card'
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def eager_recipe_query():
+    """Recipe query that loads categories and ingredients up front.
+
+    The category is joined into the recipe SELECT and all ingredients are
+    fetched with a single subquery load, so serializing the result with
+    to_dict() costs two queries no matter how many recipes are returned.
+    """
+    return Recipe.query.options(
+        joinedload(Recipe.category),
+        subqueryload(Recipe.ingredients)
+    )
+
+def encode_cursor(sort_key, recipe_id):
+    """Build an opaque keyset cursor pointing just after the given recipe.
+
+    sort_key is the recipe's created_at, or its search rank when searching.
+    """
+    raw = f"{serialize_value(sort_key)}|{recipe_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(cursor, parse_sort_key):
+    """Return the (sort_key, id) pair encoded in a cursor"""
+    try:
+        sort_key, recipe_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return parse_sort_key(sort_key), int(recipe_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError('Invalid cursor')
+
+def parse_fields(raw_fields):
+    """Parse a comma separated ?fields= value into a list of field names"""
+    fields = [field.strip() for field in raw_fields.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in RECIPE_SCHEMA.fields and field != 'ingredients']
+    if not fields or unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}" if unknown else 'No fields requested')
+    return fields
+
+def serialize_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
 @recipes_bp.route('/recipes', methods=['GET'])
 def get_recipes():
-    """Get all recipes with optional filtering"""
+    """Get recipes with optional filtering, keyset pagination and sparse fields
+
+    Without ``limit`` or ``cursor`` the full list is returned as before. When
+    either is given the response is ``{'recipes': [...], 'next_cursor': ...}``;
+    pass ``next_cursor`` back as ``cursor`` to fetch the following page.
+    Recipes are ordered newest first, or by relevance when ``search`` is set.
+    ``image_size`` picks the image variant returned (default ``card``).
+    """
     category_id = request.args.get('category_id', type=int)
     search = request.args.get('search', '')
+    cursor = request.args.get('cursor')
+    limit = request.args.get('limit', type=int)
+    paginate = cursor is not None or limit is not None
+    image_size = request.args.get('image_size', LIST_IMAGE_SIZE)
+    if image_size not in IMAGE_VARIANTS:
+        return jsonify({'error': f"Image size must be one of: {', '.join(IMAGE_VARIANTS)}"}), 400
     
-    query = Recipe.query
+    if paginate:
+        limit = DEFAULT_PAGE_SIZE if limit is None else limit
+        if limit <= 0 or limit > MAX_PAGE_SIZE:
+            return jsonify({'error': f'Limit must be between 1 and {MAX_PAGE_SIZE}'}), 400
     
-    if category_id:
-        query = query.filter_by(category_id=category_id)
+    fields = None
+    if 'fields' in request.args:
+        try:
+            fields = parse_fields(request.args['fields'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
     
+    matches = None
     if search:
-        query = query.filter(Recipe.name.contains(search))
+        match_query = build_match_query(search)
+        if match_query is None:
+            return jsonify({'recipes': [], 'next_cursor': None} if paginate else [])
+        matches = search_matches(match_query)
+    
+    # Each row carries the recipe's sort key second so the next cursor can
+    # be built from the last row of the page
+    sort_column = matches.c.rank if matches is not None else Recipe.created_at
+    
+    # Recipes are read as plain tuples with just the requested columns;
+    # ingredients are attached afterwards from one query per batch
+    if fields is None:
+        schema, with_ingredients = RECIPE_SCHEMA, True
+    else:
+        schema = RECIPE_SCHEMA.only([field for field in fields if field != 'ingredients'])
+        with_ingredients = 'ingredients' in fields
+    columns = list(schema.columns)
+    if 'image_path' in schema.fields:
+        # Read last, to pick the variant image_path should point at
+        columns.append(Recipe.image_variants)
+    query = db.session.query(Recipe.id, sort_column, *columns)
+    if 'category_name' in schema.fields:
+        query = query.outerjoin(Category, Recipe.category_id == Category.id)
+    
+    if matches is not None:
+        query = query.join(matches, matches.c.recipe_id == Recipe.id)
+    
+    if category_id:
+        query = query.filter(Recipe.category_id == category_id)
+    
+    if cursor:
+        try:
+            cursor_key, cursor_id = decode_cursor(
+                cursor, float if matches is not None else datetime.fromisoformat
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        # Row-value comparison lets SQLite seek the (created_at, id) index
+        if matches is not None:
+            query = query.filter(tuple_(sort_column, Recipe.id) > tuple_(cursor_key, cursor_id))
+        else:
+            query = query.filter(tuple_(sort_column, Recipe.id) < tuple_(cursor_key, cursor_id))
+    
+    if matches is not None:
+        query = query.order_by(sort_column, Recipe.id)
+    else:
+        query = query.order_by(sort_column.desc(), Recipe.id.desc())
+    if paginate:
+        # Fetch one extra row to know whether another page exists
+        query = query.limit(limit + 1)
+    rows = query.all()
+    
+    next_cursor = None
+    if paginate and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last[1], last[0])
+    
+    results = [schema.serialize(row[2:]) for row in rows]
+    if 'image_path' in schema.fields:
+        for result, row in zip(results, rows):
+            result['image_path'], result['image'] = select_image(result['image_path'], row[-1], image_size)
+    if with_ingredients:
+        attach_children(results, [row[0] for row in rows], 'ingredients', INGREDIENT_SCHEMA, 'recipe_id')
     
-    recipes = query.order_by(Recipe.created_at.desc()).all()
-    return jsonify([recipe.to_dict() for recipe in recipes])
+    if paginate:
+        return json_response(encode_json({'recipes': results, 'next_cursor': next_cursor}))
+    return json_response(encode_json(results))
 
 @recipes_bp.route('/recipes/<int:recipe_id>', methods=['GET'])
 def get_recipe(recipe_id):
-    """Get a specific recipe by ID"""
-    recipe = Recipe.query.get_or_404(recipe_id)
-    return jsonify(recipe.to_dict())
+    """Get a specific recipe by ID
+
+    ``image_size`` picks the image variant returned (default ``full``).
+    """
+    image_size = request.args.get('image_size', DEFAULT_IMAGE_SIZE)
+    if image_size not in IMAGE_VARIANTS:
+        return jsonify({'error': f"Image size must be one of: {', '.join(IMAGE_VARIANTS)}"}), 400
+    
+    # The recipe's own version plus its category's, since the category
+    # name is part of the payload
+    version = db.session.query(Recipe.updated_at, Category.updated_at).outerjoin(
+        Category, Recipe.category_id == Category.id
+    ).filter(Recipe.id == recipe_id).first()
+    if version is None:
+        abort(404)
+    
+    return cached_json_response(
+        'recipe', (recipe_id,), tuple(version) + (image_size,),
+        lambda: eager_recipe_query().filter(Recipe.id == recipe_id).one().to_dict(image_size)
+    )
 
 @recipes_bp.route('/recipes', methods=['POST'])
 def create_recipe():
@@ -74,12 +238,55 @@ def create_recipe():
                     )
                     db.session.add(ingredient)
         
+        index_recipe(recipe.id)
         db.session.commit()
         return jsonify(recipe.to_dict()), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to create recipe'}), 500
 
+@recipes_bp.route('/recipes/import', methods=['POST'])
+def import_recipes():
+    """Bulk import recipes from an NDJSON body, one recipe object per line
+
+    The body is read as a stream and written in chunked transactions, so
+    lines that fail validation are reported by line number while the rest
+    are imported.
+    """
+    importer = RecipeImporter()
+    importer.import_stream(request.stream)
+    return jsonify(importer.summary())
+
+@recipes_bp.route('/recipes/export', methods=['GET'])
+def export_recipes():
+    """Stream the recipe catalog with ingredients as NDJSON or CSV
+
+    ``format`` is ``ndjson`` (default) or ``csv``. ``since`` limits the export
+    to recipes updated after an ISO 8601 timestamp; the X-Export-Started-At
+    header holds the value to pass as ``since`` on the next sync.
+    """
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({'error': 'Format must be either "ndjson" or "csv"'}), 400
+    
+    since = None
+    if request.args.get('since'):
+        try:
+            since = parse_since(request.args['since'])
+        except ValueError:
+            return jsonify({'error': 'Invalid since timestamp. Use ISO 8601'}), 400
+    
+    started_at = datetime.utcnow()
+    if export_format == 'csv':
+        body, mimetype = iter_csv(since), 'text/csv'
+    else:
+        body, mimetype = iter_ndjson(since), 'application/x-ndjson'
+    
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=recipes.{export_format}'
+    response.headers['X-Export-Started-At'] = started_at.isoformat()
+    return response
+
 @recipes_bp.route('/recipes/<int:recipe_id>', methods=['PUT'])
 def update_recipe(recipe_id):
     """Update an existing recipe"""
@@ -109,29 +316,46 @@ def update_recipe(recipe_id):
                 return jsonify({'error': 'Invalid recipe category'}), 400
         recipe.category_id = data['category_id']
     
+    # Ingredient changes do not touch the recipe row, so bump the version here
+    recipe.updated_at = datetime.utcnow()
+    
     # Update ingredients if provided
+    ingredients = None
     if 'ingredients' in data:
-        # Remove existing ingredients
-        Ingredient.query.filter_by(recipe_id=recipe_id).delete()
-        
-        # Add new ingredients
+        ingredients = []
         for ingredient_data in data['ingredients']:
             if 'name' in ingredient_data and 'quantity' in ingredient_data and 'unit' in ingredient_data:
-                ingredient = Ingredient(
-                    recipe_id=recipe_id,
-                    name=ingredient_data['name'],
-                    quantity=float(ingredient_data['quantity']),
-                    unit=ingredient_data['unit'],
-                    notes=ingredient_data.get('notes', '')
-                )
-                db.session.add(ingredient)
+                try:
+                    quantity = float(ingredient_data['quantity'])
+                except (TypeError, ValueError):
+                    return jsonify({'error': f"Invalid quantity for ingredient {ingredient_data['name']}"}), 400
+                canonical_quantity, canonical_unit = to_canonical(quantity, ingredient_data['unit'])
+                ingredients.append({
+                    'id': ingredient_data.get('id'),
+                    'name': ingredient_data['name'],
+                    'quantity': quantity,
+                    'unit': ingredient_data['unit'],
+                    'notes': ingredient_data.get('notes', ''),
+                    'canonical_quantity': canonical_quantity,
+                    'canonical_unit': canonical_unit
+                })
     
     try:
+        # Only write the ingredient rows that actually changed
+        if ingredients is not None:
+            try:
+                sync_child_rows(Ingredient, Ingredient.recipe_id, recipe_id, ingredients, INGREDIENT_FIELDS, 'name')
+            except UnknownChildRowError as e:
+                db.session.rollback()
+                return jsonify({'error': f'Unknown ingredient id: {e.row_id}'}), 400
+        index_recipe(recipe_id)
         db.session.commit()
-        return jsonify(recipe.to_dict())
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to update recipe'}), 500
+    
+    response_cache.invalidate('recipe', recipe_id)
+    return jsonify(recipe.to_dict())
 
 @recipes_bp.route('/recipes/<int:recipe_id>', methods=['DELETE'])
 def delete_recipe(recipe_id):
@@ -139,12 +363,11 @@ def delete_recipe(recipe_id):
     recipe = Recipe.query.get_or_404(recipe_id)
     
     try:
-        # Delete associated image file if exists
-        if recipe.image_path and os.path.exists(recipe.image_path):
-            os.remove(recipe.image_path)
-        
+        release_recipes([recipe])
         db.session.delete(recipe)
         db.session.commit()
+        response_cache.invalidate('recipe', recipe_id)
+        response_cache.invalidate('meal_plans')
         return jsonify({'message': 'Recipe deleted successfully'})
     except Exception as e:
         db.session.rollback()
@@ -152,7 +375,12 @@ def delete_recipe(recipe_id):
 
 @recipes_bp.route('/recipes/<int:recipe_id>/image', methods=['POST'])
 def upload_recipe_image(recipe_id):
-    """Upload an image for a recipe"""
+    """Upload an image for a recipe
+
+    The image is resized into its variants in the background; the response
+    is 202 and the recipe's ``image_status`` is ``processing`` until they
+    are ready.
+    """
     recipe = Recipe.query.get_or_404(recipe_id)
     
     if 'image' not in request.files:
@@ -163,30 +391,28 @@ def upload_recipe_image(recipe_id):
         return jsonify({'error': 'No file selected'}), 400
     
     if file and allowed_file(file.filename):
-        filename = secure_filename(f"recipe_{recipe_id}_{file.filename}")
-        
-        # Create images directory if it doesn't exist
-        images_dir = os.path.join(os.path.dirname(__file__), '..', 'static', 'images')
-        os.makedirs(images_dir, exist_ok=True)
-        
-        file_path = os.path.join(images_dir, filename)
+        try:
+            check_image(file.stream)
+        except InvalidImage as e:
+            return jsonify({'error': str(e)}), 400
         
+        processor = get_image_processor(current_app._get_current_object())
+        upload_path = processor.stage(file)
         try:
-            # Remove old image if exists
-            if recipe.image_path and os.path.exists(recipe.image_path):
-                os.remove(recipe.image_path)
-            
-            file.save(file_path)
-            recipe.image_path = f'/static/images/{filename}'
+            recipe.image_status = 'processing'
             db.session.commit()
-            
-            return jsonify({
-                'message': 'Image uploaded successfully',
-                'image_path': recipe.image_path
-            })
+            response_cache.invalidate('recipe', recipe_id)
         except Exception as e:
             db.session.rollback()
+            os.remove(upload_path)
             return jsonify({'error': 'Failed to upload image'}), 500
+        
+        processor.submit(recipe_id, upload_path)
+        return jsonify({
+            'message': 'Image uploaded, processing',
+            'image_status': recipe.image_status,
+            'image_path': recipe.image_path
+        }), 202
     
     return jsonify({'error': 'Invalid file type'}), 400
 
@@ -229,3 +455,10 @@ def adjust_portions():
         'adjusted_ingredients': adjusted_ingredients
     })
 
+@recipes_bp.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Rebuild the recipe full-text search index from the database"""
+    ensure_search_index()
+    count = rebuild_search_index()
+    db.session.commit()
+    print(f"Indexed {count} recipes")
@@ -1,30 +1,55 @@
-from flask import Blueprint, request, jsonify, send_file
-from src.models.recipe import db, ShoppingList, ShoppingListItem, MealPlan, Recipe, Ingredient
+from flask import Blueprint, current_app, request, jsonify, send_file, abort
+from src.models.recipe import db, ShoppingList, ShoppingListItem, MealPlan, Recipe, Ingredient, shopping_list_meal_plan
+from src.response_cache import ResponseCache, cached_json_response, make_etag, response_cache
+from src.json_response import encode_json, json_response
+from src.models.serializers import SHOPPING_LIST_SCHEMA, SHOPPING_LIST_ITEM_SCHEMA, attach_children
+from src.models.child_rows import UnknownChildRowError, sync_child_rows
+from src.item_state_queue import get_item_state_queue
+from src.export_jobs import EXPORT_FORMATS, ExportQueueFull, get_export_jobs
+from src.models.shopping_aggregation import aggregate_ingredients
+from src.models.shopping_list_export import EXCEL_LAYOUTS, load_items, render_pdf, write_excel
+from sqlalchemy import and_, exists, insert, literal, select, update
 from datetime import datetime
-from collections import defaultdict
-import io
+from concurrent.futures import TimeoutError as FutureTimeoutError
 import os
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-import openpyxl
-from openpyxl.styles import Font, Alignment
+import tempfile
 
 shopping_lists_bp = Blueprint('shopping_lists', __name__)
 
+ITEM_FIELDS = ('ingredient_name', 'quantity', 'unit', 'checked')
+
+# Seconds a queued item change may wait to be committed
+ITEM_WRITE_TIMEOUT = 10
+
+# Longest a status request may wait for an export job to finish, seconds
+MAX_EXPORT_JOB_WAIT = 30
+
+# Rendered PDFs keyed like response_cache entries; documents are much
+# larger than JSON bodies so fewer are kept
+pdf_cache = ResponseCache(max_entries=64)
+
 @shopping_lists_bp.route('/shopping-lists', methods=['GET'])
 def get_shopping_lists():
     """Get all shopping lists"""
-    shopping_lists = ShoppingList.query.order_by(ShoppingList.created_at.desc()).all()
-    return jsonify([shopping_list.to_dict() for shopping_list in shopping_lists])
+    rows = db.session.execute(
+        select(*SHOPPING_LIST_SCHEMA.columns).order_by(ShoppingList.created_at.desc())
+    ).all()
+    results = SHOPPING_LIST_SCHEMA.serialize_all(rows)
+    attach_children(results, [row[0] for row in rows], 'items', SHOPPING_LIST_ITEM_SCHEMA, 'shopping_list_id')
+    return json_response(encode_json(results))
 
 @shopping_lists_bp.route('/shopping-lists/<int:list_id>', methods=['GET'])
 def get_shopping_list(list_id):
     """Get a specific shopping list by ID"""
-    shopping_list = ShoppingList.query.get_or_404(list_id)
-    return jsonify(shopping_list.to_dict())
+    # Exports set exported_at without bumping updated_at
+    version = db.session.query(ShoppingList.updated_at, ShoppingList.exported_at).filter(ShoppingList.id == list_id).first()
+    if version is None:
+        abort(404)
+    
+    return cached_json_response(
+        'shopping_list', (list_id,), tuple(version),
+        lambda: ShoppingList.query.get(list_id).to_dict()
+    )
 
 @shopping_lists_bp.route('/shopping-lists', methods=['POST'])
 def create_shopping_list():
@@ -71,29 +96,45 @@ def update_shopping_list(list_id):
     if 'name' in data:
         shopping_list.name = data['name']
     
+    # Item changes do not touch the list row, so bump the version here
+    shopping_list.updated_at = datetime.utcnow()
+    
     # Update items if provided
+    items = None
     if 'items' in data:
-        # Remove existing items
-        ShoppingListItem.query.filter_by(shopping_list_id=list_id).delete()
-        
-        # Add new items
+        items = []
         for item_data in data['items']:
             if 'ingredient_name' in item_data and 'quantity' in item_data and 'unit' in item_data:
-                item = ShoppingListItem(
-                    shopping_list_id=list_id,
-                    ingredient_name=item_data['ingredient_name'],
-                    quantity=float(item_data['quantity']),
-                    unit=item_data['unit'],
-                    checked=item_data.get('checked', False)
-                )
-                db.session.add(item)
+                try:
+                    quantity = float(item_data['quantity'])
+                except (TypeError, ValueError):
+                    return jsonify({'error': f"Invalid quantity for item {item_data['ingredient_name']}"}), 400
+                items.append({
+                    'id': item_data.get('id'),
+                    'ingredient_name': item_data['ingredient_name'],
+                    'quantity': quantity,
+                    'unit': item_data['unit'],
+                    'checked': bool(item_data.get('checked', False))
+                })
     
     try:
+        # Only write the item rows that actually changed
+        if items is not None:
+            try:
+                sync_child_rows(
+                    ShoppingListItem, ShoppingListItem.shopping_list_id, list_id,
+                    items, ITEM_FIELDS, 'ingredient_name'
+                )
+            except UnknownChildRowError as e:
+                db.session.rollback()
+                return jsonify({'error': f'Unknown item id: {e.row_id}'}), 400
         db.session.commit()
-        return jsonify(shopping_list.to_dict())
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to update shopping list'}), 500
+    
+    response_cache.invalidate('shopping_list', list_id)
+    return jsonify(shopping_list.to_dict())
 
 @shopping_lists_bp.route('/shopping-lists/<int:list_id>', methods=['DELETE'])
 def delete_shopping_list(list_id):
@@ -103,6 +144,8 @@ def delete_shopping_list(list_id):
     try:
         db.session.delete(shopping_list)
         db.session.commit()
+        response_cache.invalidate('shopping_list', list_id)
+        pdf_cache.invalidate('shopping_list_pdf', list_id)
         return jsonify({'message': 'Shopping list deleted successfully'})
     except Exception as e:
         db.session.rollback()
@@ -110,221 +153,360 @@ def delete_shopping_list(list_id):
 
 @shopping_lists_bp.route('/shopping-lists/generate', methods=['POST'])
 def generate_shopping_list():
-    """Generate a shopping list from meal plans"""
-    data = request.get_json()
-    
-    if not data or 'meal_plan_ids' not in data or 'name' not in data:
-        return jsonify({'error': 'Meal plan IDs and shopping list name are required'}), 400
-    
-    meal_plan_ids = data['meal_plan_ids']
-    if not meal_plan_ids:
-        return jsonify({'error': 'At least one meal plan ID is required'}), 400
+    """Generate a shopping list from meal plans.
     
-    # Get meal plans
-    meal_plans = MealPlan.query.filter(MealPlan.id.in_(meal_plan_ids)).all()
-    if len(meal_plans) != len(meal_plan_ids):
-        return jsonify({'error': 'One or more meal plan IDs are invalid'}), 400
+    Plans are given either as meal_plan_ids or as a start_date/end_date range,
+    optionally limited to meal_category_ids. With a range, skip_covered leaves
+    out plans that an earlier generated list already includes; both options
+    are rejected alongside meal_plan_ids.
+    """
+    data = request.get_json()
     
-    # Aggregate ingredients
-    ingredient_totals = defaultdict(lambda: {'quantity': 0, 'unit': '', 'recipes': []})
+    if not data or 'name' not in data or ('meal_plan_ids' not in data and 'start_date' not in data):
+        return jsonify({'error': 'Shopping list name and either meal plan IDs or a date range are required'}), 400
     
-    for meal_plan in meal_plans:
-        recipe = meal_plan.recipe
-        scaling_factor = meal_plan.people_count / recipe.servings
+    if 'meal_plan_ids' in data:
+        meal_plan_ids = data['meal_plan_ids']
+        if not meal_plan_ids:
+            return jsonify({'error': 'At least one meal plan ID is required'}), 400
+        if data.get('skip_covered') or data.get('meal_category_ids'):
+            return jsonify({'error': 'skip_covered and meal_category_ids only apply to a date range'}), 400
+        plan_condition = MealPlan.id.in_(meal_plan_ids)
+    else:
+        try:
+            start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
+            end_date = datetime.strptime(data.get('end_date') or data['start_date'], '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+        if end_date < start_date:
+            return jsonify({'error': 'end_date must not be before start_date'}), 400
         
-        for ingredient in recipe.ingredients:
-            key = ingredient.name.lower().strip()
-            adjusted_quantity = ingredient.quantity * scaling_factor
-            
-            # If this is the first time we see this ingredient, set the unit
-            if ingredient_totals[key]['unit'] == '':
-                ingredient_totals[key]['unit'] = ingredient.unit
-            
-            # Only add quantities if units match (simple approach)
-            if ingredient_totals[key]['unit'] == ingredient.unit:
-                ingredient_totals[key]['quantity'] += adjusted_quantity
-            else:
-                # Create separate entry for different units
-                key_with_unit = f"{key}_{ingredient.unit}"
-                ingredient_totals[key_with_unit]['quantity'] += adjusted_quantity
-                ingredient_totals[key_with_unit]['unit'] = ingredient.unit
-                ingredient_totals[key_with_unit]['recipes'].append(recipe.name)
-                continue
-            
-            ingredient_totals[key]['recipes'].append(recipe.name)
+        # Resolved server-side from a range scan on the (date, meal_category_id) index
+        plan_condition = and_(MealPlan.date >= start_date, MealPlan.date <= end_date)
+        if data.get('meal_category_ids'):
+            if not isinstance(data['meal_category_ids'], list):
+                return jsonify({'error': 'meal_category_ids must be a list'}), 400
+            plan_condition = and_(plan_condition, MealPlan.meal_category_id.in_(data['meal_category_ids']))
+        if data.get('skip_covered'):
+            plan_condition = and_(plan_condition, ~exists().where(
+                shopping_list_meal_plan.c.meal_plan_id == MealPlan.id
+            ))
+    
+    # Join, scale and sum in one query
+    plan_count, lines = aggregate_ingredients(plan_condition)
+    if 'meal_plan_ids' in data:
+        if plan_count != len(set(meal_plan_ids)):
+            return jsonify({'error': 'One or more meal plan IDs are invalid'}), 400
+    elif plan_count == 0:
+        return jsonify({'error': 'No meal plans to add in the date range'}), 400
     
     # Create shopping list
-    shopping_list = ShoppingList(name=data['name'])
+    shopping_list = ShoppingList(name=data['name'], items=[])
     
     try:
         db.session.add(shopping_list)
         db.session.flush()
         
-        # Add aggregated ingredients as shopping list items
-        for ingredient_name, details in ingredient_totals.items():
-            # Clean up ingredient name (remove unit suffix if added)
-            clean_name = ingredient_name.split('_')[0] if '_' in ingredient_name else ingredient_name
-            clean_name = clean_name.title()  # Capitalize properly
-            
-            item = ShoppingListItem(
-                shopping_list_id=shopping_list.id,
-                ingredient_name=clean_name,
-                quantity=round(details['quantity'], 2),
-                unit=details['unit'],
-                checked=False
-            )
-            db.session.add(item)
+        # Add aggregated ingredients as shopping list items in one executemany
+        item_rows = [
+            {
+                'shopping_list_id': shopping_list.id,
+                'ingredient_name': ingredient_name,
+                'quantity': quantity,
+                'unit': unit,
+                'checked': False
+            }
+            for ingredient_name, quantity, unit in lines
+        ]
+        item_ids = {}
+        if item_rows:
+            # RETURNING order is not guaranteed for a batched INSERT, so the
+            # ids are matched back by (name, unit), which is unique per list
+            item_table = ShoppingListItem.__table__
+            item_ids = {
+                (ingredient_name, unit): item_id
+                for item_id, ingredient_name, unit in db.session.execute(
+                    insert(item_table).returning(item_table.c.id, item_table.c.ingredient_name, item_table.c.unit),
+                    item_rows
+                )
+            }
+        
+        # Remember which plans this list covers
+        db.session.execute(insert(shopping_list_meal_plan).from_select(
+            ['shopping_list_id', 'meal_plan_id'],
+            select(literal(shopping_list.id), MealPlan.id).where(plan_condition)
+        ))
+        
+        # Build the response here rather than reloading the list after commit
+        result = shopping_list.to_dict()
+        result['items'] = sorted(
+            ({'id': item_ids[(row['ingredient_name'], row['unit'])], **row} for row in item_rows),
+            key=lambda item: item['id']
+        )
         
         db.session.commit()
-        return jsonify(shopping_list.to_dict()), 201
+        return jsonify(result), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to generate shopping list'}), 500
 
 @shopping_lists_bp.route('/shopping-lists/<int:list_id>/items/<int:item_id>/toggle', methods=['PUT'])
 def toggle_shopping_item(list_id, item_id):
-    """Toggle the checked status of a shopping list item"""
+    """Toggle the checked status of a shopping list item.
+    
+    A JSON body of {"checked": true/false} sets the status instead of
+    flipping it, so retries are safe. With SHOPPING_ITEM_WRITE_QUEUE enabled
+    the change is batched with others by the item state queue; either way
+    the response is sent once the change is committed.
+    """
+    data = request.get_json(silent=True) or {}
+    checked = data.get('checked')
+    if checked is not None and not isinstance(checked, bool):
+        return jsonify({'error': 'checked must be true or false'}), 400
+    
+    if current_app.config.get('SHOPPING_ITEM_WRITE_QUEUE'):
+        future = get_item_state_queue(current_app._get_current_object()).submit(list_id, item_id, checked)
+        try:
+            item = future.result(timeout=ITEM_WRITE_TIMEOUT)
+        except FutureTimeoutError:
+            return jsonify({'error': 'Timed out waiting for the item to be saved'}), 503
+        except Exception as e:
+            return jsonify({'error': 'Failed to update item'}), 500
+        if item is None:
+            abort(404)
+        return jsonify(item)
+    
     item = ShoppingListItem.query.filter_by(
         id=item_id, 
         shopping_list_id=list_id
     ).first_or_404()
     
-    item.checked = not item.checked
+    # Bump the list first: loading it after changing the item would flush
+    # the item outside the try below
+    item.shopping_list.updated_at = datetime.utcnow()
+    item.checked = (not item.checked) if checked is None else checked
     
     try:
         db.session.commit()
+        response_cache.invalidate('shopping_list', list_id)
         return jsonify(item.to_dict())
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to update item'}), 500
 
+def _record_export(app, list_ids):
+    """Set exported_at without changing the lists' version"""
+    with app.app_context():
+        try:
+            db.session.execute(
+                update(ShoppingList).where(ShoppingList.id.in_(list_ids)).values(
+                    exported_at=datetime.utcnow(),
+                    # Keep onupdate from bumping it, which would invalidate
+                    # every cached rendering of the list
+                    updated_at=ShoppingList.updated_at
+                )
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+
 @shopping_lists_bp.route('/shopping-lists/<int:list_id>/export/pdf', methods=['GET'])
 def export_shopping_list_pdf(list_id):
     """Export shopping list as PDF"""
-    shopping_list = ShoppingList.query.get_or_404(list_id)
-    
-    # Create PDF in memory
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-    story = []
-    
-    # Title
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        spaceAfter=30,
-        alignment=1  # Center alignment
-    )
-    story.append(Paragraph(f"Shopping List: {shopping_list.name}", title_style))
-    story.append(Spacer(1, 12))
-    
-    # Date
-    date_style = ParagraphStyle(
-        'DateStyle',
-        parent=styles['Normal'],
-        fontSize=10,
-        alignment=1
-    )
-    story.append(Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M')}", date_style))
-    story.append(Spacer(1, 20))
-    
-    # Items table
-    if shopping_list.items:
-        table_data = [['☐', 'Item', 'Quantity', 'Unit']]
-        
-        for item in shopping_list.items:
-            checkbox = '☑' if item.checked else '☐'
-            table_data.append([
-                checkbox,
-                item.ingredient_name,
-                str(item.quantity),
-                item.unit
-            ])
-        
-        table = Table(table_data, colWidths=[0.5*inch, 3*inch, 1*inch, 1*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        story.append(table)
+    shopping_list = db.session.query(
+        ShoppingList.name, ShoppingList.updated_at
+    ).filter(ShoppingList.id == list_id).first()
+    if shopping_list is None:
+        abort(404)
+    name, updated_at = shopping_list
+    
+    # updated_at also changes with every item change, so it versions the
+    # whole document
+    etag = make_etag('shopping_list_pdf', (list_id,), updated_at)
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
     else:
-        story.append(Paragraph("No items in this shopping list.", styles['Normal']))
-    
-    doc.build(story)
-    buffer.seek(0)
-    
-    # Update exported timestamp
-    shopping_list.exported_at = datetime.utcnow()
-    db.session.commit()
-    
-    return send_file(
-        buffer,
+        key = ('shopping_list_pdf', (list_id,), updated_at)
+        pdf = pdf_cache.get(key)
+        if pdf is None:
+            pdf = render_pdf(name, load_items(list_id))
+            # Older versions of this list can never be served again
+            pdf_cache.invalidate('shopping_list_pdf', list_id)
+            pdf_cache.set(key, pdf)
+        # A plain response rather than send_file, whose passthrough file
+        # body skips call_on_close callbacks
+        response = current_app.response_class(pdf, mimetype='application/pdf')
+        response.headers.set(
+            'Content-Disposition', 'attachment',
+            filename=f"shopping_list_{name.replace(' ', '_')}.pdf"
+        )
+    response.set_etag(etag)
+    
+    # Record the export once the response has been sent
+    app = current_app._get_current_object()
+    response.call_on_close(lambda: _record_export(app, [list_id]))
+    return response
+
+def _parse_ids(raw_ids):
+    """Parse a comma separated ?ids= value into a list of ints"""
+    return [int(value) for value in raw_ids.split(',') if value.strip()]
+
+def _excel_response(lists, layout, download_name):
+    """Send a workbook of lists and record their export once it is sent"""
+    # Rows are spooled to disk by openpyxl anyway, so the finished workbook
+    # goes to a temporary file rather than memory too
+    file = tempfile.TemporaryFile()
+    try:
+        write_excel(lists, file, layout)
+        file.seek(0)
+    except Exception:
+        file.close()
+        raise
+    
+    response = send_file(
+        file,
         as_attachment=True,
-        download_name=f"shopping_list_{shopping_list.name.replace(' ', '_')}.pdf",
-        mimetype='application/pdf'
+        download_name=download_name,
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
     )
+    # Without passthrough the body is iterated by the response, so its
+    # close (and call_on_close) runs once the file has been sent
+    response.direct_passthrough = False
+    app = current_app._get_current_object()
+    list_ids = [list_id for list_id, _ in lists]
+    response.call_on_close(lambda: _record_export(app, list_ids))
+    return response
 
 @shopping_lists_bp.route('/shopping-lists/<int:list_id>/export/excel', methods=['GET'])
 def export_shopping_list_excel(list_id):
     """Export shopping list as Excel file"""
-    shopping_list = ShoppingList.query.get_or_404(list_id)
+    shopping_list = db.session.query(ShoppingList.id, ShoppingList.name).filter(ShoppingList.id == list_id).first()
+    if shopping_list is None:
+        abort(404)
     
-    # Create Excel workbook in memory
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Shopping List"
-    
-    # Title
-    ws['A1'] = f"Shopping List: {shopping_list.name}"
-    ws['A1'].font = Font(size=16, bold=True)
-    ws.merge_cells('A1:D1')
-    
-    # Date
-    ws['A2'] = f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M')}"
-    ws['A2'].font = Font(size=10)
-    ws.merge_cells('A2:D2')
-    
-    # Headers
-    headers = ['Checked', 'Item', 'Quantity', 'Unit']
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=4, column=col, value=header)
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal='center')
-    
-    # Items
-    for row, item in enumerate(shopping_list.items, 5):
-        ws.cell(row=row, column=1, value='✓' if item.checked else '')
-        ws.cell(row=row, column=2, value=item.ingredient_name)
-        ws.cell(row=row, column=3, value=item.quantity)
-        ws.cell(row=row, column=4, value=item.unit)
-    
-    # Adjust column widths
-    ws.column_dimensions['A'].width = 10
-    ws.column_dimensions['B'].width = 30
-    ws.column_dimensions['C'].width = 12
-    ws.column_dimensions['D'].width = 12
-    
-    # Save to buffer
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-    
-    # Update exported timestamp
-    shopping_list.exported_at = datetime.utcnow()
-    db.session.commit()
-    
-    return send_file(
-        buffer,
-        as_attachment=True,
-        download_name=f"shopping_list_{shopping_list.name.replace(' ', '_')}.xlsx",
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    return _excel_response(
+        [tuple(shopping_list)], 'sheets',
+        f"shopping_list_{shopping_list.name.replace(' ', '_')}.xlsx"
     )
 
+@shopping_lists_bp.route('/shopping-lists/export/excel', methods=['GET'])
+def export_shopping_lists_excel():
+    """Export several shopping lists as one Excel workbook
+
+    ``ids`` is a comma separated list of shopping list ids (default: every
+    list). ``layout`` is ``sheets`` (default) for one sheet per list or
+    ``consolidated`` for all items on a single sheet.
+    """
+    layout = request.args.get('layout', 'sheets')
+    if layout not in EXCEL_LAYOUTS:
+        return jsonify({'error': 'Layout must be either "sheets" or "consolidated"'}), 400
+    
+    query = db.session.query(ShoppingList.id, ShoppingList.name).order_by(ShoppingList.id)
+    if request.args.get('ids'):
+        try:
+            list_ids = _parse_ids(request.args['ids'])
+        except ValueError:
+            return jsonify({'error': 'ids must be comma separated integers'}), 400
+        query = query.filter(ShoppingList.id.in_(list_ids))
+        lists = [tuple(row) for row in query]
+        missing = set(list_ids) - {list_id for list_id, _ in lists}
+        if missing:
+            return jsonify({'error': f"Shopping lists not found: {', '.join(map(str, sorted(missing)))}"}), 404
+    else:
+        lists = [tuple(row) for row in query]
+    
+    if not lists:
+        return jsonify({'error': 'No shopping lists to export'}), 404
+    
+    return _excel_response(lists, layout, f"shopping_lists_{layout}.xlsx")
+
+@shopping_lists_bp.route('/shopping-lists/export-jobs', methods=['POST'])
+def create_export_job():
+    """Queue a PDF or Excel export to be rendered in the background
+
+    Takes ``format`` (``pdf`` or ``excel``), ``shopping_list_ids`` (exactly
+    one for PDF) and for Excel an optional ``layout``. Returns the job with
+    202, or the existing job with 200 if the same export of the same list
+    versions was already requested.
+    """
+    data = request.get_json()
+    
+    if not data:
+        return jsonify({'error': 'No data provided'}), 400
+    
+    export_format = data.get('format')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': 'Format must be either "pdf" or "excel"'}), 400
+    
+    list_ids = data.get('shopping_list_ids')
+    if not isinstance(list_ids, list) or not list_ids or not all(isinstance(list_id, int) for list_id in list_ids):
+        return jsonify({'error': 'shopping_list_ids must be a non-empty list of ids'}), 400
+    if export_format == 'pdf' and len(list_ids) != 1:
+        return jsonify({'error': 'PDF exports take exactly one shopping list'}), 400
+    
+    layout = data.get('layout', 'sheets') if export_format == 'excel' else None
+    if export_format == 'excel' and layout not in EXCEL_LAYOUTS:
+        return jsonify({'error': 'Layout must be either "sheets" or "consolidated"'}), 400
+    
+    rows = db.session.query(
+        ShoppingList.id, ShoppingList.name, ShoppingList.updated_at
+    ).filter(ShoppingList.id.in_(list_ids)).order_by(ShoppingList.id).all()
+    missing = set(list_ids) - {row.id for row in rows}
+    if missing:
+        return jsonify({'error': f"Shopping lists not found: {', '.join(map(str, sorted(missing)))}"}), 404
+    
+    if len(rows) == 1:
+        download_name = f"shopping_list_{rows[0].name.replace(' ', '_')}{'.pdf' if export_format == 'pdf' else '.xlsx'}"
+    else:
+        download_name = f"shopping_lists_{layout}.xlsx"
+    
+    try:
+        job, created = get_export_jobs(current_app._get_current_object()).submit(
+            export_format,
+            [(row.id, row.name) for row in rows],
+            layout,
+            [row.updated_at for row in rows],
+            download_name
+        )
+    except ExportQueueFull:
+        return jsonify({'error': 'Too many exports in progress, try again later'}), 503
+    
+    return jsonify(job.to_dict()), 202 if created else 200
+
+@shopping_lists_bp.route('/shopping-lists/export-jobs/<job_id>', methods=['GET'])
+def get_export_job(job_id):
+    """Get an export job's status
+
+    With ``wait`` (seconds, at most 30) the request is held until the job
+    has finished or the time is up.
+    """
+    export_jobs = get_export_jobs(current_app._get_current_object())
+    job = export_jobs.get(job_id)
+    if job is None:
+        abort(404)
+    
+    wait = request.args.get('wait', type=float)
+    if wait:
+        job = export_jobs.wait(job, min(max(wait, 0), MAX_EXPORT_JOB_WAIT))
+    return jsonify(job.to_dict())
+
+@shopping_lists_bp.route('/shopping-lists/export-jobs/<job_id>/download', methods=['GET'])
+def download_export_job(job_id):
+    """Download the file rendered by a finished export job"""
+    job = get_export_jobs(current_app._get_current_object()).get(job_id)
+    if job is None:
+        abort(404)
+    if job.status != 'done':
+        return jsonify({'error': f'Export job is {job.status}', 'status': job.status}), 409
+    
+    try:
+        response = send_file(job.path, as_attachment=True, download_name=job.download_name, mimetype=job.mimetype)
+    except FileNotFoundError:
+        # Expired since it was looked up
+        abort(404)
+    # See _excel_response
+    response.direct_passthrough = False
+    app = current_app._get_current_object()
+    list_ids = [list_id for list_id, _ in job.lists]
+    response.call_on_close(lambda: _record_export(app, list_ids))
+    return response
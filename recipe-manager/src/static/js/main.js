@@ -194,7 +194,7 @@ class RecipeManager {
             <div class="recipe-card">
                 <div class="recipe-image">
                     ${recipe.image_path ? 
-                        `<img src="${recipe.image_path}" alt="${recipe.name}">` : 
+                        this.recipeImage(recipe) : 
                         '<i class="fas fa-utensils"></i>'
                     }
                 </div>
@@ -493,6 +493,20 @@ class RecipeManager {
         return date.toISOString().split('T')[0];
     }
 
+    recipeImage(recipe, className = '') {
+        // Processed images come with a WebP and a JPEG of the size the API
+        // picked for the view; older uploads only have image_path
+        const classAttr = className ? ` class="${className}"` : '';
+        if (!recipe.image) {
+            return `<img src="${recipe.image_path}" alt="${recipe.name}"${classAttr}>`;
+        }
+        const { webp, jpeg, width, height } = recipe.image;
+        return `<picture>
+            <source srcset="${webp}" type="image/webp">
+            <img src="${jpeg}" alt="${recipe.name}" width="${width}" height="${height}" loading="lazy"${classAttr}>
+        </picture>`;
+    }
+
     getWeekStart(date) {
         const d = new Date(date);
         const day = d.getDay();
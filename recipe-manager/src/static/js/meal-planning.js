@@ -183,7 +183,7 @@ class MealPlanningManager {
                             <div class="recipe-selection-card" data-recipe-id="${recipe.id}" onclick="window.mealPlanning.selectRecipe(${recipe.id}, '${date}', ${categoryId})">
                                 <div class="recipe-image-small">
                                     ${recipe.image_path ? 
-                                        `<img src="${recipe.image_path}" alt="${recipe.name}">` : 
+                                        window.recipeManager.recipeImage(recipe) : 
                                         '<i class="fas fa-utensils"></i>'
                                     }
                                 </div>
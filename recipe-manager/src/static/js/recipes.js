@@ -153,7 +153,7 @@ class RecipesManager {
             <div class="recipe-card" data-recipe-id="${recipe.id}">
                 <div class="recipe-image">
                     ${recipe.image_path ? 
-                        `<img src="${recipe.image_path}" alt="${recipe.name}">` : 
+                        window.recipeManager.recipeImage(recipe) : 
                         '<i class="fas fa-utensils"></i>'
                     }
                 </div>
@@ -365,7 +365,7 @@ class RecipesManager {
                 </div>
                 <div class="modal-body">
                     <div class="recipe-details">
-                        ${recipe.image_path ? `<img src="${recipe.image_path}" alt="${recipe.name}" class="recipe-detail-image">` : ''}
+                        ${recipe.image_path ? window.recipeManager.recipeImage(recipe, 'recipe-detail-image') : ''}
                         
                         <div class="recipe-meta-details">
                             ${recipe.prep_time ? `<span><i class="fas fa-clock"></i> Prep: ${recipe.prep_time} min</span>` : ''}
@@ -0,0 +1,161 @@
+"""
+In-memory manifest of the frontend's static files.
+
+The manifest is built once at startup: every file under the static folder
+is read with its size, content hash and, when there is an up-to-date .gz
+sibling written by precompress(), the compressed body too. Requests are
+then answered from memory without touching the filesystem, choosing the
+gzip body when Accept-Encoding allows it.
+
+index.html is rewritten so each /static/ URL it references carries
+?v=<content hash>. A request with the current version gets an immutable
+one-year Cache-Control; everything else, index.html included, must be
+revalidated and answers a matching If-None-Match with 304.
+
+Directories that change at runtime, like uploaded recipe images, are not
+in the manifest and are served from disk.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from flask import current_app, request, send_from_directory
+
+# Served from disk, since files are added while the app runs
+DYNAMIC_DIRS = ('images',)
+
+# Worth gzipping; images and fonts are already compressed
+COMPRESSIBLE_EXTENSIONS = {'.html', '.css', '.js', '.json', '.svg', '.txt', '.ico', '.map', '.xml'}
+
+INDEX_FILE = 'index.html'
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+# Names made of a SHA-256 hash, as written by the image store
+CONTENT_HASH_NAME = re.compile(r'^[0-9a-f]{64}\.[a-z0-9]+$')
+
+STATIC_URL_REFERENCE = re.compile(r'''((?:src|href)=["'])/static/([^"'?#]+)(["'])''')
+
+class Asset:
+    """One static file held in memory, with its gzip body if it has one"""
+
+    def __init__(self, path, body, gzip_body=None):
+        self.path = path
+        self.body = body
+        self.gzip_body = gzip_body
+        self.size = len(body)
+        self.version = hashlib.sha256(body).hexdigest()[:16]
+        self.mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+class AssetManifest:
+    """Static files by path relative to the static folder"""
+
+    def __init__(self, static_folder):
+        self.static_folder = static_folder
+        self.assets = {}
+        self.build()
+
+    def build(self):
+        assets = {}
+        for path in _static_files(self.static_folder):
+            with open(os.path.join(self.static_folder, path), 'rb') as file:
+                body = file.read()
+            assets[path] = Asset(path, body, _read_gzip_sibling(os.path.join(self.static_folder, path)))
+
+        # Pin index.html's asset URLs to their current versions. The rewrite
+        # changes its bytes, so any precompressed copy no longer matches and
+        # it is compressed here instead
+        index = assets.get(INDEX_FILE)
+        if index is not None:
+            html = STATIC_URL_REFERENCE.sub(
+                lambda match: self._versioned_reference(match, assets), index.body.decode('utf-8')
+            ).encode('utf-8')
+            assets[INDEX_FILE] = Asset(INDEX_FILE, html, gzip.compress(html, mtime=0))
+        self.assets = assets
+
+    @staticmethod
+    def _versioned_reference(match, assets):
+        asset = assets.get(match.group(2))
+        if asset is None:
+            return match.group(0)
+        return f'{match.group(1)}/static/{match.group(2)}?v={asset.version}{match.group(3)}'
+
+    def get(self, path):
+        return self.assets.get(path)
+
+    def respond(self, asset):
+        """Build the response for asset to the current request"""
+        immutable = request.args.get('v') == asset.version
+        use_gzip = asset.gzip_body is not None and request.accept_encodings.quality('gzip') > 0
+        etag = f"{asset.version}-gz" if use_gzip else asset.version
+
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = current_app.response_class(asset.gzip_body if use_gzip else asset.body, mimetype=asset.mimetype)
+            if use_gzip:
+                response.headers['Content-Encoding'] = 'gzip'
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
+        if asset.gzip_body is not None:
+            response.vary.add('Accept-Encoding')
+        return response
+
+def is_dynamic(path):
+    return path.split('/', 1)[0] in DYNAMIC_DIRS
+
+def send_dynamic(static_folder, path):
+    """Serve a file added at runtime from disk"""
+    response = send_from_directory(static_folder, path)
+    if CONTENT_HASH_NAME.match(os.path.basename(path)):
+        # Content-addressed files never change under the same name
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+def _static_files(static_folder):
+    """Yield the paths of the manifest's files relative to static_folder"""
+    for directory, subdirectories, filenames in os.walk(static_folder):
+        relative = os.path.relpath(directory, static_folder)
+        if relative == '.':
+            subdirectories[:] = [name for name in subdirectories if name not in DYNAMIC_DIRS]
+        for filename in filenames:
+            if filename.endswith('.gz'):
+                continue
+            path = filename if relative == '.' else f'{relative}/{filename}'
+            yield path.replace(os.sep, '/')
+
+def _read_gzip_sibling(path):
+    """Return the body of path's .gz sibling if it is newer than path"""
+    gzip_path = f'{path}.gz'
+    if not os.path.exists(gzip_path) or os.path.getmtime(gzip_path) < os.path.getmtime(path):
+        return None
+    with open(gzip_path, 'rb') as file:
+        return file.read()
+
+def precompress(static_folder, level=9):
+    """Write a .gz sibling next to each compressible static file.
+
+    Files where gzip would not save anything get no sibling (and a stale
+    one is removed). Returns [(path, size, compressed size)] for the files
+    compressed.
+    """
+    results = []
+    for path in _static_files(static_folder):
+        if os.path.splitext(path)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+            continue
+        full_path = os.path.join(static_folder, path)
+        with open(full_path, 'rb') as file:
+            body = file.read()
+        # mtime=0 keeps the output identical for identical input
+        compressed = gzip.compress(body, compresslevel=level, mtime=0)
+        gzip_path = f'{full_path}.gz'
+        if len(compressed) >= len(body):
+            if os.path.exists(gzip_path):
+                os.remove(gzip_path)
+            continue
+        with open(gzip_path, 'wb') as file:
+            file.write(compressed)
+        results.append((path, len(body), len(compressed)))
+    return results